@@ -1,6 +1,8 @@
 from datetime import timedelta
-from fastapi import APIRouter, HTTPException, status
-from ...core.auth import create_access_token, get_settings, supabase
+from fastapi import APIRouter, Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from jose import JWTError, jwt
+from ...core.auth import create_access_token, get_auth_client, get_settings, oauth2_scheme, revoke_token
 from ...schemas.auth import UserAuth, Token
 
 router = APIRouter()
@@ -9,7 +11,8 @@ settings = get_settings()
 @router.post("/signup", response_model=Token)
 async def signup(user_data: UserAuth):
     try:
-        user = supabase.auth.sign_up({
+        auth_client = await get_auth_client()
+        user = await run_in_threadpool(auth_client.sign_up, {
             "email": user_data.email,
             "password": user_data.password
         })
@@ -28,7 +31,8 @@ async def signup(user_data: UserAuth):
 @router.post("/login", response_model=Token)
 async def login(user_data: UserAuth):
     try:
-        user = supabase.auth.sign_in_with_password({
+        auth_client = await get_auth_client()
+        user = await run_in_threadpool(auth_client.sign_in_with_password, {
             "email": user_data.email,
             "password": user_data.password
         })
@@ -43,3 +47,16 @@ async def login(user_data: UserAuth):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
+
+@router.post("/logout")
+async def logout(token: str = Depends(oauth2_scheme)):
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await revoke_token(token, payload["exp"])
+    return {"message": "Logged out successfully"}
@@ -1,17 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from ...core.auth import get_current_user, supabase
-from ...schemas.entries import TimeEntry, NonAccountingEntry, MonthlySummary, MonthlyDetail
-from ...core.calculations import calculate_month_summary, calculate_year_summary, calculate_year_totals
-from ...core.validations import validate_time_entry, validate_non_accounting_entry
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+from pydantic import ValidationError as PydanticValidationError
+from typing import List, Optional, Tuple
+from ...core.auth import get_current_user
+from ...core.config import get_settings
+from ...core.data_version import data_versions, not_modified
+from ...core.database import get_db
+from ...core.hour_engine import premium_columns, time_seconds
+from ...core.pagination import CursorError, keyset_page, like_pattern
+from ...core.vacations import hire_date_of
+from ...schemas.entries import (
+    TimeEntry, NonAccountingEntry, NonAccountingType, MonthlySummary, MonthlyDetail, BulkRowResult, BulkImportResult,
+    TimeEntryPage, NonAccountingPage, YearHeatmap
+)
+from ...core import snapshots
+from ...core.heatmap import get_year_heatmap
+from ...core.calculations import get_month_bounds
+from ...core.validations import validate_time_entry, validate_time_entries_bulk, validate_non_accounting_entry
 from datetime import datetime, date
 
 router = APIRouter()
+settings = get_settings()
+
+# Colunas que a listagem pode devolver e as devolvidas quando `fields` não é informado
+TIME_ENTRY_FIELDS = ('id', 'date', 'start_time', 'end_time', 'comment', 'night_time', 'night_seconds', 'overtime_seconds')
+TIME_ENTRY_DEFAULT_FIELDS = ('id', 'date', 'start_time', 'end_time', 'comment')
+NON_ACCOUNTING_FIELDS = ('id', 'entry_date', 'days', 'type', 'comment')
+
+def _month_of(value) -> Tuple[int, int]:
+    """(ano, mês) de uma data ou de uma string ISO vinda do banco"""
+    if isinstance(value, str):
+        return int(value[0:4]), int(value[5:7])
+    return value.year, value.month
+
+def _time_entry_row(entry: TimeEntry) -> dict:
+    """Colunas gravadas de um turno, com as horas noturnas e extras já calculadas"""
+    return {
+        **entry.model_dump(),
+        **premium_columns(time_seconds(entry.start_time), time_seconds(entry.end_time))
+    }
 
 @router.get("/year/{year}", response_model=dict[str, MonthlySummary])
-async def get_year_summary(year: int, user=Depends(get_current_user)):
+async def get_year_summary(year: int, request: Request, response: Response, user=Depends(get_current_user)):
+    cached = not_modified(request, response, await data_versions.etag(user.id, f"year:{year}"))
+    if cached:
+        return cached
     try:
-        return calculate_year_summary(year, user.id)
+        return await snapshots.get_year_summary(year, user.id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -19,9 +55,27 @@ async def get_year_summary(year: int, user=Depends(get_current_user)):
         )
 
 @router.get("/year/{year}/totals", response_model=MonthlySummary)
-async def get_year_totals(year: int, user=Depends(get_current_user)):
+async def get_year_totals(year: int, request: Request, response: Response, user=Depends(get_current_user)):
+    cached = not_modified(request, response, await data_versions.etag(user.id, f"year-totals:{year}"))
+    if cached:
+        return cached
     try:
-        return calculate_year_totals(year, user.id)
+        return await snapshots.get_year_totals(year, user.id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/year/{year}/calendar", response_model=YearHeatmap)
+async def get_year_calendar(request: Request, response: Response, year: int = Path(..., ge=1900, le=2200),
+                            user=Depends(get_current_user)):
+    """Minutos trabalhados, ausências, feriados e dias úteis de cada dia do ano, em arrays"""
+    cached = not_modified(request, response, await data_versions.etag(user.id, f"calendar:{year}"))
+    if cached:
+        return cached
+    try:
+        return await get_year_heatmap(year, user.id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -29,21 +83,26 @@ async def get_year_totals(year: int, user=Depends(get_current_user)):
         )
 
 @router.get("/month/{month}/{year}", response_model=MonthlyDetail)
-async def get_month_detail(month: int, year: int, user=Depends(get_current_user)):
+async def get_month_detail(month: int, year: int, request: Request, response: Response, user=Depends(get_current_user)):
+    # A versão é lida antes do cálculo: uma escrita concorrente gera outro ETag
+    cached = not_modified(request, response, await data_versions.etag(user.id, f"month:{year}-{month}"))
+    if cached:
+        return cached
     try:
-        summary = calculate_month_summary(month, year, user.id)
+        start_date, end_date = get_month_bounds(year, month)
         
-        # Buscar lançamentos de tempo
-        time_entries = supabase.table('time_entries').select('*').eq('user_id', user.id)\
-            .gte('date', f'{year}-{month:02d}-01')\
-            .lt('date', f'{year}-{month+1:02d}-01' if month < 12 else f'{year+1}-01-01')\
-            .execute()
-            
-        # Buscar lançamentos não contábeis
-        non_accounting = supabase.table('non_accounting_entries').select('*').eq('user_id', user.id)\
-            .gte('entry_date', f'{year}-{month:02d}-01')\
-            .lt('entry_date', f'{year}-{month+1:02d}-01' if month < 12 else f'{year+1}-01-01')\
-            .execute()
+        # Sumário e lançamentos do mês são buscados em paralelo
+        summary, time_entries, non_accounting = await asyncio.gather(
+            snapshots.get_month_summary(month, year, user.id),
+            get_db().table('time_entries').select('*').eq('user_id', user.id)\
+                .gte('date', start_date.isoformat())\
+                .lt('date', end_date.isoformat())\
+                .execute(),
+            get_db().table('non_accounting_entries').select('*').eq('user_id', user.id)\
+                .gte('entry_date', start_date.isoformat())\
+                .lt('entry_date', end_date.isoformat())\
+                .execute()
+        )
             
         return MonthlyDetail(
             summary=summary,
@@ -56,6 +115,81 @@ async def get_month_detail(month: int, year: int, user=Depends(get_current_user)
             detail=str(e)
         )
 
+def _projection(fields: Optional[str], allowed: tuple, default: tuple, keys: tuple) -> str:
+    """Colunas selecionadas na listagem; as do cursor sempre vêm na resposta"""
+    selected = [field.strip() for field in fields.split(',') if field.strip()] if fields else list(default)
+    unknown = sorted(set(selected) - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos inválidos: {', '.join(unknown)}"
+        )
+    return ','.join(dict.fromkeys(keys + tuple(selected)))
+
+async def _list_entries(table: str, date_column: str, columns: str, user_id: str,
+                        start: Optional[date], end: Optional[date], text: Optional[str],
+                        order: str, limit: int, cursor: Optional[str], **equals) -> dict:
+    """Uma página de lançamentos do usuário ordenados por (data, id)"""
+    if start and end and end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A data inicial deve ser anterior à data final"
+        )
+    query = get_db().table(table).select(columns).eq('user_id', user_id)
+    if start:
+        query = query.gte(date_column, start.isoformat())
+    if end:
+        query = query.lte(date_column, end.isoformat())
+    if text:
+        query = query.ilike('comment', like_pattern(text))
+    for column, value in equals.items():
+        if value is not None:
+            query = query.eq(column, value)
+    try:
+        items, next_cursor = await keyset_page(
+            query, (date_column, 'id'), (date.fromisoformat, int), limit, cursor, desc=order == 'desc'
+        )
+    except CursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/entries/time", response_model=TimeEntryPage, response_model_exclude_unset=True)
+async def list_time_entries(
+    start: Optional[date] = Query(None, description="Primeira data (inclusive)"),
+    end: Optional[date] = Query(None, description="Última data (inclusive)"),
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="Texto procurado no comentário"),
+    fields: Optional[str] = Query(None, description="Colunas separadas por vírgula"),
+    order: str = Query("desc", pattern=r"^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
+    user=Depends(get_current_user)
+):
+    """
+    Lista os turnos do usuário paginando por (data, id): cada página parte
+    do cursor da anterior, com o mesmo custo em qualquer ponto do histórico
+    """
+    columns = _projection(fields, TIME_ENTRY_FIELDS, TIME_ENTRY_DEFAULT_FIELDS, ('id', 'date'))
+    return await _list_entries('time_entries', 'date', columns, user.id, start, end, q, order, limit, cursor)
+
+@router.get("/entries/non-accounting", response_model=NonAccountingPage, response_model_exclude_unset=True)
+async def list_non_accounting_entries(
+    start: Optional[date] = Query(None, description="Primeira data (inclusive)"),
+    end: Optional[date] = Query(None, description="Última data (inclusive)"),
+    type: Optional[NonAccountingType] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="Texto procurado no comentário"),
+    fields: Optional[str] = Query(None, description="Colunas separadas por vírgula"),
+    order: str = Query("desc", pattern=r"^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
+    user=Depends(get_current_user)
+):
+    """Lista os lançamentos não contábeis do usuário paginando por (data, id)"""
+    columns = _projection(fields, NON_ACCOUNTING_FIELDS, NON_ACCOUNTING_FIELDS, ('id', 'entry_date'))
+    return await _list_entries(
+        'non_accounting_entries', 'entry_date', columns, user.id, start, end, q, order, limit, cursor,
+        type=type.value if type else None
+    )
+
 @router.post("/entries/time")
 async def create_time_entry(entry: TimeEntry, user=Depends(get_current_user)):
     try:
@@ -64,13 +198,14 @@ async def create_time_entry(entry: TimeEntry, user=Depends(get_current_user)):
         entry.year = entry.date.year
         
         # Validar entrada
-        validate_time_entry(entry, user.id)
+        await validate_time_entry(entry, user.id)
         
         # Inserir registro
-        result = supabase.table('time_entries').insert({
-            **entry.model_dump(),
+        result = await get_db().table('time_entries').insert({
+            **_time_entry_row(entry),
             'user_id': user.id
         }).execute()
+        await snapshots.invalidate_months(user.id, [_month_of(entry.date)])
         return result.data[0]
     except Exception as e:
         raise HTTPException(
@@ -78,6 +213,149 @@ async def create_time_entry(entry: TimeEntry, user=Depends(get_current_user)):
             detail=str(e)
         )
 
+# Uma linha de NDJSON maior que isso não é um lançamento
+BULK_MAX_LINE_BYTES = 64 * 1024
+
+def _row_error(error: ValueError) -> str:
+    """Mensagem curta do erro de uma linha, sem o texto completo do pydantic"""
+    if isinstance(error, PydanticValidationError):
+        return '; '.join(
+            f"{'.'.join(str(part) for part in item['loc']) or 'linha'}: {item['msg']}"
+            for item in error.errors(include_url=False)
+        )
+    return "JSON inválido"
+
+def _too_many_entries() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Máximo de {settings.BULK_MAX_ENTRIES} lançamentos por importação"
+    )
+
+async def _read_bulk_entries(request: Request) -> Tuple[List[Optional[TimeEntry]], List[Optional[str]]]:
+    """
+    Lê o corpo da importação em lote (lista JSON ou NDJSON), linha a linha.
+    No NDJSON o limite de lançamentos é verificado durante a leitura, sem
+    acumular o corpo inteiro.
+    """
+    entries: List[Optional[TimeEntry]] = []
+    errors: List[Optional[str]] = []
+    
+    def parse(item):
+        if len(entries) >= settings.BULK_MAX_ENTRIES:
+            raise _too_many_entries()
+        try:
+            if isinstance(item, (bytes, str)):
+                item = json.loads(item)
+            entries.append(TimeEntry.model_validate(item))
+            errors.append(None)
+        except ValueError as e:
+            entries.append(None)
+            errors.append(_row_error(e))
+    
+    if request.headers.get('content-type', '').startswith('application/x-ndjson'):
+        buffer = b''
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                if line.strip():
+                    parse(line)
+            if len(buffer) > BULK_MAX_LINE_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Linha com mais de {BULK_MAX_LINE_BYTES} bytes"
+                )
+        if buffer.strip():
+            parse(buffer)
+    else:
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="JSON inválido"
+            )
+        if not isinstance(payload, list):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="O corpo deve ser uma lista de lançamentos"
+            )
+        if len(payload) > settings.BULK_MAX_ENTRIES:
+            raise _too_many_entries()
+        for item in payload:
+            parse(item)
+    
+    return entries, errors
+
+@router.post("/entries/time/bulk", response_model=BulkImportResult)
+async def bulk_create_time_entries(request: Request, atomic: bool = False, user=Depends(get_current_user)):
+    """
+    Importa vários turnos de uma vez, a partir de uma lista JSON ou de NDJSON.
+    Com atomic=true nada é gravado se alguma linha for inválida.
+    """
+    entries, errors = await _read_bulk_entries(request)
+    
+    # Validação do conjunto com um número constante de consultas
+    parsed = [position for position, entry in enumerate(entries) if entry is not None]
+    validation_errors = await validate_time_entries_bulk([entries[p] for p in parsed], user.id)
+    for position, error in zip(parsed, validation_errors):
+        errors[position] = error
+    
+    results: List[Optional[BulkRowResult]] = [
+        BulkRowResult(index=position, status='invalid', error=error) if error else None
+        for position, error in enumerate(errors)
+    ]
+    to_insert = [position for position, error in enumerate(errors) if error is None]
+    
+    if atomic and len(to_insert) < len(entries):
+        for position in to_insert:
+            results[position] = BulkRowResult(index=position, status='skipped')
+        return BulkImportResult(created=0, failed=len(entries) - len(to_insert), results=results)
+    
+    # Inserção em blocos de várias linhas
+    inserted = []
+    chunk_size = settings.BULK_INSERT_CHUNK_SIZE
+    for offset in range(0, len(to_insert), chunk_size):
+        chunk = to_insert[offset:offset + chunk_size]
+        rows = []
+        for position in chunk:
+            entry = entries[position]
+            entry.month = entry.date.month
+            entry.year = entry.date.year
+            rows.append({**_time_entry_row(entry), 'user_id': user.id})
+        
+        try:
+            result = await get_db().table('time_entries').insert(rows).execute()
+        except Exception as e:
+            if atomic:
+                # Desfaz os blocos já gravados
+                if inserted:
+                    await get_db().table('time_entries')\
+                        .delete()\
+                        .eq('user_id', user.id)\
+                        .in_('id', [row['id'] for row in inserted])\
+                        .execute()
+                    await snapshots.invalidate_months(user.id, {_month_of(row['date']) for row in inserted})
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e)
+                )
+            for position in chunk:
+                results[position] = BulkRowResult(index=position, status='error', error=str(e))
+            continue
+        
+        for position, row in zip(chunk, result.data):
+            results[position] = BulkRowResult(index=position, status='created', id=row['id'])
+            inserted.append(row)
+    
+    await snapshots.invalidate_months(user.id, {_month_of(row['date']) for row in inserted})
+    
+    return BulkImportResult(
+        created=len(inserted),
+        failed=len(entries) - len(inserted),
+        results=results
+    )
+
 @router.put("/entries/time/{entry_id}")
 async def update_time_entry(entry_id: int, entry: TimeEntry, user=Depends(get_current_user)):
     try:
@@ -85,17 +363,28 @@ async def update_time_entry(entry_id: int, entry: TimeEntry, user=Depends(get_cu
         entry.month = entry.date.month
         entry.year = entry.date.year
         
-        # Validar entrada
-        validate_time_entry(entry, user.id, entry_id)
+        # Validar entrada e buscar a data atual do lançamento (para invalidar o mês antigo)
+        _, previous = await asyncio.gather(
+            validate_time_entry(entry, user.id, entry_id),
+            get_db().table('time_entries')\
+                .select('date')\
+                .eq('id', entry_id)\
+                .eq('user_id', user.id)\
+                .execute()
+        )
         
         # Atualizar registro
-        result = supabase.table('time_entries')\
-            .update(entry.model_dump())\
+        result = await get_db().table('time_entries')\
+            .update(_time_entry_row(entry))\
             .eq('id', entry_id)\
             .eq('user_id', user.id)\
             .execute()
         if not result.data:
             raise HTTPException(status_code=404, detail="Entry not found")
+        await snapshots.invalidate_months(
+            user.id,
+            {_month_of(entry.date)} | {_month_of(row['date']) for row in previous.data}
+        )
         return result.data[0]
     except Exception as e:
         raise HTTPException(
@@ -106,13 +395,14 @@ async def update_time_entry(entry_id: int, entry: TimeEntry, user=Depends(get_cu
 @router.delete("/entries/time/{entry_id}")
 async def delete_time_entry(entry_id: int, user=Depends(get_current_user)):
     try:
-        result = supabase.table('time_entries')\
+        result = await get_db().table('time_entries')\
             .delete()\
             .eq('id', entry_id)\
             .eq('user_id', user.id)\
             .execute()
         if not result.data:
             raise HTTPException(status_code=404, detail="Entry not found")
+        await snapshots.invalidate_months(user.id, [_month_of(result.data[0]['date'])])
         return {"message": "Entry deleted successfully"}
     except Exception as e:
         raise HTTPException(
@@ -128,13 +418,14 @@ async def create_non_accounting_entry(entry: NonAccountingEntry, user=Depends(ge
         entry.year = entry.entry_date.year
         
         # Validar entrada
-        validate_non_accounting_entry(entry, user.id)
+        await validate_non_accounting_entry(entry, user.id, hire_date=hire_date_of(user))
         
         # Inserir registro
-        result = supabase.table('non_accounting_entries').insert({
+        result = await get_db().table('non_accounting_entries').insert({
             **entry.model_dump(),
             'user_id': user.id
         }).execute()
+        await snapshots.invalidate_months(user.id, [_month_of(entry.entry_date)])
         return result.data[0]
     except Exception as e:
         raise HTTPException(
@@ -149,17 +440,28 @@ async def update_non_accounting_entry(entry_id: int, entry: NonAccountingEntry,
         entry.month = entry.entry_date.month
         entry.year = entry.entry_date.year
         
-        # Validar entrada
-        validate_non_accounting_entry(entry, user.id, entry_id)
+        # Validar entrada e buscar a data atual do lançamento (para invalidar o mês antigo)
+        _, previous = await asyncio.gather(
+            validate_non_accounting_entry(entry, user.id, entry_id, hire_date=hire_date_of(user)),
+            get_db().table('non_accounting_entries')\
+                .select('entry_date')\
+                .eq('id', entry_id)\
+                .eq('user_id', user.id)\
+                .execute()
+        )
         
         # Atualizar registro
-        result = supabase.table('non_accounting_entries')\
+        result = await get_db().table('non_accounting_entries')\
             .update(entry.model_dump())\
             .eq('id', entry_id)\
             .eq('user_id', user.id)\
             .execute()
         if not result.data:
             raise HTTPException(status_code=404, detail="Entry not found")
+        await snapshots.invalidate_months(
+            user.id,
+            {_month_of(entry.entry_date)} | {_month_of(row['entry_date']) for row in previous.data}
+        )
         return result.data[0]
     except Exception as e:
         raise HTTPException(
@@ -170,13 +472,14 @@ async def update_non_accounting_entry(entry_id: int, entry: NonAccountingEntry,
 @router.delete("/entries/non-accounting/{entry_id}")
 async def delete_non_accounting_entry(entry_id: int, user=Depends(get_current_user)):
     try:
-        result = supabase.table('non_accounting_entries')\
+        result = await get_db().table('non_accounting_entries')\
             .delete()\
             .eq('id', entry_id)\
             .eq('user_id', user.id)\
             .execute()
         if not result.data:
             raise HTTPException(status_code=404, detail="Entry not found")
+        await snapshots.invalidate_months(user.id, [_month_of(result.data[0]['entry_date'])])
         return {"message": "Entry deleted successfully"}
     except Exception as e:
         raise HTTPException(
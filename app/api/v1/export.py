@@ -0,0 +1,111 @@
+from datetime import date
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from ...core.auth import get_current_user
+from ...core.calculations import iter_months
+from ...core.config import get_settings
+from ...core.database import get_db
+from ...core.export import FORMATS, stream_export
+from ...core.snapshots import SUMMARY_FIELDS, get_month_summaries
+from ...core.validations import parse_month
+
+router = APIRouter()
+settings = get_settings()
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+FORMAT_PATTERN = r"^(csv|ndjson)$"
+PAGE_SIZE = 1000
+# Meses calculados por vez na exportação de saldos
+BALANCE_CHUNK_MONTHS = 12
+
+TIME_ENTRY_COLUMNS = ('id', 'date', 'start_time', 'end_time', 'comment')
+NON_ACCOUNTING_COLUMNS = ('id', 'entry_date', 'days', 'type', 'comment')
+BALANCE_COLUMNS = ('year', 'month') + SUMMARY_FIELDS + ('cumulative_balance_hours',)
+
+def _check_range(start: Optional[date], end: Optional[date]) -> None:
+    if start and end and end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A data inicial deve ser anterior à data final"
+        )
+
+def _entry_pages(table: str, date_column: str, columns: tuple, user_id: str,
+                 start: Optional[date], end: Optional[date]) -> AsyncIterator[List[dict]]:
+    """Lançamentos do usuário no período, em páginas ordenadas por (data, id)"""
+    query = get_db().table(table).select(','.join(columns)).eq('user_id', user_id)
+    if start:
+        query = query.gte(date_column, start.isoformat())
+    if end:
+        query = query.lte(date_column, end.isoformat())
+    return query.iter_pages(keys=(date_column, 'id'), page_size=PAGE_SIZE)
+
+def _streaming(pages: AsyncIterator[List[dict]], columns: tuple, export_format: str, name: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_export(pages, columns, export_format),
+        media_type=FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
+
+@router.get("/time-entries")
+async def export_time_entries(
+    start: Optional[date] = Query(None, description="Primeira data (inclusive)"),
+    end: Optional[date] = Query(None, description="Última data (inclusive)"),
+    format: str = Query("csv", pattern=FORMAT_PATTERN),
+    user=Depends(get_current_user)
+):
+    """Exporta os turnos do período em CSV ou NDJSON, sem carregar tudo em memória"""
+    _check_range(start, end)
+    pages = _entry_pages('time_entries', 'date', TIME_ENTRY_COLUMNS, user.id, start, end)
+    return _streaming(pages, TIME_ENTRY_COLUMNS, format, "lancamentos")
+
+@router.get("/non-accounting")
+async def export_non_accounting_entries(
+    start: Optional[date] = Query(None, description="Primeira data (inclusive)"),
+    end: Optional[date] = Query(None, description="Última data (inclusive)"),
+    format: str = Query("csv", pattern=FORMAT_PATTERN),
+    user=Depends(get_current_user)
+):
+    """Exporta os lançamentos não contábeis do período em CSV ou NDJSON"""
+    _check_range(start, end)
+    pages = _entry_pages('non_accounting_entries', 'entry_date', NON_ACCOUNTING_COLUMNS, user.id, start, end)
+    return _streaming(pages, NON_ACCOUNTING_COLUMNS, format, "nao_contabeis")
+
+async def _balance_pages(user_id: str, first: tuple, last: tuple) -> AsyncIterator[List[dict]]:
+    """Saldos mensais calculados em blocos de meses, com o saldo acumulado"""
+    months = iter_months(first, last)
+    cumulative = 0.0
+    while True:
+        chunk = [key for _, key in zip(range(BALANCE_CHUNK_MONTHS), months)]
+        if not chunk:
+            return
+        summaries = await get_month_summaries(user_id, chunk[0], chunk[-1])
+        rows = []
+        for (year, month), summary in summaries.items():
+            cumulative += summary.balance_hours
+            rows.append({'year': year, 'month': month, **summary.model_dump(), 'cumulative_balance_hours': cumulative})
+        yield rows
+
+@router.get("/monthly-balances")
+async def export_monthly_balances(
+    start: str = Query(..., pattern=MONTH_PATTERN, description="Primeiro mês (AAAA-MM)"),
+    end: str = Query(..., pattern=MONTH_PATTERN, description="Último mês (AAAA-MM)"),
+    format: str = Query("csv", pattern=FORMAT_PATTERN),
+    user=Depends(get_current_user)
+):
+    """Exporta o sumário e o saldo acumulado de cada mês do período"""
+    # Tudo validado antes do streaming: depois do status enviado, um erro só corta o arquivo
+    first = parse_month(start, "start")
+    last = parse_month(end, "end")
+    if last < first:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O mês inicial deve ser anterior ao mês final"
+        )
+    span = (last[0] - first[0]) * 12 + last[1] - first[1] + 1
+    if span > settings.EXPORT_MAX_MONTHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"O período pode ter no máximo {settings.EXPORT_MAX_MONTHS} meses"
+        )
+    return _streaming(_balance_pages(user.id, first, last), BALANCE_COLUMNS, format, "saldos")
@@ -1,20 +1,33 @@
-from fastapi import APIRouter, Depends
-from datetime import date
-from typing import Dict
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+from typing import Dict, Optional
 from ...core.auth import get_current_user
-from ...core.utils import br_holidays
+from ...core.data_version import not_modified
+from ...core.holiday_service import RegionError, holiday_service
 
 router = APIRouter()
 
-@router.get("/year/{year}")
-async def get_year_holidays(year: int, user=Depends(get_current_user)) -> Dict[str, str]:
+@router.get("/year/{year}", response_model=Dict[str, str])
+async def get_year_holidays(
+    request: Request,
+    year: int = Path(..., ge=1900, le=2200),
+    state: Optional[str] = Query(None, description="Sigla do estado (ex.: SP)"),
+    municipality: Optional[str] = Query(None, description="Código IBGE do município"),
+    user=Depends(get_current_user)
+):
     """
-    Retorna lista de feriados nacionais do ano especificado
+    Retorna os feriados do ano especificado: nacionais e, se informados,
+    estaduais e municipais
     """
-    # Filtrar feriados do ano solicitado
-    year_holidays = {}
-    for holiday_date, description in br_holidays.items():
-        if holiday_date.year == year:
-            year_holidays[holiday_date.isoformat()] = description
-            
-    return year_holidays
+    try:
+        region = holiday_service.resolve(state, municipality)
+    except RegionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    # Corpo já serializado na tabela do ano; não muda enquanto o processo estiver no ar
+    table = holiday_service.table(year, region)
+    response = Response(content=table.body, media_type="application/json")
+    cached = not_modified(request, response, table.etag, cache_control="private, max-age=86400")
+    return cached or response
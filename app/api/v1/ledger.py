@@ -0,0 +1,84 @@
+import asyncio
+from itertools import accumulate
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from ...core.auth import get_current_user
+from ...core.calculations import sum_summaries
+from ...core.database import get_db
+from ...core.snapshots import get_month_summaries
+from ...core.validations import parse_month
+from ...schemas.entries import Ledger, LedgerMonth
+
+router = APIRouter()
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+MAX_LEDGER_MONTHS = 600
+
+async def _first_entry_month(user_id: str) -> Optional[str]:
+    """Mês (AAAA-MM) do lançamento mais antigo do usuário"""
+    time_entries, non_accounting = await asyncio.gather(
+        get_db().table('time_entries')\
+            .select('date')\
+            .eq('user_id', user_id)\
+            .order('date')\
+            .limit(1)\
+            .execute(),
+        get_db().table('non_accounting_entries')\
+            .select('entry_date')\
+            .eq('user_id', user_id)\
+            .order('entry_date')\
+            .limit(1)\
+            .execute()
+    )
+    
+    dates = [row['date'] for row in time_entries.data] + [row['entry_date'] for row in non_accounting.data]
+    return min(dates)[0:7] if dates else None
+
+@router.get("/ledger", response_model=Ledger)
+async def get_ledger(
+    end: str = Query(..., pattern=MONTH_PATTERN, description="Último mês (AAAA-MM)"),
+    start: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="Primeiro mês (AAAA-MM); padrão: primeiro lançamento"),
+    user=Depends(get_current_user)
+):
+    """
+    Banco de horas acumulado mês a mês entre dois meses,
+    com o saldo corrente ao final de cada mês
+    """
+    if start is None:
+        start = await _first_entry_month(user.id) or end
+    
+    first = parse_month(start, "start")
+    last = parse_month(end, "end")
+    span = (last[0] - first[0]) * 12 + last[1] - first[1] + 1
+    if span < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O mês inicial deve ser anterior ao mês final"
+        )
+    if span > MAX_LEDGER_MONTHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Período máximo de {MAX_LEDGER_MONTHS} meses"
+        )
+    
+    try:
+        summaries = await get_month_summaries(user.id, first, last)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    
+    # Meses já vêm em ordem cronológica: o saldo acumulado é uma soma corrente
+    keys = list(summaries)
+    balances = accumulate(summaries[key].balance_hours for key in keys)
+    
+    return Ledger(
+        start=start,
+        end=end,
+        months=[
+            LedgerMonth(year=year, month=month, summary=summaries[(year, month)], cumulative_balance_hours=balance)
+            for (year, month), balance in zip(keys, balances)
+        ],
+        totals=sum_summaries(summaries.values())
+    )
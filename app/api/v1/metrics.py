@@ -0,0 +1,64 @@
+import logging
+import secrets
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import PlainTextResponse
+from ...core.auth import get_admin_user, get_current_user, get_settings, oauth2_scheme, token_cache
+from ...core.metrics import registry
+from ...core.recompute import recompute_queue_stats
+from ...core.snapshots import summary_flight
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+settings = get_settings()
+
+async def metrics_access(request: Request) -> None:
+    """Libera as métricas para o scraper com METRICS_TOKEN ou para administradores"""
+    authorization = request.headers.get("authorization", "")
+    if settings.METRICS_TOKEN and secrets.compare_digest(
+        authorization.removeprefix("Bearer ").strip().encode(), settings.METRICS_TOKEN.encode()
+    ):
+        return
+    await get_admin_user(await get_current_user(await oauth2_scheme(request)))
+
+def _component_metrics():
+    """Contadores de cache e de cálculos compartilhados no formato do Prometheus"""
+    metrics = {}
+    for name, value in summary_flight.stats().items():
+        metrics[f"summary_coalescing_{name}"] = value
+    for name, value in token_cache.stats().items():
+        metrics[f"token_cache_{name}"] = value
+    return metrics
+
+registry.register_collector(_component_metrics)
+
+async def _recompute_metrics() -> dict:
+    """Estado da fila de recálculo, lido do banco; vazio se a consulta falhar"""
+    try:
+        return await recompute_queue_stats()
+    except Exception:
+        logger.exception("Falha ao consultar a fila de recálculo")
+        return {}
+
+@router.get("/", dependencies=[Depends(metrics_access)])
+async def get_metrics():
+    """
+    Contadores internos de cache, de cálculos compartilhados e da fila de recálculo
+    """
+    return {
+        "summary_coalescing": summary_flight.stats(),
+        "token_cache": token_cache.stats(),
+        "recompute": await _recompute_metrics()
+    }
+
+@router.get("/prometheus", response_class=PlainTextResponse, dependencies=[Depends(metrics_access)])
+async def get_prometheus_metrics():
+    """
+    Métricas das requisições (latência, tempo por fase, consultas ao banco,
+    chamadas ao auth) no formato texto do Prometheus
+    """
+    # A fila fica no banco: consultada aqui, fora dos coletores síncronos do registro
+    body = registry.render() + "".join(
+        f"recompute_{name} {value}\n" for name, value in (await _recompute_metrics()).items()
+    )
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
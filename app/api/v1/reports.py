@@ -0,0 +1,46 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from ...core.auth import get_admin_user
+from ...core.config import get_settings
+from ...core.export import FORMATS, stream_export
+from ...core.reports import REPORT_COLUMNS, iter_team_report
+
+router = APIRouter()
+settings = get_settings()
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+class TeamReportRequest(BaseModel):
+    user_ids: List[str] = Field(min_length=1)
+    start: str = Field(pattern=MONTH_PATTERN)
+    end: str = Field(pattern=MONTH_PATTERN)
+    format: str = Field("csv", pattern=r"^(csv|ndjson)$")
+
+@router.post("/team")
+async def team_report(request: TeamReportRequest, user=Depends(get_admin_user)):
+    """
+    Banco de horas de vários usuários: uma linha por usuário e mês,
+    enviada em streaming à medida que cada bloco de usuários é calculado
+    """
+    first = (int(request.start[0:4]), int(request.start[5:7]))
+    last = (int(request.end[0:4]), int(request.end[5:7]))
+    if last < first:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O mês inicial deve ser anterior ao mês final"
+        )
+    
+    user_ids = list(dict.fromkeys(request.user_ids))
+    if len(user_ids) > settings.REPORT_MAX_USERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo de {settings.REPORT_MAX_USERS} usuários por relatório"
+        )
+    
+    return StreamingResponse(
+        stream_export(iter_team_report(user_ids, first, last), REPORT_COLUMNS, request.format),
+        media_type=FORMATS[request.format],
+        headers={"Content-Disposition": f'attachment; filename="equipe.{request.format}"'}
+    )
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Request, Response
 from pydantic import BaseModel
 from ...core.auth import get_current_user
-from ...core.validations import get_vacation_balance
+from ...core.data_version import data_versions, not_modified
+from ...core.vacations import hire_date_of, vacation_ledger
 
 router = APIRouter()
 
@@ -10,15 +13,62 @@ class VacationBalance(BaseModel):
     total_days: int = 30
     used_days: int
 
+class VacationPeriodBalance(BaseModel):
+    start: date
+    end: date
+    available_from: date
+    expires_at: date
+    entitled_days: int
+    used_days: int
+    remaining_days: int
+
+class VacationHistory(BaseModel):
+    hire_date: Optional[date] = None
+    periods: List[VacationPeriodBalance]
+
 @router.get("/vacation-balance", response_model=VacationBalance)
-async def get_user_vacation_balance(user=Depends(get_current_user)):
+async def get_user_vacation_balance(request: Request, response: Response, user=Depends(get_current_user)):
     """
     Retorna o saldo de férias disponível para o usuário
     """
-    available = get_vacation_balance(user.id)
-    used = 30 - available
+    hire_date = hire_date_of(user)
+    cached = not_modified(request, response, await data_versions.etag(user.id, f"vacation-balance:{hire_date}"))
+    if cached:
+        return cached
+    
+    total, used, available = await vacation_ledger.balance(user.id, hire_date)
     
     return VacationBalance(
         available_days=available,
+        total_days=total,
         used_days=used
     )
+
+@router.get("/vacation-balance/history", response_model=VacationHistory)
+async def get_user_vacation_history(request: Request, response: Response, user=Depends(get_current_user)):
+    """
+    Retorna todos os períodos aquisitivos do usuário com os dias adquiridos,
+    usados e restantes de cada um
+    """
+    hire_date = hire_date_of(user)
+    cached = not_modified(request, response, await data_versions.etag(user.id, f"vacation-history:{hire_date}"))
+    if cached:
+        return cached
+    
+    periods = await vacation_ledger.periods(user.id, hire_date)
+    
+    return VacationHistory(
+        hire_date=hire_date,
+        periods=[
+            VacationPeriodBalance(
+                start=period.start,
+                end=period.end,
+                available_from=period.available_from,
+                expires_at=period.expires_at,
+                entitled_days=period.entitled_days,
+                used_days=period.used_days,
+                remaining_days=period.remaining_days
+            )
+            for period in periods
+        ]
+    )
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Optional
 from datetime import date
 from pydantic import BaseModel
 from ...core.auth import get_current_user
-from ...schemas.entries import TimeEntry, NonAccountingEntry
+from ...core.config import get_settings
+from ...schemas.entries import TimeEntry, NonAccountingEntry, SimulationRequest, SimulationResult
+from ...core.simulation import simulate
 from ...core.validations import ValidationError, validate_time_entry, validate_non_accounting_entry
+from ...core.vacations import hire_date_of
 
 router = APIRouter()
+settings = get_settings()
 
 class ValidationResponse(BaseModel):
     is_valid: bool
@@ -26,9 +30,9 @@ async def validate_entry(request: ValidationRequest, user=Depends(get_current_us
     
     try:
         if request.time_entry:
-            validate_time_entry(request.time_entry, user.id)
+            await validate_time_entry(request.time_entry, user.id)
         elif request.non_accounting_entry:
-            validate_non_accounting_entry(request.non_accounting_entry, user.id)
+            await validate_non_accounting_entry(request.non_accounting_entry, user.id, hire_date=hire_date_of(user))
         else:
             raise HTTPException(
                 status_code=400,
@@ -41,3 +45,22 @@ async def validate_entry(request: ValidationRequest, user=Depends(get_current_us
         return ValidationResponse(is_valid=False, conflicts=[str(e.detail)])
     except Exception as e:
         return ValidationResponse(is_valid=False, conflicts=[str(e)])
+
+@router.post("/entries/simulate", response_model=SimulationResult)
+async def simulate_entries(request: SimulationRequest, user=Depends(get_current_user)):
+    """
+    Simula lançamentos sem salvá-los: devolve os sumários atuais e projetados
+    dos meses afetados e os conflitos que impediriam cada lançamento
+    """
+    total = len(request.time_entries) + len(request.non_accounting_entries)
+    if total == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="É necessário fornecer time_entries ou non_accounting_entries"
+        )
+    if total > settings.BULK_MAX_ENTRIES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo de {settings.BULK_MAX_ENTRIES} lançamentos por simulação"
+        )
+    return await simulate(user.id, request.time_entries, request.non_accounting_entries, hire_date_of(user))
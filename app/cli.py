@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import sys
+from datetime import date
+from typing import Tuple
+from .core.database import close_db
+
+def parse_month(value: str) -> Tuple[int, int]:
+    """Converte 'AAAA-MM' em (ano, mês)"""
+    year, month = value.split('-')
+    return int(year), int(month)
+
+def last_closed_month() -> Tuple[int, int]:
+    today = date.today()
+    return (today.year - 1, 12) if today.month == 1 else (today.year, today.month - 1)
+
+async def rebuild_snapshots_command(args):
+    from .core.snapshots import rebuild_snapshots
+    
+    end = parse_month(args.end) if args.end else last_closed_month()
+    for user_id in args.user_id:
+        rebuilt = await rebuild_snapshots(user_id, parse_month(args.start), end)
+        print(f"{user_id}: {rebuilt} meses recalculados")
+
+async def backfill_premiums_command(args):
+    from .core.calculations import backfill_premium_columns
+    from .core.snapshots import clear_snapshots
+    
+    for user_id in args.user_id:
+        updated = await backfill_premium_columns(user_id)
+        if updated:
+            # Sumários gravados antes da correção ficariam sem os adicionais
+            await clear_snapshots(user_id)
+        print(f"{user_id}: {updated} lançamentos atualizados")
+
+async def drain_recompute_command(args):
+    from .core.config import get_settings
+    from .core.recompute import drain_recompute_queue, run_recompute_worker
+    
+    if args.watch:
+        # Só termina com Ctrl+C / SIGTERM
+        await run_recompute_worker(get_settings().RECOMPUTE_POLL_SECONDS)
+    else:
+        print(f"{await drain_recompute_queue()} meses recalculados")
+
+async def team_report_command(args):
+    from .core.export import stream_export
+    from .core.reports import REPORT_COLUMNS, iter_team_report, shutdown_report_pool
+    
+    user_ids = list(args.user_id or [])
+    if args.user_file:
+        with open(args.user_file) as user_file:
+            user_ids += [line.strip() for line in user_file if line.strip()]
+    user_ids = list(dict.fromkeys(user_ids))
+    
+    end = parse_month(args.end) if args.end else last_closed_month()
+    start = parse_month(args.start) if args.start else end
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        async for chunk in stream_export(iter_team_report(user_ids, start, end), REPORT_COLUMNS, args.format):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+        shutdown_report_pool()
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Comandos administrativos da API")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    rebuild = subparsers.add_parser("rebuild-snapshots", help="Recalcula os snapshots mensais de meses fechados")
+    rebuild.add_argument("--user-id", action="append", required=True, help="Usuário a recalcular (pode repetir)")
+    rebuild.add_argument("--start", required=True, help="Primeiro mês (AAAA-MM)")
+    rebuild.add_argument("--end", help="Último mês (AAAA-MM); padrão: último mês fechado")
+    rebuild.set_defaults(handler=rebuild_snapshots_command)
+    
+    backfill = subparsers.add_parser("backfill-premiums", help="Recalcula horas noturnas e extras dos lançamentos gravados")
+    backfill.add_argument("--user-id", action="append", required=True, help="Usuário a recalcular (pode repetir)")
+    backfill.set_defaults(handler=backfill_premiums_command)
+    
+    drain = subparsers.add_parser(
+        "drain-recompute",
+        help="Recalcula monthly_hours dos meses na fila de recálculo (para bancos sem pg_cron)"
+    )
+    drain.add_argument("--watch", action="store_true", help="Continua drenando a cada RECOMPUTE_POLL_SECONDS")
+    drain.set_defaults(handler=drain_recompute_command)
+    
+    team = subparsers.add_parser("team-report", help="Banco de horas de vários usuários, uma linha por usuário e mês")
+    team.add_argument("--user-id", action="append", help="Usuário do relatório (pode repetir)")
+    team.add_argument("--user-file", help="Arquivo com um id de usuário por linha")
+    team.add_argument("--start", help="Primeiro mês (AAAA-MM); padrão: o último mês")
+    team.add_argument("--end", help="Último mês (AAAA-MM); padrão: último mês fechado")
+    team.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    team.add_argument("--output", help="Arquivo de saída; padrão: saída padrão")
+    team.set_defaults(handler=team_report_command)
+    
+    args = parser.parse_args()
+    
+    async def run():
+        try:
+            await args.handler(args)
+        finally:
+            await close_db()
+    
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,55 @@
-from datetime import datetime, timedelta
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from supabase import create_client
-from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 from .config import get_settings
+from .metrics import InstrumentedClient, phase
+from .token_cache import TokenCache, token_digest
 
 settings = get_settings()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+token_cache = TokenCache(settings.TOKEN_CACHE_MAX_SIZE, settings.TOKEN_CACHE_TTL_SECONDS)
+
+# O pacote supabase é o import mais pesado da aplicação: o cliente só é
+# criado no primeiro uso (ou no lifespan, com WARM_START)
+_supabase = None
+_supabase_lock = threading.Lock()
+
+def get_supabase():
+    """Retorna o cliente supabase do processo, criando-o no primeiro uso"""
+    global _supabase
+    if _supabase is None:
+        with _supabase_lock:
+            if _supabase is None and settings.STORAGE_BACKEND == 'sqlite':
+                # Sem Supabase: usuários na tabela `users` do próprio banco
+                from .database import get_db
+                from .local_auth import LocalClient
+                _supabase = InstrumentedClient(LocalClient(get_db()))
+            elif _supabase is None:
+                from supabase import create_client
+                _supabase = InstrumentedClient(create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY))
+    return _supabase
+
+def set_supabase(client) -> None:
+    """Substitui o cliente do processo (ex.: por um cliente falso nos benchmarks)"""
+    global _supabase
+    _supabase = client
+
+async def get_auth_client():
+    """API de auth do supabase; a criação do cliente, se preciso, roda fora do event loop"""
+    if _supabase is None:
+        await run_in_threadpool(get_supabase)
+    return get_supabase().auth
+
+@lru_cache()
+def get_pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -23,12 +62,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    with phase("auth"):
+        return await _resolve_user(token)
+
+async def _resolve_user(token: str):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -41,8 +84,59 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    
+    # Tokens já verificados dispensam as chamadas remotas até expirarem. O
+    # logout tira o token do cache deste processo; nos outros ele sai em até
+    # TOKEN_CACHE_TTL_SECONDS e a próxima verificação encontra a revogação.
+    user = token_cache.get(token)
+    if user is not None:
+        return user
         
-    user = supabase.auth.get_user(token)
-    if user is None:
+    # Cliente de auth do supabase é síncrono: executa fora do event loop,
+    # em paralelo com a consulta às revogações
+    auth_client = await get_auth_client()
+    revoked, user = await asyncio.gather(
+        is_token_revoked(token),
+        run_in_threadpool(auth_client.get_user, token)
+    )
+    if revoked or user is None:
         raise credentials_exception
+    
+    token_cache.set(token, user, payload.get("exp"))
+    return user
+
+async def get_admin_user(user=Depends(get_current_user)):
+    """Restringe a rota aos usuários listados em ADMIN_USER_IDS"""
+    if user.id not in settings.admin_user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso restrito a administradores"
+        )
     return user
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+async def is_token_revoked(token: str) -> bool:
+    from .database import get_db
+    result = await get_db().table('revoked_tokens')\
+        .select('token_digest')\
+        .eq('token_digest', token_digest(token))\
+        .gt('expires_at', _now_iso())\
+        .limit(1)\
+        .execute()
+    return bool(result.data)
+
+async def revoke_token(token: str, exp: float) -> None:
+    """
+    Revoga o token até o seu `exp` (logout): só o hash é gravado, na tabela
+    revoked_tokens, consultada por todos os processos. Aproveita para
+    apagar as revogações de tokens que já expiraram.
+    """
+    from .database import get_db
+    token_cache.invalidate(token)
+    await get_db().table('revoked_tokens').upsert({
+        'token_digest': token_digest(token),
+        'expires_at': datetime.fromtimestamp(exp, timezone.utc).isoformat()
+    }, on_conflict='token_digest').execute()
+    await get_db().table('revoked_tokens').delete().lt('expires_at', _now_iso()).execute()
@@ -0,0 +1,124 @@
+import calendar
+from array import array
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+from .holiday_service import Region, default_region, holiday_service
+
+class YearCalendar:
+    """
+    Dias úteis de um ano: um mapa de bits (um byte por dia) e a soma
+    acumulada, que permite contar dias úteis de qualquer intervalo em O(1)
+    """
+    def __init__(self, year: int, holiday_dates: Iterable[date]):
+        self.year = year
+        self.first_ordinal = date(year, 1, 1).toordinal()
+        days = 366 if calendar.isleap(year) else 365
+
+        # Segunda a sexta (weekday 0 a 4) são dias úteis
+        first_weekday = date(year, 1, 1).weekday()
+        self.working = bytearray(
+            1 if (first_weekday + index) % 7 < 5 else 0 for index in range(days)
+        )
+        for holiday in holiday_dates:
+            if holiday.year == year:
+                self.working[holiday.toordinal() - self.first_ordinal] = 0
+
+        # prefix[i] = dias úteis antes do dia de índice i
+        self.prefix = array('H', [0]) * (days + 1)
+        for index in range(days):
+            self.prefix[index + 1] = self.prefix[index] + self.working[index]
+
+    @property
+    def total(self) -> int:
+        return self.prefix[-1]
+
+    def index(self, day: date) -> int:
+        return day.toordinal() - self.first_ordinal
+
+    def is_business_day(self, day: date) -> bool:
+        return bool(self.working[self.index(day)])
+
+    def count(self, start: date, end: date) -> int:
+        """Dias úteis entre duas datas do mesmo ano (inclusive)"""
+        return self.prefix[self.index(end) + 1] - self.prefix[self.index(start)]
+
+class BusinessCalendar:
+    """
+    Calendário de dias úteis (segunda a sexta, exceto feriados da região)
+    pré-calculado por ano e compartilhado pelos sumários e pelas validações
+    """
+    def __init__(self, max_years: int = 32, region: Optional[Region] = None):
+        self.max_years = max_years
+        self._region = region
+        self._years: "OrderedDict[int, YearCalendar]" = OrderedDict()
+
+    @property
+    def region(self) -> Region:
+        # Resolvida no primeiro uso, a partir da configuração
+        if self._region is None:
+            self._region = default_region()
+        return self._region
+
+    def _holidays(self, year: int) -> Iterable[date]:
+        return holiday_service.table(year, self.region).dates
+
+    def year(self, year: int) -> YearCalendar:
+        year_calendar = self._years.get(year)
+        if year_calendar is None:
+            year_calendar = YearCalendar(year, self._holidays(year))
+            self._years[year] = year_calendar
+            while len(self._years) > self.max_years:
+                self._years.popitem(last=False)
+        else:
+            self._years.move_to_end(year)
+        return year_calendar
+
+    def is_business_day(self, day: date) -> bool:
+        return self.year(day.year).is_business_day(day)
+
+    def count(self, start_date: date, end_date: date) -> int:
+        """
+        Dias úteis entre duas datas (inclusive): O(1) dentro de um ano e
+        uma soma por ano abrangido em intervalos maiores
+        """
+        if end_date < start_date:
+            return 0
+        if start_date.year == end_date.year:
+            return self.year(start_date.year).count(start_date, end_date)
+
+        total = self.year(start_date.year).count(start_date, date(start_date.year, 12, 31))
+        for year in range(start_date.year + 1, end_date.year):
+            total += self.year(year).total
+        total += self.year(end_date.year).count(date(end_date.year, 1, 1), end_date)
+        return total
+
+    def count_month(self, year: int, month: int) -> int:
+        last_day = calendar.monthrange(year, month)[1]
+        return self.year(year).count(date(year, month, 1), date(year, month, last_day))
+
+    def holidays(self, start_date: date, end_date: date) -> List[date]:
+        """Feriados da região entre duas datas (inclusive)"""
+        return [
+            day
+            for year in range(start_date.year, end_date.year + 1)
+            for day in self._holidays(year)
+            if start_date <= day <= end_date
+        ]
+
+    def business_days(self, start_date: date, end_date: date) -> List[date]:
+        """Lista os dias úteis entre duas datas (inclusive)"""
+        days = []
+        year = start_date.year
+        while year <= end_date.year:
+            year_calendar = self.year(year)
+            first = max(start_date, date(year, 1, 1))
+            last = min(end_date, date(year, 12, 31))
+            offset = year_calendar.index(first)
+            for index in range(offset, year_calendar.index(last) + 1):
+                if year_calendar.working[index]:
+                    days.append(first + timedelta(days=index - offset))
+            year += 1
+        return days
+
+business_calendar = BusinessCalendar()
@@ -1,29 +1,40 @@
-from datetime import datetime, date
+import asyncio
+from datetime import date, timedelta
 import calendar
-from typing import Dict, List
-from ..core.auth import supabase
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from ..core.business_days import business_calendar
+from ..core.config import get_settings
+from ..core.database import get_db
+from ..core.hour_engine import (
+    MonthTotals, ShiftColumns, break_rule, parse_time_seconds,
+    premium_columns, weighted_hours, worked_seconds
+)
+from ..core.metrics import phase
 from ..schemas.entries import MonthlySummary
 
 def calculate_working_days(year: int, month: int) -> int:
-    """Calcula dias úteis no mês (excluindo sábados e domingos)"""
-    cal = calendar.monthcalendar(year, month)
-    working_days = 0
-    
-    for week in cal:
-        # Conta dias de segunda a sexta (0 = segunda, 4 = sexta)
-        working_days += sum(1 for day in range(5) if week[day] != 0)
-    
-    return working_days
+    """Calcula dias úteis no mês (excluindo sábados, domingos e feriados)"""
+    return business_calendar.count_month(year, month)
 
-def get_non_accounting_days(year: int, month: int, user_id: str) -> int:
-    """Busca total de dias não contábeis no mês"""
+def get_month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """Retorna o primeiro dia do mês e o primeiro dia do mês seguinte"""
     start_date = date(year, month, 1)
     if month == 12:
         end_date = date(year + 1, 1, 1)
     else:
         end_date = date(year, month + 1, 1)
+    return start_date, end_date
+
+def get_entry_hours(entry: dict) -> float:
+    """Calcula as horas de um lançamento de tempo vindo do banco"""
+    return worked_seconds(parse_time_seconds(entry['start_time']), parse_time_seconds(entry['end_time'])) / 3600
+
+async def get_non_accounting_days(year: int, month: int, user_id: str) -> int:
+    """Busca total de dias não contábeis no mês"""
+    start_date, end_date = get_month_bounds(year, month)
         
-    result = supabase.table('non_accounting_entries')\
+    result = await get_db().table('non_accounting_entries')\
         .select('days')\
         .eq('user_id', user_id)\
         .gte('entry_date', start_date.isoformat())\
@@ -32,33 +43,24 @@ def get_non_accounting_days(year: int, month: int, user_id: str) -> int:
     
     return sum(entry['days'] for entry in result.data)
 
-def get_worked_hours(year: int, month: int, user_id: str) -> float:
+async def get_worked_hours(year: int, month: int, user_id: str) -> float:
     """Calcula total de horas trabalhadas no mês"""
-    start_date = date(year, month, 1)
-    if month == 12:
-        end_date = date(year + 1, 1, 1)
-    else:
-        end_date = date(year, month + 1, 1)
+    start_date, end_date = get_month_bounds(year, month)
         
-    result = supabase.table('time_entries')\
+    result = await get_db().table('time_entries')\
         .select('start_time,end_time')\
         .eq('user_id', user_id)\
         .gte('date', start_date.isoformat())\
         .lt('date', end_date.isoformat())\
         .execute()
     
-    total_hours = 0.0
-    for entry in result.data:
-        start = datetime.strptime(entry['start_time'], '%H:%M:%S')
-        end = datetime.strptime(entry['end_time'], '%H:%M:%S')
-        hours = (end - start).total_seconds() / 3600
-        total_hours += hours
-    
-    return total_hours
+    return ShiftColumns.from_rows(result.data).total_hours()
 
-def calculate_month_summary(month: int, year: int, user_id: str) -> MonthlySummary:
+def build_month_summary(month: int, year: int, non_accounting_days: int, worked_hours: float,
+                        night_hours: float = 0.0, overtime_hours: float = 0.0,
+                        business_days: Optional[int] = None) -> MonthlySummary:
     """
-    Calcula o sumário mensal com:
+    Monta o sumário mensal a partir dos totais já agregados:
     - Total de dias no mês
     - Dias não contábeis
     - Dias úteis
@@ -69,11 +71,8 @@ def calculate_month_summary(month: int, year: int, user_id: str) -> MonthlySumma
     # Total de dias no mês
     total_days = calendar.monthrange(year, month)[1]
     
-    # Dias não contábeis
-    non_accounting_days = get_non_accounting_days(year, month, user_id)
-    
-    # Dias úteis
-    working_days = calculate_working_days(year, month)
+    # Dias úteis (já contados pelo banco no backend rpc)
+    working_days = calculate_working_days(year, month) if business_days is None else business_days
     
     # Ajusta dias úteis subtraindo dias não contábeis
     working_days = max(0, working_days - non_accounting_days)
@@ -81,44 +80,168 @@ def calculate_month_summary(month: int, year: int, user_id: str) -> MonthlySumma
     # Horas previstas (8h por dia útil)
     expected_hours = working_days * 8
     
-    # Horas trabalhadas
-    worked_hours = get_worked_hours(year, month, user_id)
-    
     # Calcula saldo
     balance_hours = worked_hours - expected_hours
     
+    # Horas ponderadas pelos adicionais noturno e de hora extra
+    premium_hours = weighted_hours(worked_hours, night_hours, overtime_hours)
+    
     return MonthlySummary(
         total_days=total_days,
         non_accounting_days=non_accounting_days,
         working_days=working_days,
         expected_hours=expected_hours,
         worked_hours=worked_hours,
-        balance_hours=balance_hours
+        balance_hours=balance_hours,
+        night_hours=night_hours,
+        overtime_hours=overtime_hours,
+        premium_hours=premium_hours,
+        premium_balance_hours=premium_hours - expected_hours
     )
 
-def calculate_year_summary(year: int, user_id: str) -> Dict[str, MonthlySummary]:
+async def calculate_month_summary(month: int, year: int, user_id: str) -> MonthlySummary:
+    """Calcula o sumário mensal do usuário"""
+    summaries = await calculate_range_summaries((year, month), (year, month), user_id)
+    return summaries[(year, month)]
+
+def iter_months(start: Tuple[int, int], end: Tuple[int, int]) -> Iterator[Tuple[int, int]]:
+    """Percorre os meses (ano, mês) entre start e end, inclusive"""
+    year, month = start
+    while (year, month) <= end:
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+def summarize_months(time_entries: List[dict], non_accounting: List[dict],
+                     start: Tuple[int, int], end: Tuple[int, int]) -> Dict[Tuple[int, int], MonthlySummary]:
     """
-    Calcula o sumário anual agregando os resultados mensais
+    Agrupa por mês lançamentos já buscados e monta o sumário de cada mês
+    entre start e end. Não acessa o banco: também roda nos processos dos relatórios.
     """
-    summaries = {}
+    # Datas vêm no formato ISO (AAAA-MM-DD): ano nas posições 0-4, mês nas 5-7
+    days_by_month: Dict[Tuple[int, int], int] = defaultdict(int)
+    for entry in non_accounting:
+        days_by_month[(int(entry['entry_date'][0:4]), int(entry['entry_date'][5:7]))] += entry['days']
     
-    # Calcula sumário para cada mês
-    for month in range(1, 13):
-        summaries[str(month)] = calculate_month_summary(month, year, user_id)
+    shift_totals = ShiftColumns.from_rows(time_entries).totals_by_month()
     
-    return summaries
+    return {
+        (year, month): build_month_summary(
+            month, year, days_by_month[(year, month)],
+            *shift_totals.get((year, month), MonthTotals(0.0, 0.0, 0.0))
+        )
+        for year, month in iter_months(start, end)
+    }
 
-def calculate_year_totals(year: int, user_id: str) -> MonthlySummary:
+async def calculate_range_summaries(start: Tuple[int, int], end: Tuple[int, int], user_id: str) -> Dict[Tuple[int, int], MonthlySummary]:
     """
-    Calcula os totais anuais agregando todos os meses
+    Calcula os sumários de todos os meses entre start e end (ano, mês)
+    com uma única consulta por tabela, agrupando os lançamentos por mês em memória
+    """
+    if get_settings().SUMMARY_BACKEND == 'rpc':
+        return await calculate_range_summaries_rpc(start, end, user_id)
+    
+    start_date = date(start[0], start[1], 1)
+    _, end_date = get_month_bounds(*end)
+    
+    non_accounting, time_entries = await asyncio.gather(
+        get_db().table('non_accounting_entries')\
+            .select('entry_date,days')\
+            .eq('user_id', user_id)\
+            .gte('entry_date', start_date.isoformat())\
+            .lt('entry_date', end_date.isoformat())\
+            .execute_all(),
+        get_db().table('time_entries')\
+            .select('date,start_time,end_time,night_seconds,overtime_seconds')\
+            .eq('user_id', user_id)\
+            .gte('date', start_date.isoformat())\
+            .lt('date', end_date.isoformat())\
+            .execute_all()
+    )
+    
+    with phase("compute"):
+        return summarize_months(time_entries.data, non_accounting.data, start, end)
+
+async def calculate_range_summaries_rpc(start: Tuple[int, int], end: Tuple[int, int], user_id: str) -> Dict[Tuple[int, int], MonthlySummary]:
+    """
+    Mesmos sumários de calculate_range_summaries, agregados no Postgres por
+    summarize_user_months: volta uma linha por mês em vez de cada lançamento.
+    As regras de intervalo e os feriados da região são enviados pela API.
     """
-    monthly_summaries = calculate_year_summary(year, user_id)
+    start_date = date(start[0], start[1], 1)
+    _, end_date = get_month_bounds(*end)
+    threshold, deduction = break_rule()
     
+    result = await get_db().rpc('summarize_user_months', {
+        'p_user_id': user_id,
+        'p_start': start_date.isoformat(),
+        'p_end': end_date.isoformat(),
+        'p_break_threshold': threshold,
+        'p_break_deduction': deduction,
+        'p_holidays': [day.isoformat() for day in business_calendar.holidays(start_date, end_date - timedelta(days=1))],
+    }).execute()
+    
+    with phase("compute"):
+        return {
+            (row['year'], row['month']): build_month_summary(
+                row['month'], row['year'], row['non_accounting_days'],
+                row['worked_seconds'] / 3600, row['night_seconds'] / 3600, row['overtime_seconds'] / 3600,
+                business_days=row['working_days']
+            )
+            for row in result.data
+        }
+
+async def calculate_year_summary(year: int, user_id: str) -> Dict[str, MonthlySummary]:
+    """
+    Calcula o sumário anual com uma única consulta por tabela
+    """
+    summaries = await calculate_range_summaries((year, 1), (year, 12), user_id)
+    return {str(month): summary for (_, month), summary in summaries.items()}
+
+def sum_summaries(summaries: Iterable[MonthlySummary]) -> MonthlySummary:
+    """Soma sumários mensais em um sumário do período"""
+    summaries = list(summaries)
     return MonthlySummary(
-        total_days=sum(s.total_days for s in monthly_summaries.values()),
-        non_accounting_days=sum(s.non_accounting_days for s in monthly_summaries.values()),
-        working_days=sum(s.working_days for s in monthly_summaries.values()),
-        expected_hours=sum(s.expected_hours for s in monthly_summaries.values()),
-        worked_hours=sum(s.worked_hours for s in monthly_summaries.values()),
-        balance_hours=sum(s.balance_hours for s in monthly_summaries.values())
+        total_days=sum(s.total_days for s in summaries),
+        non_accounting_days=sum(s.non_accounting_days for s in summaries),
+        working_days=sum(s.working_days for s in summaries),
+        expected_hours=sum(s.expected_hours for s in summaries),
+        worked_hours=sum(s.worked_hours for s in summaries),
+        balance_hours=sum(s.balance_hours for s in summaries),
+        night_hours=sum(s.night_hours for s in summaries),
+        overtime_hours=sum(s.overtime_hours for s in summaries),
+        premium_hours=sum(s.premium_hours for s in summaries),
+        premium_balance_hours=sum(s.premium_balance_hours for s in summaries)
     )
+
+async def calculate_year_totals(year: int, user_id: str) -> MonthlySummary:
+    """
+    Calcula os totais anuais agregando todos os meses
+    """
+    monthly_summaries = await calculate_year_summary(year, user_id)
+    return sum_summaries(monthly_summaries.values())
+
+
+async def backfill_premium_columns(user_id: str) -> int:
+    """
+    Recalcula night_seconds e overtime_seconds dos turnos do usuário gravados
+    antes do cálculo na gravação (ou com regras antigas). Retorna quantos mudaram.
+    """
+    updated = 0
+    pages = get_db().table('time_entries')\
+        .select('id,start_time,end_time,night_seconds,overtime_seconds')\
+        .eq('user_id', user_id)\
+        .iter_pages()
+    async for page in pages:
+        changes = []
+        for row in page:
+            columns = premium_columns(parse_time_seconds(row['start_time']), parse_time_seconds(row['end_time']))
+            if any((row.get(name) or 0) != value for name, value in columns.items()):
+                changes.append((row['id'], columns))
+        
+        # Atualizações da página em paralelo
+        await asyncio.gather(*(
+            get_db().table('time_entries').update(columns).eq('id', entry_id).eq('user_id', user_id).execute()
+            for entry_id, columns in changes
+        ))
+        updated += len(changes)
+    return updated
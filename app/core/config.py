@@ -2,12 +2,92 @@ from pydantic_settings import BaseSettings
 from functools import lru_cache
 
 class Settings(BaseSettings):
-    SUPABASE_URL: str
-    SUPABASE_KEY: str
+    # Obrigatórias com STORAGE_BACKEND=postgrest
+    SUPABASE_URL: str = ""
+    SUPABASE_KEY: str = ""
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Armazenamento: "postgrest" (Supabase) ou "sqlite" (um único nó, sem
+    # banco hospedado; usuários e senhas ficam no próprio arquivo)
+    STORAGE_BACKEND: str = "postgrest"
+    SQLITE_PATH: str = "banco_de_horas.db"
+    
+    # Pool de conexões HTTP com o PostgREST
+    DB_MAX_CONNECTIONS: int = 100
+    DB_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    DB_TIMEOUT_SECONDS: float = 10.0
+    
+    # Cache de tokens já verificados no Supabase Auth
+    TOKEN_CACHE_MAX_SIZE: int = 1024
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    
+    # Versão dos dados por usuário (ETags e caches por versão): lida do banco
+    # no máximo a cada TTL; escritas de outros processos aparecem depois disso
+    DATA_VERSION_CACHE_MAX_USERS: int = 10000
+    DATA_VERSION_CACHE_TTL_SECONDS: float = 2.0
+    
+    # Saldo de férias por período aquisitivo
+    VACATION_DAYS_PER_PERIOD: int = 30
+    VACATION_CACHE_MAX_USERS: int = 1024
+    
+    # Importação em lote de lançamentos
+    BULK_MAX_ENTRIES: int = 5000
+    BULK_INSERT_CHUNK_SIZE: int = 500
+    
+    # Exportação de saldos mensais: meses no máximo por requisição
+    EXPORT_MAX_MONTHS: int = 600
+    
+    # Onde os sumários são agregados: "python" (linhas somadas na API) ou
+    # "rpc" (função summarize_user_months no Postgres, uma linha por mês)
+    SUMMARY_BACKEND: str = "python"
+    
+    # Intervalo descontado de turnos longos
+    BREAK_THRESHOLD_HOURS: float = 6
+    BREAK_DEDUCTION_HOURS: float = 1
+    
+    # Adicionais noturno (22h às 5h) e de hora extra (além da jornada diária)
+    NIGHT_START_HOUR: float = 22
+    NIGHT_END_HOUR: float = 5
+    DAILY_REGULAR_HOURS: float = 8
+    NIGHT_PREMIUM_MULTIPLIER: float = 1.2
+    OVERTIME_PREMIUM_MULTIPLIER: float = 1.5
+    
+    # Calendário de feriados usado nos dias úteis e sumários (vazio = nacional).
+    # Ao mudar a região, recalcule os snapshots com `python -m app.cli rebuild-snapshots`
+    HOLIDAY_STATE: str = ""  # sigla do estado, ex.: SP
+    HOLIDAY_MUNICIPALITY: str = ""  # código IBGE, cadastrado em MUNICIPAL_HOLIDAYS_FILE
+    MUNICIPAL_HOLIDAYS_FILE: str = ""  # padrão: app/data/municipal_holidays.json
+    HOLIDAY_CACHE_SIZE: int = 256
+    
+    # Relatórios de equipe
+    ADMIN_USER_IDS: str = ""  # ids separados por vírgula
+    REPORT_WORKERS: int = 4  # 1 calcula no próprio processo
+    REPORT_USER_CHUNK_SIZE: int = 200
+    REPORT_MAX_USERS: int = 10000
+    
+    # Métricas (/api/metrics): administradores ou o scraper com este token
+    METRICS_TOKEN: str = ""
+    
+    # Fila de recálculo de monthly_hours no banco (recompute_queue), drenada
+    # pelo pg_cron ou por `python -m app.cli drain-recompute`
+    RECOMPUTE_DEBOUNCE_SECONDS: float = 2.0  # espera após a última escrita do mês
+    RECOMPUTE_BATCH_SIZE: int = 500
+    RECOMPUTE_POLL_SECONDS: float = 5.0  # intervalo do drain-recompute --watch
+    
+    # Partida: em serverless (padrão) clientes e módulos opcionais são criados
+    # no primeiro uso; servidores de longa duração podem criá-los no lifespan
+    WARM_START: bool = False
+    
+    # Instrumentação das requisições
+    SERVER_TIMING_ENABLED: bool = False
+    QUERY_BUDGET: int = 10  # 0 desativa o aviso de N+1
+    
+    @property
+    def admin_user_ids(self) -> set:
+        return {user_id.strip() for user_id in self.ADMIN_USER_IDS.split(",") if user_id.strip()}
+    
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,85 @@
+import hashlib
+import time as _time
+from collections import OrderedDict
+from datetime import date
+from typing import Optional, Tuple
+from fastapi import Request, Response, status
+from .config import get_settings
+from .database import get_db
+
+class DataVersions:
+    """
+    Versão dos dados de cada usuário, trocada a cada escrita. Serve de base
+    para os ETags das leituras: enquanto a versão não muda, o cliente pode
+    reaproveitar a resposta que já tem.
+
+    A versão fica no banco (user_data_versions), então todos os processos
+    enxergam as escritas uns dos outros. No Postgres os lançamentos também a
+    incrementam por trigger, o que cobre escritas feitas fora da API.
+
+    Cada processo guarda a última versão lida por `ttl_seconds`: leituras
+    repetidas (e os 304) não consultam o banco. As escritas deste processo
+    atualizam o cache na hora; as de outros aparecem após o TTL. Caminhos
+    de escrita usam fresh=True.
+    """
+    def __init__(self, max_users: int = 10000, ttl_seconds: float = 2.0):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._versions: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+
+    def _remember(self, user_id: str, version: int) -> int:
+        cached = self._versions.get(user_id)
+        # Uma leitura que terminou depois de um bump não volta a versão
+        if cached is not None and cached[0] > version:
+            version = cached[0]
+        self._versions[user_id] = (version, _time.monotonic())
+        self._versions.move_to_end(user_id)
+        while len(self._versions) > self.max_users:
+            self._versions.popitem(last=False)
+        return version
+
+    async def get(self, user_id: str, fresh: bool = False) -> int:
+        cached = self._versions.get(user_id)
+        if not fresh and cached is not None and _time.monotonic() - cached[1] <= self.ttl_seconds:
+            return cached[0]
+        result = await get_db().table('user_data_versions')\
+            .select('version')\
+            .eq('user_id', user_id)\
+            .execute()
+        return self._remember(user_id, result.data[0]['version'] if result.data else 0)
+
+    async def bump(self, user_id: str) -> int:
+        """Chamado após cada escrita nos lançamentos do usuário"""
+        result = await get_db().rpc('bump_data_version', {'p_user_id': user_id}).execute()
+        return self._remember(user_id, result.data[0]['version'])
+
+    async def etag(self, user_id: str, resource: str) -> str:
+        """
+        ETag de um recurso do usuário. Inclui a data corrente: meses fechados
+        e saldo de férias também mudam com a virada do dia.
+        """
+        key = f"{await self.get(user_id)}:{resource}:{date.today().isoformat()}"
+        return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca: ignora o prefixo W/
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+def not_modified(request: Request, response: Response, etag: str,
+                 cache_control: str = "private, no-cache") -> Optional[Response]:
+    """
+    Define o ETag da resposta. Se o cliente já tem essa versão (If-None-Match),
+    devolve o 304 que a rota deve retornar sem consultar o banco.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+settings = get_settings()
+data_versions = DataVersions(settings.DATA_VERSION_CACHE_MAX_USERS, settings.DATA_VERSION_CACHE_TTL_SECONDS)
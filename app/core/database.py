@@ -0,0 +1,293 @@
+import json
+import time as _time
+from datetime import date, datetime, time
+from typing import Any, AsyncIterator, List, Optional, Tuple
+import httpx
+from .config import get_settings
+from .metrics import record_db_call
+
+class DatabaseError(Exception):
+    """Erro retornado pelo PostgREST"""
+
+class QueryResult:
+    def __init__(self, data: List[dict]):
+        self.data = data
+
+def _encode_value(value: Any) -> str:
+    """Converte um valor Python para o formato usado nos filtros do PostgREST"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return str(value)
+
+def _json_default(value: Any):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+class AsyncQuery:
+    """
+    Consulta assíncrona com a mesma interface encadeada do cliente supabase
+    (select/eq/gte/lt/.../execute)
+    """
+    def __init__(self, database: 'AsyncDatabase', table: str):
+        self.database = database
+        self.table = table
+        self.method = 'GET'
+        self.columns = '*'
+        self.filters: List[Tuple[str, str, Any]] = []
+        self.orders: List[Tuple[str, bool]] = []
+        self.limit_value: Optional[int] = None
+        self.offset_value: Optional[int] = None
+        self.payload: Any = None
+        self.on_conflict: Optional[str] = None
+
+    def select(self, columns: str = '*') -> 'AsyncQuery':
+        self.method = 'GET'
+        self.columns = columns
+        return self
+
+    def insert(self, payload: Any) -> 'AsyncQuery':
+        self.method = 'POST'
+        self.payload = payload
+        return self
+
+    def upsert(self, payload: Any, on_conflict: str) -> 'AsyncQuery':
+        """Insere ou atualiza linhas que colidem nas colunas de `on_conflict`"""
+        self.method = 'POST'
+        self.payload = payload
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, payload: dict) -> 'AsyncQuery':
+        self.method = 'PATCH'
+        self.payload = payload
+        return self
+
+    def delete(self) -> 'AsyncQuery':
+        self.method = 'DELETE'
+        return self
+
+    def _filter(self, column: str, operator: str, value: Any) -> 'AsyncQuery':
+        self.filters.append((column, operator, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'eq', value)
+
+    def neq(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'neq', value)
+
+    def gt(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'gt', value)
+
+    def gte(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'gte', value)
+
+    def lt(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'lt', value)
+
+    def lte(self, column: str, value: Any) -> 'AsyncQuery':
+        return self._filter(column, 'lte', value)
+
+    def in_(self, column: str, values: List[Any]) -> 'AsyncQuery':
+        return self._filter(column, 'in', list(values))
+
+    def ilike(self, column: str, pattern: str) -> 'AsyncQuery':
+        return self._filter(column, 'ilike', pattern)
+
+    def after(self, columns: Tuple[str, ...], values: Tuple[Any, ...]) -> 'AsyncQuery':
+        """Linhas posteriores a `values` na ordem crescente de `columns` (paginação por keyset)"""
+        return self._filter(tuple(columns), 'after', tuple(values))
+
+    def before(self, columns: Tuple[str, ...], values: Tuple[Any, ...]) -> 'AsyncQuery':
+        """Linhas anteriores a `values` na ordem crescente de `columns` (keyset em ordem decrescente)"""
+        return self._filter(tuple(columns), 'before', tuple(values))
+
+    def order(self, column: str, desc: bool = False) -> 'AsyncQuery':
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count: int) -> 'AsyncQuery':
+        self.limit_value = count
+        return self
+
+    def offset(self, count: int) -> 'AsyncQuery':
+        self.offset_value = count
+        return self
+
+    async def execute(self) -> QueryResult:
+        # Toda ida ao banco passa por aqui: conta consultas, linhas e tempo da requisição
+        started = _time.perf_counter()
+        try:
+            result = await self.database.execute(self)
+        except BaseException:
+            record_db_call(_time.perf_counter() - started, 0, failed=True)
+            raise
+        record_db_call(_time.perf_counter() - started, len(result.data))
+        return result
+
+    async def execute_all(self, page_size: int = 1000) -> QueryResult:
+        """
+        Executa uma consulta de leitura paginando até o fim, já que o PostgREST
+        limita a quantidade de linhas por resposta
+        """
+        if not self.orders:
+            # Paginação por offset precisa de uma ordem estável
+            self.order('id')
+        rows: List[dict] = []
+        offset = 0
+        while True:
+            self.limit_value = page_size
+            self.offset_value = offset
+            page = await self.execute()
+            rows.extend(page.data)
+            if len(page.data) < page_size:
+                return QueryResult(rows)
+            offset += page_size
+
+    async def iter_pages(self, keys: Tuple[str, ...] = ('id',), page_size: int = 1000) -> AsyncIterator[List[dict]]:
+        """
+        Percorre uma consulta de leitura em páginas por keyset sobre `keys`,
+        que precisam identificar a linha e estar entre as colunas selecionadas.
+        Cada página parte da última chave lida: o custo não cresce com o deslocamento.
+        """
+        self.orders = [(key, False) for key in keys]
+        filters = list(self.filters)
+        while True:
+            self.limit_value = page_size
+            page = await self.execute()
+            if page.data:
+                yield page.data
+            if len(page.data) < page_size:
+                return
+            last = page.data[-1]
+            self.filters = filters + [(tuple(keys), 'after', tuple(last[key] for key in keys))]
+
+def _keyset_condition(columns: Tuple[str, ...], values: Tuple[Any, ...], operator: str = 'gt') -> str:
+    """(a, b) > (x, y) no formato do PostgREST: or=(a.gt.x,and(a.eq.x,b.gt.y)); com 'lt', (a, b) < (x, y)"""
+    conditions = []
+    for position, column in enumerate(columns):
+        equal = [f'{c}.eq.{_encode_value(v)}' for c, v in zip(columns[:position], values[:position])]
+        greater = f'{column}.{operator}.{_encode_value(values[position])}'
+        conditions.append(f"and({','.join(equal + [greater])})" if equal else greater)
+    return f"({','.join(conditions)})"
+
+class AsyncDatabase:
+    """
+    Acesso não bloqueante ao PostgREST do Supabase usando um pool
+    de conexões HTTP keep-alive compartilhado pelo processo
+    """
+    def __init__(self, url: str, key: str, max_connections: int = 100,
+                 max_keepalive_connections: int = 20, timeout: float = 10.0):
+        self.client = httpx.AsyncClient(
+            base_url=f"{url.rstrip('/')}/rest/v1",
+            headers={
+                'apikey': key,
+                'Authorization': f'Bearer {key}',
+                'Content-Type': 'application/json',
+            },
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=timeout,
+        )
+
+    def table(self, name: str) -> AsyncQuery:
+        return AsyncQuery(self, name)
+
+    def rpc(self, function: str, params: dict) -> AsyncQuery:
+        """Chamada a uma função do Postgres (POST /rpc/<função>), como no cliente supabase"""
+        query = AsyncQuery(self, f'rpc/{function}')
+        query.method = 'POST'
+        query.payload = params
+        return query
+
+    def _build_params(self, query: AsyncQuery) -> List[Tuple[str, str]]:
+        params = [('select', query.columns)]
+        for column, operator, value in query.filters:
+            if operator == 'in':
+                encoded = ','.join(_encode_value(v) for v in value)
+                params.append((column, f'in.({encoded})'))
+            elif operator == 'after':
+                params.append(('or', _keyset_condition(column, value)))
+            elif operator == 'before':
+                params.append(('or', _keyset_condition(column, value, 'lt')))
+            else:
+                params.append((column, f'{operator}.{_encode_value(value)}'))
+        if query.orders:
+            params.append(('order', ','.join(
+                f"{column}.{'desc' if desc else 'asc'}" for column, desc in query.orders
+            )))
+        if query.limit_value is not None:
+            params.append(('limit', str(query.limit_value)))
+        if query.offset_value:
+            params.append(('offset', str(query.offset_value)))
+        if query.on_conflict:
+            params.append(('on_conflict', query.on_conflict))
+        return params
+
+    async def execute(self, query: AsyncQuery) -> QueryResult:
+        headers = {}
+        content = None
+        if query.method != 'GET':
+            headers['Prefer'] = 'return=representation'
+        if query.on_conflict:
+            headers['Prefer'] += ',resolution=merge-duplicates'
+        if query.payload is not None:
+            content = json.dumps(query.payload, default=_json_default)
+
+        response = await self.client.request(
+            query.method,
+            f'/{query.table}',
+            params=self._build_params(query),
+            content=content,
+            headers=headers,
+        )
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get('message', response.text)
+            except ValueError:
+                detail = response.text
+            raise DatabaseError(detail)
+
+        return QueryResult(response.json() if response.content else [])
+
+    async def aclose(self):
+        await self.client.aclose()
+
+_database: Optional[AsyncDatabase] = None
+
+def get_db() -> AsyncDatabase:
+    """Retorna o cliente assíncrono do processo, criando-o no primeiro uso"""
+    global _database
+    if _database is None:
+        settings = get_settings()
+        if settings.STORAGE_BACKEND == 'sqlite':
+            from .sqlite_backend import SQLiteDatabase
+            _database = SQLiteDatabase(settings.SQLITE_PATH)
+            return _database
+        if not settings.SUPABASE_URL:
+            raise RuntimeError("SUPABASE_URL não configurada (ou use STORAGE_BACKEND=sqlite)")
+        _database = AsyncDatabase(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_KEY,
+            max_connections=settings.DB_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.DB_MAX_KEEPALIVE_CONNECTIONS,
+            timeout=settings.DB_TIMEOUT_SECONDS,
+        )
+    return _database
+
+def set_db(database) -> None:
+    """Substitui o cliente do processo (ex.: por um banco em memória nos benchmarks)"""
+    global _database
+    _database = database
+
+async def close_db():
+    """Fecha o pool de conexões (chamado no desligamento da aplicação)"""
+    global _database
+    if _database is not None:
+        await _database.aclose()
+        _database = None
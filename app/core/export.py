@@ -0,0 +1,48 @@
+import csv
+import io
+import json
+import logging
+from typing import AsyncIterator, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+async def csv_chunks(pages: AsyncIterator[List[dict]], columns: Sequence[str]) -> AsyncIterator[str]:
+    """Converte páginas de linhas em blocos CSV, um bloco por página"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    async for page in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in page:
+            writer.writerow(['' if row.get(column) is None else row.get(column) for column in columns])
+        yield buffer.getvalue()
+
+async def ndjson_chunks(pages: AsyncIterator[List[dict]], columns: Sequence[str]) -> AsyncIterator[str]:
+    """Converte páginas de linhas em blocos NDJSON (um objeto JSON por linha)"""
+    async for page in pages:
+        yield ''.join(
+            json.dumps({column: row.get(column) for column in columns}, ensure_ascii=False, default=str) + '\n'
+            for row in page
+        )
+
+async def stream_export(pages: AsyncIterator[List[dict]], columns: Sequence[str], export_format: str) -> AsyncIterator[str]:
+    """
+    Gera o corpo da exportação página a página: só uma página fica em memória.
+    Como o status já foi enviado, um erro no meio do envio encerra o arquivo
+    incompleto e fica registrado no log.
+    """
+    chunks = csv_chunks(pages, columns) if export_format == 'csv' else ndjson_chunks(pages, columns)
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception:
+        logger.exception("Exportação interrompida")
+        raise
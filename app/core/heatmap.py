@@ -0,0 +1,72 @@
+import asyncio
+import calendar
+from datetime import date, timedelta
+from typing import List
+from ..schemas.entries import NonAccountingType, YearHeatmap
+from .business_days import business_calendar
+from .database import get_db
+from .hour_engine import parse_time_seconds, worked_seconds
+from .metrics import phase
+
+# Código de cada tipo de ausência nos arrays (0 = sem ausência)
+ABSENCE_TYPES: List[str] = [''] + [absence_type.value for absence_type in NonAccountingType]
+ABSENCE_CODES = {name: code for code, name in enumerate(ABSENCE_TYPES) if name}
+
+# Períodos iniciados até um ano antes ainda podem cobrir dias do ano pedido
+ABSENCE_LOOKBACK_DAYS = 366
+
+def build_year_heatmap(year: int, time_entries: List[dict], non_accounting: List[dict]) -> YearHeatmap:
+    """
+    Um valor por dia do ano em cada array: minutos trabalhados (turnos contam
+    na data de início, como nos sumários), código da ausência e as marcas de
+    feriado e de dia útil do calendário da região.
+    """
+    first_ordinal = date(year, 1, 1).toordinal()
+    days = 366 if calendar.isleap(year) else 365
+
+    seconds = [0] * days
+    for entry in time_entries:
+        index = date.fromisoformat(entry['date']).toordinal() - first_ordinal
+        seconds[index] += worked_seconds(parse_time_seconds(entry['start_time']), parse_time_seconds(entry['end_time']))
+
+    absence = [0] * days
+    for entry in non_accounting:
+        start = date.fromisoformat(entry['entry_date']).toordinal() - first_ordinal
+        code = ABSENCE_CODES.get(entry['type'], ABSENCE_CODES[NonAccountingType.outro.value])
+        for index in range(max(start, 0), min(start + entry['days'], days)):
+            absence[index] = code
+
+    holiday = [0] * days
+    for day in business_calendar.holidays(date(year, 1, 1), date(year, 12, 31)):
+        holiday[day.toordinal() - first_ordinal] = 1
+
+    return YearHeatmap(
+        year=year,
+        absence_types=ABSENCE_TYPES,
+        worked_minutes=[round(value / 60) for value in seconds],
+        absence=absence,
+        holiday=holiday,
+        business_day=list(business_calendar.year(year).working)
+    )
+
+async def get_year_heatmap(year: int, user_id: str) -> YearHeatmap:
+    """Calendário do ano com uma consulta por tabela, só com as colunas usadas"""
+    start_date, end_date = date(year, 1, 1), date(year + 1, 1, 1)
+
+    time_entries, non_accounting = await asyncio.gather(
+        get_db().table('time_entries')\
+            .select('date,start_time,end_time')\
+            .eq('user_id', user_id)\
+            .gte('date', start_date.isoformat())\
+            .lt('date', end_date.isoformat())\
+            .execute_all(),
+        get_db().table('non_accounting_entries')\
+            .select('entry_date,days,type')\
+            .eq('user_id', user_id)\
+            .gte('entry_date', (start_date - timedelta(days=ABSENCE_LOOKBACK_DAYS)).isoformat())\
+            .lt('entry_date', end_date.isoformat())\
+            .execute_all()
+    )
+
+    with phase("compute"):
+        return build_year_heatmap(year, time_entries.data, non_accounting.data)
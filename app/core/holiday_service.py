@@ -0,0 +1,125 @@
+import calendar
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from dateutil.easter import easter
+from .config import get_settings
+
+DEFAULT_MUNICIPAL_FILE = Path(__file__).resolve().parent.parent / "data" / "municipal_holidays.json"
+
+class Region(NamedTuple):
+    """Estado (sigla) e município (código IBGE); None é o calendário nacional"""
+    state: Optional[str] = None
+    municipality: Optional[str] = None
+
+class RegionError(ValueError):
+    """Estado ou município inválido"""
+
+class HolidayTable:
+    """
+    Feriados de um ano em uma região, imutável depois de montado:
+    datas ordenadas, um byte por dia do ano para consulta em O(1) e o
+    corpo JSON já serializado para a rota de feriados.
+    """
+    __slots__ = ('year', 'region', 'dates', 'names', 'bitmap', 'body', 'etag')
+
+    def __init__(self, year: int, region: Region, entries: Dict[date, str]):
+        self.year = year
+        self.region = region
+        self.dates: Tuple[date, ...] = tuple(sorted(entries))
+        self.names: Tuple[str, ...] = tuple(entries[day] for day in self.dates)
+
+        first_ordinal = date(year, 1, 1).toordinal()
+        bitmap = bytearray(366 if calendar.isleap(year) else 365)
+        for day in self.dates:
+            bitmap[day.toordinal() - first_ordinal] = 1
+        self.bitmap = bytes(bitmap)
+
+        self.body = json.dumps(
+            {day.isoformat(): name for day, name in zip(self.dates, self.names)},
+            ensure_ascii=False
+        ).encode()
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()[:20]}"'
+
+    def __contains__(self, day: date) -> bool:
+        return day.year == self.year and bool(self.bitmap[day.timetuple().tm_yday - 1])
+
+@lru_cache()
+def _brazil_holidays():
+    """Calendário holidays.BR, importado só ao montar a primeira tabela"""
+    import holidays
+    return holidays.BR
+
+@lru_cache()
+def load_municipalities(path: str) -> Dict[str, dict]:
+    """Feriados municipais cadastrados, por código IBGE"""
+    with open(path, encoding="utf-8") as municipal_file:
+        return json.load(municipal_file)
+
+class HolidayService:
+    """
+    Tabelas de feriados nacionais, estaduais e municipais por ano,
+    montadas uma vez e mantidas em um cache LRU de tamanho limitado
+    """
+    def __init__(self, municipal_file: Optional[str] = None, max_tables: int = 256):
+        self.municipal_file = municipal_file or str(DEFAULT_MUNICIPAL_FILE)
+        self.max_tables = max_tables
+        self._tables: "OrderedDict[Tuple[int, Region], HolidayTable]" = OrderedDict()
+
+    def municipalities(self) -> Dict[str, dict]:
+        return load_municipalities(self.municipal_file)
+
+    def resolve(self, state: Optional[str] = None, municipality: Optional[str] = None) -> Region:
+        """Valida a região; o estado de um município cadastrado é preenchido automaticamente"""
+        state = state.upper() if state else None
+        if municipality:
+            info = self.municipalities().get(municipality)
+            if info is None:
+                raise RegionError(f"Município sem feriados cadastrados: {municipality}")
+            if state and state != info["state"]:
+                raise RegionError(f"Município {municipality} não pertence a {state}")
+            state = info["state"]
+        if state and state not in _brazil_holidays().subdivisions:
+            raise RegionError(f"Estado inválido: {state}")
+        return Region(state, municipality or None)
+
+    def _build(self, year: int, region: Region) -> HolidayTable:
+        entries: Dict[date, str] = dict(_brazil_holidays()(years=year, subdiv=region.state).items())
+        if region.municipality:
+            for holiday in self.municipalities()[region.municipality]["holidays"]:
+                if "easter_offset" in holiday:
+                    day = easter(year) + timedelta(days=holiday["easter_offset"])
+                else:
+                    month, day_of_month = holiday["date"].split("-")
+                    day = date(year, int(month), int(day_of_month))
+                entries.setdefault(day, holiday["name"])
+        return HolidayTable(year, region, entries)
+
+    def table(self, year: int, region: Region = Region()) -> HolidayTable:
+        key = (year, region)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._build(year, region)
+            self._tables[key] = table
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        else:
+            self._tables.move_to_end(key)
+        return table
+
+    def is_holiday(self, day: date, region: Region = Region()) -> bool:
+        return day in self.table(day.year, region)
+
+    def dates(self, year: int, region: Region = Region()) -> List[date]:
+        return list(self.table(year, region).dates)
+
+settings = get_settings()
+holiday_service = HolidayService(settings.MUNICIPAL_HOLIDAYS_FILE or None, settings.HOLIDAY_CACHE_SIZE)
+
+def default_region() -> Region:
+    """Região do calendário usado nos dias úteis e sumários (HOLIDAY_STATE / HOLIDAY_MUNICIPALITY)"""
+    return holiday_service.resolve(settings.HOLIDAY_STATE or None, settings.HOLIDAY_MUNICIPALITY or None)
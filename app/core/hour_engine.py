@@ -0,0 +1,206 @@
+from array import array
+from collections import defaultdict
+from datetime import time
+from functools import lru_cache
+from typing import Dict, Iterable, NamedTuple, Tuple
+from .config import get_settings
+
+SECONDS_PER_DAY = 86400
+
+# Abaixo disso o custo de montar os arrays do numpy não compensa
+VECTORIZE_MIN_ROWS = 256
+
+MonthKey = Tuple[int, int]
+
+@lru_cache()
+def numpy_module():
+    """
+    numpy, importado só no primeiro lote grande para não pesar na partida
+    a frio. Está em requirements.txt; se faltar no ambiente (None), os totais
+    são somados em Python.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def parse_time_seconds(value: str) -> int:
+    """Converte 'HH:MM:SS' em segundos desde a meia-noite"""
+    return int(value[0:2]) * 3600 + int(value[3:5]) * 60 + int(value[6:8] or 0)
+
+def time_seconds(value: time) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+@lru_cache()
+def break_rule() -> Tuple[int, int]:
+    """(duração mínima para desconto, desconto), em segundos"""
+    settings = get_settings()
+    return int(settings.BREAK_THRESHOLD_HOURS * 3600), int(settings.BREAK_DEDUCTION_HOURS * 3600)
+
+def worked_seconds(start_seconds: int, end_seconds: int) -> int:
+    """
+    Segundos trabalhados em um turno. Fim menor que o início significa que o
+    turno passou da meia-noite; turnos acima do limite descontam o intervalo.
+    """
+    duration = end_seconds - start_seconds
+    if duration < 0:
+        duration += SECONDS_PER_DAY
+    threshold, deduction = break_rule()
+    if duration > threshold:
+        duration -= deduction
+    return duration
+
+class ShiftSplit(NamedTuple):
+    """Segundos trabalhados de um turno divididos em faixas que não se sobrepõem"""
+    normal: int
+    night: int
+    overtime: int
+
+    @property
+    def worked(self) -> int:
+        return self.normal + self.night + self.overtime
+
+@lru_cache()
+def premium_rule() -> Tuple[int, int, int, float, float]:
+    """(início e fim do período noturno, jornada diária, multiplicadores noturno e de hora extra)"""
+    settings = get_settings()
+    return (
+        int(settings.NIGHT_START_HOUR * 3600),
+        int(settings.NIGHT_END_HOUR * 3600),
+        int(settings.DAILY_REGULAR_HOURS * 3600),
+        settings.NIGHT_PREMIUM_MULTIPLIER,
+        settings.OVERTIME_PREMIUM_MULTIPLIER,
+    )
+
+def _night_overlap(start: int, end: int) -> int:
+    """Segundos de [start, end) dentro do período noturno (start a partir da meia-noite do dia do turno)"""
+    night_start, night_end, _, _, _ = premium_rule()
+    total = 0
+    # O turno dura no máximo um dia: bastam as janelas do dia anterior, do dia e do seguinte
+    for day in (-1, 0, 1):
+        window_start = day * SECONDS_PER_DAY + night_start
+        window_end = (day + (1 if night_end <= night_start else 0)) * SECONDS_PER_DAY + night_end
+        total += max(0, min(end, window_end) - max(start, window_start))
+    return total
+
+def split_shift(start_seconds: int, end_seconds: int) -> ShiftSplit:
+    """
+    Divide um turno em horas normais, noturnas e extras. O que passa da
+    jornada diária é hora extra, contada a partir do fim do turno; o
+    intervalo é descontado primeiro das horas diurnas da jornada.
+    """
+    _, _, daily_limit, _, _ = premium_rule()
+    duration = end_seconds - start_seconds
+    if duration < 0:
+        duration += SECONDS_PER_DAY
+    worked = worked_seconds(start_seconds, end_seconds)
+    pause = duration - worked
+    overtime = max(0, worked - daily_limit)
+
+    regular_end = start_seconds + duration - overtime
+    night = _night_overlap(start_seconds, regular_end)
+    day = regular_end - start_seconds - night
+    if pause > day:
+        night -= pause - day
+        day = 0
+    else:
+        day -= pause
+    return ShiftSplit(day, night, overtime)
+
+def weighted_hours(worked: float, night: float, overtime: float) -> float:
+    """Horas trabalhadas ponderadas pelos adicionais noturno e de hora extra (tudo em horas)"""
+    _, _, _, night_multiplier, overtime_multiplier = premium_rule()
+    return worked + night * (night_multiplier - 1) + overtime * (overtime_multiplier - 1)
+
+class MonthTotals(NamedTuple):
+    worked_hours: float
+    night_hours: float
+    overtime_hours: float
+
+class ShiftColumns:
+    """
+    Turnos em colunas: mês (ano * 12 + mês - 1), início e fim em segundos desde
+    a meia-noite, e as horas noturnas e extras já gravadas no lançamento.
+    Montadas em uma passada sobre as linhas do banco, sem criar objetos de
+    data por linha.
+    """
+    def __init__(self):
+        self.months = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.nights = array('i')
+        self.overtimes = array('i')
+
+    def __len__(self):
+        return len(self.months)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict], date_column: str = 'date') -> 'ShiftColumns':
+        columns = cls()
+        months, starts, ends = columns.months.append, columns.starts.append, columns.ends.append
+        nights, overtimes = columns.nights.append, columns.overtimes.append
+        for row in rows:
+            # Datas vêm no formato ISO (AAAA-MM-DD): ano nas posições 0-4, mês nas 5-7
+            day = row[date_column]
+            months(int(day[0:4]) * 12 + int(day[5:7]) - 1)
+            starts(parse_time_seconds(row['start_time']))
+            ends(parse_time_seconds(row['end_time']))
+            nights(row.get('night_seconds') or 0)
+            overtimes(row.get('overtime_seconds') or 0)
+        return columns
+
+    def seconds_by_month(self) -> Dict[MonthKey, Tuple[int, int, int]]:
+        """Segundos trabalhados, noturnos e extras agrupados por (ano, mês)"""
+        np = numpy_module() if len(self) >= VECTORIZE_MIN_ROWS else None
+        if np is not None:
+            return self._seconds_by_month_numpy(np)
+
+        totals: Dict[int, list] = defaultdict(lambda: [0, 0, 0])
+        for month, start, end, night, overtime in zip(self.months, self.starts, self.ends, self.nights, self.overtimes):
+            total = totals[month]
+            total[0] += worked_seconds(start, end)
+            total[1] += night
+            total[2] += overtime
+        return {(month // 12, month % 12 + 1): tuple(total) for month, total in totals.items()}
+
+    def _seconds_by_month_numpy(self, np) -> Dict[MonthKey, Tuple[int, int, int]]:
+        threshold, deduction = break_rule()
+        months = np.frombuffer(self.months, dtype=np.intc)
+        duration = np.frombuffer(self.ends, dtype=np.intc) - np.frombuffer(self.starts, dtype=np.intc)
+        duration = np.where(duration < 0, duration + SECONDS_PER_DAY, duration)
+        duration = np.where(duration > threshold, duration - deduction, duration)
+
+        keys, positions = np.unique(months, return_inverse=True)
+        worked = np.bincount(positions, weights=duration)
+        nights = np.bincount(positions, weights=np.frombuffer(self.nights, dtype=np.intc))
+        overtimes = np.bincount(positions, weights=np.frombuffer(self.overtimes, dtype=np.intc))
+        return {
+            (int(month) // 12, int(month) % 12 + 1): (int(worked[index]), int(nights[index]), int(overtimes[index]))
+            for index, month in enumerate(keys)
+        }
+
+    def totals_by_month(self) -> Dict[MonthKey, MonthTotals]:
+        return {
+            key: MonthTotals(worked / 3600, night / 3600, overtime / 3600)
+            for key, (worked, night, overtime) in self.seconds_by_month().items()
+        }
+
+    def hours_by_month(self) -> Dict[MonthKey, float]:
+        return {key: totals[0] / 3600 for key, totals in self.seconds_by_month().items()}
+
+    def total_hours(self) -> float:
+        return sum(totals[0] for totals in self.seconds_by_month().values()) / 3600
+
+def hours_by_month(rows: Iterable[dict], date_column: str = 'date') -> Dict[MonthKey, float]:
+    """Horas trabalhadas por (ano, mês) das linhas de turnos vindas do banco"""
+    return ShiftColumns.from_rows(rows, date_column).hours_by_month()
+
+def premium_columns(start_seconds: int, end_seconds: int) -> Dict[str, int]:
+    """
+    Colunas night_seconds e overtime_seconds gravadas com o lançamento.
+    night_time é outra coisa (o adicional de 10 min por hora cheia entre 23h
+    e 5h calculado pelo frontend) e não é tocada pela API.
+    """
+    split = split_shift(start_seconds, end_seconds)
+    return {'night_seconds': split.night, 'overtime_seconds': split.overtime}
@@ -0,0 +1,153 @@
+import asyncio
+from bisect import bisect_left, bisect_right
+from datetime import date, time
+from typing import Dict, Iterable, List, Optional, Tuple
+from .database import get_db
+from .hour_engine import SECONDS_PER_DAY, parse_time_seconds, time_seconds
+
+# Intervalos são semiabertos [início, fim) e guardados como (início, fim, id)
+Interval = Tuple[int, int, int]
+
+def shift_interval(entry_date: date, start_seconds: int, end_seconds: int) -> Tuple[int, int]:
+    """
+    Intervalo absoluto (em segundos) de um turno.
+    Fim menor que o início significa que o turno passou da meia-noite.
+    """
+    base = entry_date.toordinal() * SECONDS_PER_DAY
+    if end_seconds < start_seconds:
+        end_seconds += SECONDS_PER_DAY
+    return base + start_seconds, base + end_seconds
+
+def absence_interval(start_date: date, days: int) -> Tuple[int, int]:
+    """Intervalo absoluto (em dias) de um período não contábil"""
+    start = start_date.toordinal()
+    return start, start + days
+
+class IntervalSet:
+    """
+    Intervalos ordenados pelo início. Como nenhum intervalo é maior que
+    `max_length`, a busca por sobreposição só precisa olhar os inícios em
+    (início - max_length, fim): O(log n + k).
+    """
+    def __init__(self):
+        self._starts: List[int] = []
+        self._items: List[Interval] = []
+        self._by_id: Dict[int, Interval] = {}
+        self.max_length = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, start: int, end: int, item_id: int) -> None:
+        self.remove(item_id)
+        item = (start, end, item_id)
+        position = bisect_right(self._items, item)
+        self._items.insert(position, item)
+        self._starts.insert(position, start)
+        self._by_id[item_id] = item
+        self.max_length = max(self.max_length, end - start)
+
+    def remove(self, item_id: int) -> bool:
+        item = self._by_id.pop(item_id, None)
+        if item is None:
+            return False
+        position = bisect_left(self._items, item)
+        del self._items[position]
+        del self._starts[position]
+        return True
+
+    def overlapping(self, start: int, end: int, exclude_id: Optional[int] = None) -> List[Interval]:
+        first = bisect_right(self._starts, start - self.max_length)
+        last = bisect_left(self._starts, end)
+        return [
+            item for item in self._items[first:last]
+            if item[1] > start and item[2] != exclude_id
+        ]
+
+class UserIntervals:
+    """Turnos e períodos não contábeis de um usuário que podem conflitar com uma faixa de datas"""
+    def __init__(self):
+        self.shifts = IntervalSet()
+        self.absences = IntervalSet()
+
+    @classmethod
+    def from_rows(cls, shift_rows: Iterable[dict], absence_rows: Iterable[dict]) -> "UserIntervals":
+        intervals = cls()
+        for row in shift_rows:
+            intervals.add_shift_row(row)
+        for row in absence_rows:
+            intervals.add_absence_row(row)
+        return intervals
+
+    def add_shift_row(self, row: dict) -> None:
+        start, end = shift_interval(
+            date.fromisoformat(row['date']),
+            parse_time_seconds(row['start_time']),
+            parse_time_seconds(row['end_time'])
+        )
+        self.shifts.add(start, end, row['id'])
+
+    def add_absence_row(self, row: dict) -> None:
+        start, end = absence_interval(date.fromisoformat(row['entry_date']), row['days'])
+        self.absences.add(start, end, row['id'])
+
+    def shift_conflicts(self, entry_date: date, start_time: time, end_time: time,
+                        exclude_id: Optional[int] = None) -> List[Interval]:
+        """Turnos que se sobrepõem ao turno informado"""
+        start, end = shift_interval(entry_date, time_seconds(start_time), time_seconds(end_time))
+        return self.shifts.overlapping(start, end, exclude_id)
+
+    def absence_conflicts(self, start_date: date, days: int,
+                          exclude_id: Optional[int] = None) -> List[Interval]:
+        """Períodos não contábeis que se sobrepõem ao período informado"""
+        start, end = absence_interval(start_date, days)
+        return self.absences.overlapping(start, end, exclude_id)
+
+# As validações consultam o banco a cada escrita (um processo não vê o que
+# outros gravaram), só nas datas que podem conflitar: turnos do dia anterior
+# ao seguinte (a meia-noite pode ser atravessada nos dois sentidos) e
+# ausências iniciadas até o último dia, já que um período não tem duração
+# máxima. A busca nos conjuntos carregados é O(log n + k).
+
+async def _fetch_shifts(user_id: str, first_day: int, last_day: int) -> List[dict]:
+    result = await get_db().table('time_entries')\
+        .select('id,date,start_time,end_time')\
+        .eq('user_id', user_id)\
+        .gte('date', date.fromordinal(first_day - 1).isoformat())\
+        .lte('date', date.fromordinal(last_day + 1).isoformat())\
+        .execute_all()
+    return result.data
+
+async def _fetch_absences(user_id: str, last_day: int) -> List[dict]:
+    result = await get_db().table('non_accounting_entries')\
+        .select('id,entry_date,days')\
+        .eq('user_id', user_id)\
+        .lte('entry_date', date.fromordinal(last_day).isoformat())\
+        .execute_all()
+    return result.data
+
+async def load_intervals(user_id: str, first_date: date, last_date: date) -> UserIntervals:
+    """
+    Turnos e ausências que podem conflitar com lançamentos entre as duas
+    datas, carregados em paralelo (importação em lote)
+    """
+    first_day, last_day = first_date.toordinal(), last_date.toordinal()
+    shift_rows, absence_rows = await asyncio.gather(
+        _fetch_shifts(user_id, first_day, last_day),
+        _fetch_absences(user_id, last_day)
+    )
+    return UserIntervals.from_rows(shift_rows, absence_rows)
+
+async def find_shift_conflicts(user_id: str, entry_date: date, start_time: time, end_time: time,
+                               exclude_id: Optional[int] = None) -> List[Interval]:
+    """Turnos do usuário que se sobrepõem ao turno informado"""
+    day = entry_date.toordinal()
+    intervals = UserIntervals.from_rows(await _fetch_shifts(user_id, day, day), [])
+    return intervals.shift_conflicts(entry_date, start_time, end_time, exclude_id)
+
+async def find_absence_conflicts(user_id: str, start_date: date, days: int,
+                                 exclude_id: Optional[int] = None) -> List[Interval]:
+    """Períodos não contábeis do usuário que se sobrepõem ao período informado"""
+    _, end = absence_interval(start_date, days)
+    intervals = UserIntervals.from_rows([], await _fetch_absences(user_id, end - 1))
+    return intervals.absence_conflicts(start_date, days, exclude_id)
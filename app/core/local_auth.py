@@ -0,0 +1,65 @@
+import json
+import sqlite3
+import uuid
+from typing import Any, Dict, Optional
+from jose import JWTError, jwt
+from .config import get_settings
+
+class LocalUser:
+    """Usuário da tabela `users`, com os mesmos atributos usados do Supabase Auth"""
+    def __init__(self, user_id: str, email: str, app_metadata: Optional[Dict[str, Any]] = None):
+        self.id = user_id
+        self.email = email
+        self.app_metadata = app_metadata or {}
+
+class LocalAuthResponse:
+    def __init__(self, user: LocalUser):
+        self.user = user
+
+class LocalAuth:
+    """
+    Substituto do Supabase Auth com STORAGE_BACKEND=sqlite: usuários e senhas
+    (bcrypt) ficam no próprio banco e os tokens são os JWT emitidos pela API.
+    Síncrono, como o cliente supabase: as rotas o chamam fora do event loop.
+    """
+    def __init__(self, database):
+        self.database = database
+
+    def _user(self, row: sqlite3.Row) -> LocalUser:
+        return LocalUser(row['id'], row['email'], json.loads(row['app_metadata']))
+
+    def sign_up(self, credentials: dict) -> LocalAuthResponse:
+        from .auth import get_password_hash
+        user_id = str(uuid.uuid4())
+        try:
+            with self.database.connection() as connection:
+                connection.execute(
+                    'insert into users (id, email, password_hash) values (?, ?, ?)',
+                    (user_id, credentials['email'], get_password_hash(credentials['password']))
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError("E-mail já cadastrado")
+        return LocalAuthResponse(LocalUser(user_id, credentials['email']))
+
+    def sign_in_with_password(self, credentials: dict) -> LocalAuthResponse:
+        from .auth import verify_password
+        row = self.database.connection().execute(
+            'select * from users where email = ?', (credentials['email'],)
+        ).fetchone()
+        if row is None or not verify_password(credentials['password'], row['password_hash']):
+            raise ValueError("E-mail ou senha incorretos")
+        return LocalAuthResponse(self._user(row))
+
+    def get_user(self, token: str) -> Optional[LocalUser]:
+        settings = get_settings()
+        try:
+            user_id = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]).get('sub')
+        except JWTError:
+            return None
+        row = self.database.connection().execute('select * from users where id = ?', (user_id,)).fetchone()
+        return self._user(row) if row is not None else None
+
+class LocalClient:
+    """Cliente com a parte do supabase usada pela API (auth)"""
+    def __init__(self, database):
+        self.auth = LocalAuth(database)
@@ -0,0 +1,267 @@
+import logging
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class RequestMetrics:
+    """Tempo por fase, consultas e linhas lidas de uma requisição"""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = defaultdict(float)
+        self.db_calls = 0
+        self.rows_fetched = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Valor do cabeçalho Server-Timing (durações em ms)"""
+        parts = []
+        for name, seconds in self.phases.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if name == "db":
+                entry += f';desc="{self.db_calls} queries, {self.rows_fetched} rows"'
+            parts.append(entry)
+        parts.append(f"total;dur={self.elapsed * 1000:.1f}")
+        return ", ".join(parts)
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+# Tempo já contado dentro da fase aberta (consultas e fases internas). As
+# tarefas do asyncio.gather herdam o contexto, então somam na mesma fase.
+_open_phase: ContextVar[Optional[List[float]]] = ContextVar("open_phase", default=None)
+
+def current_request() -> Optional[RequestMetrics]:
+    return _current.get()
+
+@contextmanager
+def phase(name: str):
+    """
+    Acumula o tempo do bloco na fase informada da requisição corrente. O
+    tempo das consultas (fase db) e das fases internas é descontado, para
+    que as fases não se sobreponham.
+    """
+    started = time.perf_counter()
+    nested = [0.0]
+    parent = _open_phase.get()
+    token = _open_phase.set(nested)
+    try:
+        yield
+    finally:
+        _open_phase.reset(token)
+        elapsed = time.perf_counter() - started
+        if parent is not None:
+            parent[0] += elapsed
+        request = _current.get()
+        if request is not None:
+            # Consultas em paralelo podem somar mais que o tempo do bloco
+            request.phases[name] += max(elapsed - nested[0], 0.0)
+
+def timed(name: str):
+    """Decorador: mede a função assíncrona inteira como uma fase da requisição"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with phase(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse que registra a conversão do corpo como fase de serialização"""
+    def render(self, content: Any) -> bytes:
+        with phase("serialization"):
+            return super().render(content)
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Métricas agregadas do processo, expostas no formato texto do Prometheus"""
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self.durations: Dict[str, Histogram] = defaultdict(Histogram)
+        self.phase_seconds: Dict[str, float] = defaultdict(float)
+        self.db_calls = 0
+        self.db_rows = 0
+        self.db_errors = 0
+        self.auth_remote_calls = 0
+        self.auth_remote_seconds = 0.0
+        self.query_budget_exceeded: Dict[str, int] = defaultdict(int)
+        # Métricas de outros componentes, lidas só na exportação
+        self.collectors: List[Callable[[], Dict[str, float]]] = []
+
+    def observe_request(self, method: str, route: str, status: int, request: RequestMetrics) -> None:
+        self.requests[(method, route, status)] += 1
+        self.durations[route].observe(request.elapsed)
+        for name, seconds in request.phases.items():
+            self.phase_seconds[name] += seconds
+
+    def register_collector(self, collector: Callable[[], Dict[str, float]]) -> None:
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_total Requisições atendidas",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_request_duration_seconds Duração das requisições",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for route, histogram in sorted(self.durations.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{route="{route}",le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{route="{route}",le="+Inf"}} {histogram.count}')
+            lines.append(f'http_request_duration_seconds_sum{{route="{route}"}} {histogram.sum:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{route="{route}"}} {histogram.count}')
+
+        lines += [
+            "# HELP request_phase_seconds_total Tempo acumulado por fase das requisições (db fora das demais fases)",
+            "# TYPE request_phase_seconds_total counter",
+        ]
+        for name, seconds in sorted(self.phase_seconds.items()):
+            lines.append(f'request_phase_seconds_total{{phase="{name}"}} {seconds:.6f}')
+
+        lines += [
+            "# TYPE db_queries_total counter",
+            f"db_queries_total {self.db_calls}",
+            "# TYPE db_rows_fetched_total counter",
+            f"db_rows_fetched_total {self.db_rows}",
+            "# TYPE db_errors_total counter",
+            f"db_errors_total {self.db_errors}",
+            "# TYPE auth_remote_calls_total counter",
+            f"auth_remote_calls_total {self.auth_remote_calls}",
+            "# TYPE auth_remote_seconds_total counter",
+            f"auth_remote_seconds_total {self.auth_remote_seconds:.6f}",
+            "# HELP query_budget_exceeded_total Requisições acima do limite de consultas",
+            "# TYPE query_budget_exceeded_total counter",
+        ]
+        for route, count in sorted(self.query_budget_exceeded.items()):
+            lines.append(f'query_budget_exceeded_total{{route="{route}"}} {count}')
+
+        for collector in self.collectors:
+            for name, value in collector().items():
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+def record_db_call(seconds: float, rows: int, failed: bool = False) -> None:
+    registry.db_calls += 1
+    registry.db_rows += rows
+    if failed:
+        registry.db_errors += 1
+    request = _current.get()
+    if request is not None:
+        request.db_calls += 1
+        request.rows_fetched += rows
+        request.phases["db"] += seconds
+    open_phase = _open_phase.get()
+    if open_phase is not None:
+        open_phase[0] += seconds
+
+def record_auth_call(seconds: float) -> None:
+    registry.auth_remote_calls += 1
+    registry.auth_remote_seconds += seconds
+
+class _TimedAuth:
+    """Repassa as chamadas ao cliente de auth registrando quantidade e duração"""
+    def __init__(self, auth):
+        self._auth = auth
+
+    def __getattr__(self, name):
+        value = getattr(self._auth, name)
+        if not callable(value):
+            return value
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return value(*args, **kwargs)
+            finally:
+                record_auth_call(time.perf_counter() - started)
+        return timed
+
+class InstrumentedClient:
+    """Envolve o cliente supabase compartilhado para medir as chamadas de auth"""
+    def __init__(self, client):
+        self._client = client
+        self.auth = _TimedAuth(client.auth)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+def _route_label(scope) -> str:
+    """Caminho com os parâmetros no lugar dos valores (ex.: /api/year/{year}), para não explodir a cardinalidade"""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    return getattr(route, "path", "unmatched")
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede cada requisição, opcionalmente adiciona o
+    cabeçalho Server-Timing e avisa quando o número de consultas passa do limite
+    """
+    def __init__(self, app, server_timing: bool = False, query_budget: int = 0):
+        self.app = app
+        self.server_timing = server_timing
+        self.query_budget = query_budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestMetrics()
+        token = _current.set(request)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", request.server_timing().encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = _route_label(scope)
+            registry.observe_request(scope["method"], route, status, request)
+
+            if self.query_budget and request.db_calls > self.query_budget:
+                registry.query_budget_exceeded[route] += 1
+                logger.warning(
+                    "Possível N+1: %s %s fez %d consultas (limite %d, %d linhas)",
+                    scope["method"], scope["path"], request.db_calls, self.query_budget, request.rows_fetched
+                )
@@ -0,0 +1,52 @@
+import base64
+import json
+from datetime import date
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+from .database import AsyncQuery
+
+class CursorError(ValueError):
+    """Cursor de paginação malformado ou adulterado"""
+
+def encode_cursor(values: Iterable[Any]) -> str:
+    """Valores da chave da última linha da página em base64 url-safe, sem padding"""
+    data = json.dumps([value.isoformat() if isinstance(value, date) else value for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, types: Sequence[Callable[[Any], Any]]) -> Tuple[Any, ...]:
+    """
+    Decodifica o cursor convertendo cada valor com o tipo da coluna
+    correspondente. Os valores vão para o filtro da consulta: qualquer
+    coisa fora do formato esperado é recusada.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise CursorError("Cursor inválido")
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (ValueError, TypeError):
+        raise CursorError("Cursor inválido")
+
+def like_pattern(text: str) -> str:
+    """Padrão ILIKE que procura `text` literalmente em qualquer posição"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+async def keyset_page(query: AsyncQuery, keys: Tuple[str, ...], types: Sequence[Callable[[Any], Any]],
+                      limit: int, cursor: Optional[str] = None, desc: bool = False) -> Tuple[List[dict], Optional[str]]:
+    """
+    Uma página de até `limit` linhas ordenadas por `keys`, a partir do cursor
+    da página anterior. Busca uma linha a mais para saber se há próxima
+    página; o custo é o mesmo em qualquer ponto do histórico.
+    Retorna as linhas e o cursor da próxima página (None na última).
+    """
+    if cursor:
+        values = decode_cursor(cursor, types)
+        query = query.before(keys, values) if desc else query.after(keys, values)
+    for key in keys:
+        query = query.order(key, desc=desc)
+    result = await query.limit(limit + 1).execute()
+
+    rows = result.data[:limit]
+    if len(result.data) <= limit:
+        return rows, None
+    return rows, encode_cursor(rows[-1][key] for key in keys)
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+from typing import Optional
+from .config import get_settings
+from .database import get_db
+
+logger = logging.getLogger(__name__)
+
+async def drain_recompute_queue(batch_size: Optional[int] = None) -> int:
+    """
+    Esvazia a fila de recálculo de monthly_hours (tabela recompute_queue,
+    alimentada pelos triggers dos lançamentos). O banco pega cada lote com
+    `for update skip locked`, então vários processos podem drenar ao mesmo
+    tempo. Retorna quantos meses foram recalculados.
+    """
+    settings = get_settings()
+    batch_size = batch_size or settings.RECOMPUTE_BATCH_SIZE
+    total = 0
+    while True:
+        result = await get_db().rpc('drain_recompute_queue', {
+            'p_limit': batch_size,
+            'p_debounce_seconds': settings.RECOMPUTE_DEBOUNCE_SECONDS,
+            'p_break_threshold': int(settings.BREAK_THRESHOLD_HOURS * 3600),
+            'p_break_deduction': int(settings.BREAK_DEDUCTION_HOURS * 3600),
+        }).execute()
+        recomputed = result.data[0]['recomputed'] if result.data else 0
+        total += recomputed
+        # Lote incompleto: o resto da fila ainda está no debounce (ou com outro processo)
+        if recomputed < batch_size:
+            return total
+
+async def run_recompute_worker(interval_seconds: float) -> None:
+    """Drena a fila a cada `interval_seconds`, para instalações sem pg_cron"""
+    while True:
+        try:
+            recomputed = await drain_recompute_queue()
+            if recomputed:
+                logger.info("%s meses recalculados", recomputed)
+        except Exception:
+            logger.exception("Falha ao drenar a fila de recálculo")
+        await asyncio.sleep(interval_seconds)
+
+async def recompute_queue_stats() -> dict:
+    """Profundidade da fila e idade, em segundos, da entrada mais antiga"""
+    result = await get_db().rpc('recompute_queue_stats', {}).execute()
+    row = result.data[0] if result.data else {}
+    return {"queue_depth": row.get('depth', 0), "queue_lag_seconds": row.get('lag_seconds', 0.0)}
@@ -0,0 +1,104 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from .calculations import get_month_bounds, summarize_months
+from .config import get_settings
+from .database import get_db
+from .snapshots import SUMMARY_FIELDS
+
+MonthKey = Tuple[int, int]
+# Lançamentos de um usuário: (user_id, turnos, não contábeis)
+UserRows = Tuple[str, List[dict], List[dict]]
+
+REPORT_COLUMNS = ('user_id', 'year', 'month') + SUMMARY_FIELDS
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def get_report_pool() -> ProcessPoolExecutor:
+    """Pool de processos dos relatórios, criado no primeiro uso"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=get_settings().REPORT_WORKERS)
+    return _pool
+
+def shutdown_report_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+def summarize_shard(shard: List[UserRows], start: MonthKey, end: MonthKey) -> List[dict]:
+    """Sumários mensais de um grupo de usuários (executado nos processos do pool)"""
+    rows = []
+    for user_id, time_entries, non_accounting in shard:
+        for (year, month), summary in summarize_months(time_entries, non_accounting, start, end).items():
+            rows.append({'user_id': user_id, 'year': year, 'month': month, **summary.model_dump()})
+    return rows
+
+async def _collect(pages) -> List[dict]:
+    rows = []
+    async for page in pages:
+        rows.extend(page)
+    return rows
+
+async def fetch_team_rows(user_ids: List[str], start: MonthKey, end: MonthKey) -> List[UserRows]:
+    """Lançamentos de vários usuários no período com uma consulta (paginada) por tabela"""
+    start_date = date(start[0], start[1], 1)
+    _, end_date = get_month_bounds(*end)
+    
+    time_entries, non_accounting = await asyncio.gather(
+        _collect(get_db().table('time_entries')\
+            .select('id,user_id,date,start_time,end_time,night_seconds,overtime_seconds')\
+            .in_('user_id', user_ids)\
+            .gte('date', start_date.isoformat())\
+            .lt('date', end_date.isoformat())\
+            .iter_pages()),
+        _collect(get_db().table('non_accounting_entries')\
+            .select('id,user_id,entry_date,days')\
+            .in_('user_id', user_ids)\
+            .gte('entry_date', start_date.isoformat())\
+            .lt('entry_date', end_date.isoformat())\
+            .iter_pages())
+    )
+    
+    by_user: Dict[str, UserRows] = {user_id: (user_id, [], []) for user_id in user_ids}
+    for row in time_entries:
+        by_user[row['user_id']][1].append(row)
+    for row in non_accounting:
+        by_user[row['user_id']][2].append(row)
+    return list(by_user.values())
+
+async def _summarize(users: List[UserRows], start: MonthKey, end: MonthKey, workers: int) -> List[dict]:
+    if workers <= 1:
+        return summarize_shard(users, start, end)
+    
+    # Grupos contíguos mantêm a ordem dos usuários no resultado
+    size = -(-len(users) // workers)
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(get_report_pool(), summarize_shard, users[index:index + size], start, end)
+        for index in range(0, len(users), size)
+    ))
+    return [row for shard in results for row in shard]
+
+async def iter_team_report(user_ids: List[str], start: MonthKey, end: MonthKey) -> AsyncIterator[List[dict]]:
+    """
+    Relatório de equipe: uma linha por usuário e mês, gerada em blocos de
+    usuários. A busca do próximo bloco acontece enquanto o pool calcula o atual.
+    """
+    settings = get_settings()
+    chunk_size = settings.REPORT_USER_CHUNK_SIZE
+    chunks = [user_ids[index:index + chunk_size] for index in range(0, len(user_ids), chunk_size)]
+    if not chunks:
+        return
+    
+    pending = asyncio.ensure_future(fetch_team_rows(chunks[0], start, end))
+    try:
+        for position in range(len(chunks)):
+            users = await pending
+            if position + 1 < len(chunks):
+                pending = asyncio.ensure_future(fetch_team_rows(chunks[position + 1], start, end))
+            yield await _summarize(users, start, end, settings.REPORT_WORKERS)
+    finally:
+        pending.cancel()
@@ -0,0 +1,117 @@
+import asyncio
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+from ..schemas.entries import (
+    NonAccountingEntry, NonAccountingType, SimulationConflict, SimulationMonth, SimulationResult, TimeEntry
+)
+from .calculations import get_month_bounds, summarize_months
+from .database import get_db
+from .hour_engine import premium_columns, time_seconds
+from .interval_index import IntervalSet, UserIntervals, absence_interval, shift_interval
+from .metrics import phase
+from .vacations import vacation_ledger
+from .validations import ValidationError, check_non_accounting_rules, check_time_entry_rules
+
+def _month_range(time_entries: List[TimeEntry], non_accounting: List[NonAccountingEntry]) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    # Os dias não contábeis contam no mês da data de início, como nos sumários
+    dates = [entry.date for entry in time_entries] + [entry.entry_date for entry in non_accounting]
+    first, last = min(dates), max(dates)
+    return (first.year, first.month), (last.year, last.month)
+
+async def simulate(user_id: str, time_entries: List[TimeEntry], non_accounting: List[NonAccountingEntry],
+                   hire_date: Optional[date] = None) -> SimulationResult:
+    """
+    Projeta os saldos mensais com lançamentos hipotéticos, sem gravar nada.
+    Os lançamentos reais do período são buscados uma vez e os hipotéticos
+    passam pelas mesmas regras das rotas de escrita, em memória: os que
+    seriam recusados voltam como conflitos e ficam fora da projeção.
+    Turnos futuros são aceitos, já que a simulação serve para planejar.
+    """
+    start, end = _month_range(time_entries, non_accounting)
+    start_date = date(start[0], start[1], 1)
+    _, end_date = get_month_bounds(*end)
+    last_day = max(
+        [entry.date for entry in time_entries]
+        + [entry.entry_date + timedelta(days=entry.days - 1) for entry in non_accounting]
+    )
+
+    # Uma consulta por tabela serve aos sumários e aos conflitos: os turnos
+    # vão de um dia antes a um dia depois (turnos que atravessam a
+    # meia-noite) e as ausências incluem as iniciadas antes do período, que
+    # ainda podem cobri-lo. Linhas fora dos meses simulados não entram nos
+    # sumários.
+    real_absences, real_shifts = await asyncio.gather(
+        get_db().table('non_accounting_entries')\
+            .select('id,entry_date,days')\
+            .eq('user_id', user_id)\
+            .lt('entry_date', max(end_date, last_day + timedelta(days=1)).isoformat())\
+            .execute_all(),
+        get_db().table('time_entries')\
+            .select('id,date,start_time,end_time,night_seconds,overtime_seconds')\
+            .eq('user_id', user_id)\
+            .gte('date', (start_date - timedelta(days=1)).isoformat())\
+            .lt('date', max(end_date, last_day + timedelta(days=2)).isoformat())\
+            .execute_all()
+    )
+    intervals = UserIntervals.from_rows(real_shifts.data, real_absences.data)
+
+    conflicts: List[SimulationConflict] = []
+    # Lançamentos hipotéticos aceitos, com ids negativos como no lote
+    planned_absences, planned_shifts = IntervalSet(), IntervalSet()
+    planned_vacations: List[Tuple[date, int]] = []
+    absence_rows, shift_rows = [], []
+
+    for index, entry in enumerate(non_accounting):
+        start_day, end_day = absence_interval(entry.entry_date, entry.days)
+        try:
+            check_non_accounting_rules(entry)
+            if entry.type == NonAccountingType.ferias:
+                _, _, available = await vacation_ledger.balance(user_id, hire_date, entry.entry_date, extra=planned_vacations)
+                if entry.days > available:
+                    raise ValidationError(f"Saldo de férias insuficiente. Disponível: {available} dias")
+            if intervals.absence_conflicts(entry.entry_date, entry.days) or planned_absences.overlapping(start_day, end_day):
+                raise ValidationError("Existe sobreposição com outro período não contábil")
+        except ValidationError as e:
+            conflicts.append(SimulationConflict(kind='non_accounting', index=index, error=e.detail))
+            continue
+        planned_absences.add(start_day, end_day, -(index + 1))
+        if entry.type == NonAccountingType.ferias:
+            planned_vacations.append((entry.entry_date, entry.days))
+        absence_rows.append({'entry_date': entry.entry_date.isoformat(), 'days': entry.days})
+
+    today = date.today()
+    for index, entry in enumerate(time_entries):
+        start_seconds, end_seconds = time_seconds(entry.start_time), time_seconds(entry.end_time)
+        shift_start, shift_end = shift_interval(entry.date, start_seconds, end_seconds)
+        try:
+            check_time_entry_rules(entry, today, allow_future=True)
+            if intervals.shift_conflicts(entry.date, entry.start_time, entry.end_time):
+                raise ValidationError("Existe sobreposição com outro lançamento no mesmo dia")
+            if planned_shifts.overlapping(shift_start, shift_end):
+                raise ValidationError("Existe sobreposição com outro lançamento da simulação")
+            if intervals.absence_conflicts(entry.date, 1) or planned_absences.overlapping(*absence_interval(entry.date, 1)):
+                raise ValidationError("Existe conflito com um período não contábil")
+        except ValidationError as e:
+            conflicts.append(SimulationConflict(kind='time', index=index, error=e.detail))
+            continue
+        planned_shifts.add(shift_start, shift_end, -(index + 1))
+        shift_rows.append({
+            'date': entry.date.isoformat(),
+            'start_time': entry.start_time.isoformat(),
+            'end_time': entry.end_time.isoformat(),
+            **premium_columns(start_seconds, end_seconds)
+        })
+
+    with phase("compute"):
+        current = summarize_months(real_shifts.data, real_absences.data, start, end)
+        projected = summarize_months(real_shifts.data + shift_rows, real_absences.data + absence_rows, start, end)
+
+    return SimulationResult(
+        months=[
+            SimulationMonth(year=year, month=month, current=current[(year, month)], projected=projected[(year, month)])
+            for year, month in sorted(current)
+        ],
+        current_balance_hours=sum(summary.balance_hours for summary in current.values()),
+        projected_balance_hours=sum(summary.balance_hours for summary in projected.values()),
+        conflicts=conflicts
+    )
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Dict, Hashable, Iterable, List, Tuple
+
+class SingleFlight:
+    """
+    Compartilha cálculos idênticos em andamento: o primeiro chamador de uma
+    chave faz o trabalho e os concorrentes aguardam o mesmo resultado
+    """
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.requested = 0
+        self.computed = 0
+        self.shared = 0
+
+    def claim(self, keys: Iterable[Hashable]) -> Tuple[List[Hashable], Dict[Hashable, asyncio.Future]]:
+        """
+        Separa as chaves entre as que o chamador deve calcular (e que passam
+        a ficar em andamento) e as que já estão sendo calculadas por outro
+        """
+        owned: List[Hashable] = []
+        waiting: Dict[Hashable, asyncio.Future] = {}
+        loop = asyncio.get_running_loop()
+        for key in keys:
+            self.requested += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.shared += 1
+                waiting[key] = future
+            else:
+                self.computed += 1
+                self._inflight[key] = loop.create_future()
+                owned.append(key)
+        return owned, waiting
+
+    def resolve(self, key: Hashable, value: Any) -> None:
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(value)
+
+    def fail(self, key: Hashable, error: BaseException) -> None:
+        future = self._inflight.pop(key, None)
+        if future is None or future.done():
+            return
+        if isinstance(error, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(error)
+            # Marca a exceção como lida: quem estiver aguardando ainda a recebe
+            future.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "requested": self.requested,
+            "computed": self.computed,
+            "shared": self.shared
+        }
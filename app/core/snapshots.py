@@ -0,0 +1,194 @@
+import asyncio
+import logging
+from datetime import date
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from ..schemas.entries import MonthlySummary
+from .calculations import calculate_range_summaries, iter_months, sum_summaries
+from .data_version import data_versions
+from .database import get_db
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Incrementar quando as regras do sumário mudarem: snapshots antigos passam a ser ignorados
+SNAPSHOT_RULES_VERSION = 4
+
+SUMMARY_FIELDS = tuple(MonthlySummary.model_fields)
+
+MonthKey = Tuple[int, int]
+
+# Cálculos de sumário em andamento, por (usuário, versão dos dados, ano, mês)
+summary_flight = SingleFlight()
+
+def is_closed_month(year: int, month: int, today: Optional[date] = None) -> bool:
+    """Meses anteriores ao mês corrente são considerados fechados"""
+    today = today or date.today()
+    return (year, month) < (today.year, today.month)
+
+async def load_snapshots(user_id: str, start: MonthKey, end: MonthKey) -> Dict[MonthKey, MonthlySummary]:
+    """Busca os snapshots válidos do usuário entre dois meses com uma única consulta"""
+    result = await get_db().table('monthly_summary_snapshots')\
+        .select(','.join(('year', 'month') + SUMMARY_FIELDS))\
+        .eq('user_id', user_id)\
+        .eq('rules_version', SNAPSHOT_RULES_VERSION)\
+        .gte('year', start[0])\
+        .lte('year', end[0])\
+        .execute()
+
+    return {
+        (row['year'], row['month']): MonthlySummary(**{field: row[field] for field in SUMMARY_FIELDS})
+        for row in result.data
+        if start <= (row['year'], row['month']) <= end
+    }
+
+async def save_snapshots(user_id: str, summaries: Dict[MonthKey, MonthlySummary], version: int) -> bool:
+    """
+    Grava (ou substitui) os snapshots dos meses informados em uma única
+    escrita, só se a versão dos dados do usuário ainda for `version` (lida
+    antes do cálculo). A comparação é feita no banco, na mesma transação:
+    um cálculo anterior a uma escrita de qualquer processo é descartado.
+    Retorna False quando a versão mudou.
+    """
+    if not summaries:
+        return True
+    rows = [
+        {
+            'user_id': user_id,
+            'year': year,
+            'month': month,
+            'rules_version': SNAPSHOT_RULES_VERSION,
+            **summary.model_dump()
+        }
+        for (year, month), summary in summaries.items()
+    ]
+    result = await get_db().rpc('save_summary_snapshots', {
+        'p_user_id': user_id,
+        'p_version': version,
+        'p_rows': rows,
+    }).execute()
+    return bool(result.data and result.data[0]['saved'])
+
+async def _bump_version(user_id: str) -> None:
+    try:
+        await data_versions.bump(user_id)
+    except Exception:
+        # A escrita já foi feita: no Postgres o trigger dos lançamentos já trocou a versão
+        logger.exception("Falha ao trocar a versão dos dados do usuário %s", user_id)
+
+async def invalidate_months(user_id: str, months: Iterable[MonthKey]) -> None:
+    """Remove os snapshots dos meses afetados por uma escrita e troca a versão dos dados do usuário"""
+    await _bump_version(user_id)
+    by_year: Dict[int, set] = defaultdict(set)
+    for year, month in months:
+        # Meses abertos nunca têm snapshot
+        if is_closed_month(year, month):
+            by_year[year].add(month)
+
+    for year, year_months in by_year.items():
+        try:
+            await get_db().table('monthly_summary_snapshots')\
+                .delete()\
+                .eq('user_id', user_id)\
+                .eq('year', year)\
+                .in_('month', sorted(year_months))\
+                .execute()
+        except Exception:
+            # A escrita já foi feita; o snapshot pode ser corrigido com `python -m app.cli rebuild-snapshots`
+            logger.exception("Falha ao invalidar snapshots de %s/%s do usuário %s", sorted(year_months), year, user_id)
+
+async def clear_snapshots(user_id: str) -> None:
+    """Remove todos os snapshots do usuário (ex.: após recalcular lançamentos antigos)"""
+    await _bump_version(user_id)
+    await get_db().table('monthly_summary_snapshots')\
+        .delete()\
+        .eq('user_id', user_id)\
+        .execute()
+
+async def _compute_month_summaries(user_id: str, months: List[MonthKey], version: int) -> Dict[MonthKey, MonthlySummary]:
+    """
+    Sumários dos meses informados. Meses fechados vêm dos snapshots;
+    os que faltam são calculados com uma consulta por tabela e gravados.
+    """
+    closed = [key for key in months if is_closed_month(*key)]
+
+    stored = await load_snapshots(user_id, closed[0], closed[-1]) if closed else {}
+    missing = [key for key in months if key not in stored]
+
+    computed = await calculate_range_summaries(missing[0], missing[-1], user_id) if missing else {}
+
+    to_store = {key: computed[key] for key in missing if is_closed_month(*key)}
+    if to_store:
+        try:
+            await save_snapshots(user_id, to_store, version)
+        except Exception:
+            # Falha ao gravar não impede a resposta: o mês é recalculado na próxima leitura
+            logger.exception("Falha ao gravar snapshots mensais do usuário %s", user_id)
+
+    return {key: stored[key] if key in stored else computed[key] for key in months}
+
+async def get_month_summaries(user_id: str, start: MonthKey, end: MonthKey) -> Dict[MonthKey, MonthlySummary]:
+    """
+    Sumários dos meses entre start e end. Requisições concorrentes do mesmo
+    usuário compartilham os meses que já estão sendo calculados.
+    """
+    # Lida antes dos lançamentos: faz parte da chave (leituras após uma escrita
+    # não aproveitam cálculos iniciados antes dela) e condiciona a gravação
+    version = await data_versions.get(user_id)
+    months = list(iter_months(start, end))
+
+    flight_keys = {(user_id, version) + key: key for key in months}
+    owned, waiting = summary_flight.claim(flight_keys)
+
+    summaries: Dict[MonthKey, MonthlySummary] = {}
+    if owned:
+        try:
+            computed = await _compute_month_summaries(user_id, [flight_keys[key] for key in owned], version)
+        except BaseException as e:
+            for key in owned:
+                summary_flight.fail(key, e)
+            raise
+        for key in owned:
+            summary_flight.resolve(key, computed[flight_keys[key]])
+        summaries.update(computed)
+
+    retry: List[MonthKey] = []
+    for key, future in waiting.items():
+        try:
+            # shield: o cancelamento de quem espera não cancela o cálculo compartilhado
+            summaries[flight_keys[key]] = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # A requisição dona do cálculo foi cancelada: calcula o mês de novo
+            retry.append(flight_keys[key])
+    if retry:
+        recomputed = await get_month_summaries(user_id, min(retry), max(retry))
+        summaries.update({key: recomputed[key] for key in retry})
+
+    return {key: summaries[key] for key in months}
+
+async def get_month_summary(month: int, year: int, user_id: str) -> MonthlySummary:
+    summaries = await get_month_summaries(user_id, (year, month), (year, month))
+    return summaries[(year, month)]
+
+async def get_year_summary(year: int, user_id: str) -> Dict[str, MonthlySummary]:
+    summaries = await get_month_summaries(user_id, (year, 1), (year, 12))
+    return {str(month): summary for (_, month), summary in summaries.items()}
+
+async def get_year_totals(year: int, user_id: str) -> MonthlySummary:
+    summaries = await get_month_summaries(user_id, (year, 1), (year, 12))
+    return sum_summaries(summaries.values())
+
+async def rebuild_snapshots(user_id: str, start: MonthKey, end: MonthKey) -> int:
+    """
+    Recalcula e regrava os snapshots dos meses fechados entre start e end.
+    Se o usuário escrever durante o cálculo, nada é gravado (retorna 0): os
+    meses são recalculados na próxima leitura.
+    """
+    version = await data_versions.get(user_id, fresh=True)
+    computed = await calculate_range_summaries(start, end, user_id)
+    closed = {key: summary for key, summary in computed.items() if is_closed_month(*key)}
+    if not await save_snapshots(user_id, closed, version):
+        return 0
+    return len(closed)
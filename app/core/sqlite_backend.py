@@ -0,0 +1,453 @@
+import calendar
+import json
+import sqlite3
+import threading
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from .database import AsyncQuery, DatabaseError, QueryResult
+
+# Mesmas tabelas de schema.sql (com as colunas usadas pela API), em tipos do
+# SQLite: datas e horários em texto ISO, intervals em 'HH:MM:SS'.
+# `users` substitui o Supabase Auth quando não há banco hospedado.
+SCHEMA = """
+create table if not exists time_entries (
+    id integer primary key autoincrement,
+    user_id text not null,
+    date text not null,
+    month integer not null check (month >= 1 and month <= 12),
+    year integer not null check (year >= 2000),
+    start_time text not null,
+    end_time text not null,
+    night_time text not null default '00:00:00',
+    night_seconds integer not null default 0,
+    overtime_seconds integer not null default 0,
+    comment text,
+    created_at text not null default (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    updated_at text not null default (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+create table if not exists non_accounting_entries (
+    id integer primary key autoincrement,
+    user_id text not null,
+    entry_date text not null,
+    month integer not null check (month >= 1 and month <= 12),
+    year integer not null check (year >= 2000),
+    type text not null,
+    days integer not null default 1 check (days >= 1),
+    comment text,
+    created_at text not null default (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    updated_at text not null default (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+create table if not exists monthly_summary_snapshots (
+    user_id text not null,
+    year integer not null,
+    month integer not null check (month >= 1 and month <= 12),
+    total_days integer not null,
+    non_accounting_days integer not null,
+    working_days integer not null,
+    expected_hours real not null,
+    worked_hours real not null,
+    balance_hours real not null,
+    night_hours real not null default 0,
+    overtime_hours real not null default 0,
+    premium_hours real not null default 0,
+    premium_balance_hours real not null default 0,
+    rules_version integer not null,
+    computed_at text not null default (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    primary key (user_id, year, month)
+);
+
+create table if not exists monthly_hours (
+    user_id text not null,
+    year integer not null,
+    month integer not null check (month >= 1 and month <= 12),
+    total_worked_minutes integer not null default 0,
+    primary key (user_id, year, month)
+);
+
+-- Meses com monthly_hours a recalcular (instantes em segundos Unix)
+create table if not exists recompute_queue (
+    user_id text not null,
+    year integer not null,
+    month integer not null,
+    first_enqueued_at real not null default ((julianday('now') - 2440587.5) * 86400),
+    last_enqueued_at real not null default ((julianday('now') - 2440587.5) * 86400),
+    primary key (user_id, year, month)
+);
+
+create table if not exists user_data_versions (
+    user_id text primary key,
+    version integer not null default 0,
+    updated_at text not null default (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+create table if not exists revoked_tokens (
+    token_digest text primary key,
+    expires_at text not null
+);
+
+create table if not exists users (
+    id text primary key,
+    email text not null unique collate nocase,
+    password_hash text not null,
+    app_metadata text not null default '{}',
+    created_at text not null default (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+create index if not exists time_entries_user_date_id_idx on time_entries(user_id, date, id);
+create index if not exists time_entries_user_month_year_idx on time_entries(user_id, month, year);
+create index if not exists non_accounting_entries_user_entry_date_id_idx on non_accounting_entries(user_id, entry_date, id);
+create index if not exists non_accounting_entries_user_month_year_idx on non_accounting_entries(user_id, month, year);
+
+create trigger if not exists update_time_entries_updated_at
+    after update on time_entries for each row when new.updated_at = old.updated_at
+    begin
+        update time_entries set updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') where id = new.id;
+    end;
+
+create trigger if not exists enqueue_recompute_after_insert
+    after insert on time_entries for each row
+    begin
+        insert into recompute_queue (user_id, year, month) values (new.user_id, new.year, new.month)
+        on conflict (user_id, year, month) do update set last_enqueued_at = excluded.last_enqueued_at;
+    end;
+
+create trigger if not exists enqueue_recompute_after_update
+    after update of user_id, date, month, year, start_time, end_time on time_entries for each row
+    begin
+        insert into recompute_queue (user_id, year, month) values (old.user_id, old.year, old.month)
+        on conflict (user_id, year, month) do update set last_enqueued_at = excluded.last_enqueued_at;
+        insert into recompute_queue (user_id, year, month) values (new.user_id, new.year, new.month)
+        on conflict (user_id, year, month) do update set last_enqueued_at = excluded.last_enqueued_at;
+    end;
+
+create trigger if not exists enqueue_recompute_after_delete
+    after delete on time_entries for each row
+    begin
+        insert into recompute_queue (user_id, year, month) values (old.user_id, old.year, old.month)
+        on conflict (user_id, year, month) do update set last_enqueued_at = excluded.last_enqueued_at;
+    end;
+
+create trigger if not exists update_non_accounting_entries_updated_at
+    after update on non_accounting_entries for each row when new.updated_at = old.updated_at
+    begin
+        update non_accounting_entries set updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') where id = new.id;
+    end;
+"""
+
+COMPARISONS = {'eq': '=', 'neq': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+
+def _param(value: Any) -> Any:
+    """Converte um valor Python para o tipo gravado no SQLite"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+def _seconds(column: str) -> str:
+    """Expressão SQL com os segundos de uma coluna 'HH:MM:SS'"""
+    return (
+        f"(cast(substr({column}, 1, 2) as integer) * 3600"
+        f" + cast(substr({column}, 4, 2) as integer) * 60"
+        f" + cast(substr({column}, 7, 2) as integer))"
+    )
+
+class SQLiteDatabase:
+    """
+    Banco embutido com a mesma interface de AsyncDatabase, para instalações
+    de um único nó sem banco hospedado. Cada thread usa sua própria conexão
+    em modo WAL (leituras não bloqueiam a escrita); as consultas são sempre
+    parametrizadas e reaproveitam as instruções preparadas da conexão.
+    """
+    def __init__(self, path: str):
+        if path == ':memory:':
+            # Conexões de threads diferentes precisam enxergar o mesmo banco
+            self.path, self.uri = 'file:banco_de_horas?mode=memory&cache=shared', True
+        else:
+            self.path, self.uri = path, path.startswith('file:')
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._columns: Dict[str, Tuple[str, ...]] = {}
+        # Mantém vivo o banco em memória e cria o schema
+        self._keepalive = self.connection()
+
+    def connection(self) -> sqlite3.Connection:
+        """Conexão da thread atual, criada no primeiro uso"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, uri=self.uri, check_same_thread=False, cached_statements=256
+            )
+            connection.row_factory = sqlite3.Row
+            connection.execute('pragma busy_timeout = 5000')
+            with self._lock:
+                if not self._columns:
+                    connection.execute('pragma journal_mode = wal')
+                    connection.executescript(SCHEMA)
+                    for (table,) in connection.execute("select name from sqlite_master where type = 'table'"):
+                        self._columns[table] = tuple(row['name'] for row in connection.execute(f'pragma table_info({table})'))
+                self._connections.append(connection)
+            connection.execute('pragma synchronous = normal')
+            self._local.connection = connection
+        return connection
+
+    def table(self, name: str) -> AsyncQuery:
+        return AsyncQuery(self, name)
+
+    def rpc(self, function: str, params: dict) -> AsyncQuery:
+        query = AsyncQuery(self, f'rpc/{function}')
+        query.method = 'POST'
+        query.payload = params
+        return query
+
+    async def execute(self, query: AsyncQuery) -> QueryResult:
+        # Consultas locais levam microssegundos, mas escritas podem esperar o lock do arquivo
+        return await run_in_threadpool(self.execute_sync, query)
+
+    def execute_sync(self, query: AsyncQuery) -> QueryResult:
+        try:
+            if query.table.startswith('rpc/'):
+                function = FUNCTIONS.get(query.table[len('rpc/'):])
+                if function is None:
+                    raise DatabaseError(f"Função não encontrada: {query.table}")
+                return QueryResult(function(self.connection(), query.payload))
+            return QueryResult(self._run(query))
+        except sqlite3.Error as e:
+            raise DatabaseError(str(e)) from e
+
+    def _column(self, table: str, name: str) -> str:
+        # Nomes de tabelas e colunas não podem ser parâmetros: só passam os do schema
+        if name not in self._columns.get(table, ()):
+            raise DatabaseError(f"Coluna desconhecida: {table}.{name}")
+        return f'"{name}"'
+
+    def _select_list(self, query: AsyncQuery) -> str:
+        if query.columns == '*':
+            return '*'
+        return ', '.join(self._column(query.table, name.strip()) for name in query.columns.split(','))
+
+    def _where(self, query: AsyncQuery) -> Tuple[str, List[Any]]:
+        conditions, params = [], []
+        for column, operator, value in query.filters:
+            if operator in ('after', 'before'):
+                columns = ', '.join(self._column(query.table, name) for name in column)
+                placeholders = ', '.join('?' for _ in value)
+                conditions.append(f"({columns}) {'>' if operator == 'after' else '<'} ({placeholders})")
+                params.extend(_param(item) for item in value)
+            elif operator == 'in':
+                conditions.append(f"{self._column(query.table, column)} in ({', '.join('?' for _ in value) or 'null'})")
+                params.extend(_param(item) for item in value)
+            elif operator == 'ilike':
+                # '*' é o curinga do PostgREST; o LIKE do SQLite já ignora maiúsculas (ASCII)
+                conditions.append(f"{self._column(query.table, column)} like ? escape '\\'")
+                params.append(str(value).replace('*', '%'))
+            elif operator == 'is':
+                conditions.append(f"{self._column(query.table, column)} is ?")
+                params.append(_param(value))
+            elif operator in COMPARISONS:
+                conditions.append(f"{self._column(query.table, column)} {COMPARISONS[operator]} ?")
+                params.append(_param(value))
+            else:
+                raise DatabaseError(f"Operador não suportado: {operator}")
+        return (' where ' + ' and '.join(conditions) if conditions else ''), params
+
+    def _run(self, query: AsyncQuery) -> List[dict]:
+        table = query.table
+        if table not in self._columns:
+            raise DatabaseError(f"Tabela desconhecida: {table}")
+        connection = self.connection()
+        where, params = self._where(query)
+        returning = f' returning {self._select_list(query)}'
+
+        if query.method == 'GET':
+            sql = f'select {self._select_list(query)} from "{table}"{where}'
+            if query.orders:
+                sql += ' order by ' + ', '.join(
+                    f"{self._column(table, column)} {'desc' if desc else 'asc'}" for column, desc in query.orders
+                )
+            if query.limit_value is not None or query.offset_value:
+                sql += ' limit ? offset ?'
+                params += [query.limit_value if query.limit_value is not None else -1, query.offset_value or 0]
+            return [dict(row) for row in connection.execute(sql, params)]
+
+        with connection:
+            if query.method == 'POST':
+                rows = query.payload if isinstance(query.payload, list) else [query.payload]
+                written = []
+                for row in rows:
+                    columns = [self._column(table, name) for name in row]
+                    sql = f'insert into "{table}" ({", ".join(columns)}) values ({", ".join("?" for _ in row)})'
+                    if query.on_conflict:
+                        keys = [name.strip() for name in query.on_conflict.split(',')]
+                        updates = [f'{self._column(table, name)} = excluded.{self._column(table, name)}' for name in row if name not in keys]
+                        sql += f' on conflict ({", ".join(self._column(table, name) for name in keys)})'
+                        sql += f' do update set {", ".join(updates)}' if updates else ' do nothing'
+                    written.extend(dict(item) for item in connection.execute(sql + returning, [_param(value) for value in row.values()]))
+                return written
+
+            if query.method == 'PATCH':
+                assignments = ', '.join(f'{self._column(table, name)} = ?' for name in query.payload)
+                sql = f'update "{table}" set {assignments}{where}{returning}'
+                values = [_param(value) for value in query.payload.values()]
+                return [dict(row) for row in connection.execute(sql, values + params)]
+
+            if query.method == 'DELETE':
+                return [dict(row) for row in connection.execute(f'delete from "{table}"{where}{returning}', params)]
+
+        raise DatabaseError(f"Método não suportado: {query.method}")
+
+    async def aclose(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+            self._columns.clear()
+        self._local = threading.local()
+
+def summarize_user_months(connection: sqlite3.Connection, params: dict) -> List[dict]:
+    """Equivalente da função summarize_user_months do Postgres (SUMMARY_BACKEND=rpc)"""
+    start, end = date.fromisoformat(params['p_start']), date.fromisoformat(params['p_end'])
+    holidays = {date.fromisoformat(day) for day in params['p_holidays']}
+    months: Dict[Tuple[int, int], dict] = {}
+    year, month = start.year, start.month
+    while date(year, month, 1) < end:
+        last_day = calendar.monthrange(year, month)[1]
+        working_days = sum(
+            1 for day in (date(year, month, index) for index in range(1, last_day + 1))
+            if day.weekday() < 5 and day not in holidays
+        )
+        months[(year, month)] = {
+            'year': year, 'month': month, 'worked_seconds': 0, 'night_seconds': 0,
+            'overtime_seconds': 0, 'non_accounting_days': 0, 'working_days': working_days
+        }
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    bounds = (params['p_user_id'], start.isoformat(), end.isoformat())
+    shifts = connection.execute(f"""
+        select cast(substr(date, 1, 4) as integer) as year, cast(substr(date, 6, 2) as integer) as month,
+               sum(case when seconds > :threshold then seconds - :deduction else seconds end) as worked,
+               sum(night) as night, sum(overtime) as overtime
+        from (
+            select date,
+                   ({_seconds('end_time')} - {_seconds('start_time')} + 86400) % 86400 as seconds,
+                   night_seconds as night,
+                   overtime_seconds as overtime
+            from time_entries
+            where user_id = :user_id and date >= :start and date < :end
+        )
+        group by 1, 2
+    """, {
+        'user_id': bounds[0], 'start': bounds[1], 'end': bounds[2],
+        'threshold': params['p_break_threshold'], 'deduction': params['p_break_deduction'],
+    })
+    for row in shifts:
+        months[(row['year'], row['month'])].update(
+            worked_seconds=row['worked'], night_seconds=row['night'], overtime_seconds=row['overtime']
+        )
+
+    absences = connection.execute("""
+        select cast(substr(entry_date, 1, 4) as integer) as year, cast(substr(entry_date, 6, 2) as integer) as month,
+               sum(days) as days
+        from non_accounting_entries
+        where user_id = ? and entry_date >= ? and entry_date < ?
+        group by 1, 2
+    """, bounds)
+    for row in absences:
+        months[(row['year'], row['month'])]['non_accounting_days'] = row['days']
+    return list(months.values())
+
+def bump_data_version(connection: sqlite3.Connection, params: dict) -> List[dict]:
+    """Mesmo incremento da função bump_data_version do Postgres"""
+    with connection:
+        row = connection.execute("""
+            insert into user_data_versions (user_id, version) values (?, 1)
+            on conflict (user_id) do update
+            set version = version + 1, updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+            returning version
+        """, (params['p_user_id'],)).fetchone()
+    return [{'version': row['version']}]
+
+SNAPSHOT_COLUMNS = (
+    'user_id', 'year', 'month', 'total_days', 'non_accounting_days', 'working_days', 'expected_hours',
+    'worked_hours', 'balance_hours', 'night_hours', 'overtime_hours', 'premium_hours',
+    'premium_balance_hours', 'rules_version'
+)
+
+def save_summary_snapshots(connection: sqlite3.Connection, params: dict) -> List[dict]:
+    """Mesma gravação condicional da função save_summary_snapshots do Postgres"""
+    with connection:
+        # A escrita abre a transação com o lock do arquivo antes da leitura da versão
+        connection.execute(
+            'insert into user_data_versions (user_id) values (?) on conflict (user_id) do nothing',
+            (params['p_user_id'],)
+        )
+        version = connection.execute(
+            'select version from user_data_versions where user_id = ?', (params['p_user_id'],)
+        ).fetchone()['version']
+        if version != params['p_version']:
+            return [{'saved': False}]
+        columns = ', '.join(SNAPSHOT_COLUMNS)
+        updates = ', '.join(f'{column} = excluded.{column}' for column in SNAPSHOT_COLUMNS[3:])
+        connection.executemany(f"""
+            insert into monthly_summary_snapshots ({columns}, computed_at)
+            values ({', '.join('?' for _ in SNAPSHOT_COLUMNS)}, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+            on conflict (user_id, year, month) do update set {updates}, computed_at = excluded.computed_at
+        """, [tuple(row[column] for column in SNAPSHOT_COLUMNS) for row in params['p_rows']])
+    return [{'saved': True}]
+
+def drain_recompute_queue(connection: sqlite3.Connection, params: dict) -> List[dict]:
+    """Mesmo recálculo da função drain_recompute_queue do Postgres (o lock do arquivo faz o papel do skip locked)"""
+    with connection:
+        # Tirar da fila já é uma escrita: o lote é pego com o lock do arquivo
+        claimed = connection.execute("""
+            delete from recompute_queue where rowid in (
+                select rowid from recompute_queue
+                where last_enqueued_at <= (julianday('now') - 2440587.5) * 86400 - ?
+                order by first_enqueued_at
+                limit ?
+            )
+            returning user_id, year, month
+        """, (params['p_debounce_seconds'], params['p_limit'])).fetchall()
+        for key in claimed:
+            seconds = connection.execute(f"""
+                select coalesce(sum(case when seconds > :threshold then seconds - :deduction else seconds end + night_bonus), 0)
+                from (
+                    select
+                        ({_seconds('end_time')} - {_seconds('start_time')} + 86400) % 86400 as seconds,
+                        {_seconds('night_time')} as night_bonus
+                    from time_entries
+                    where user_id = :user_id and month = :month and year = :year
+                )
+            """, {
+                'user_id': key['user_id'], 'year': key['year'], 'month': key['month'],
+                'threshold': params['p_break_threshold'], 'deduction': params['p_break_deduction'],
+            }).fetchone()[0]
+            connection.execute("""
+                insert into monthly_hours (user_id, year, month, total_worked_minutes) values (?, ?, ?, ?)
+                on conflict (user_id, year, month) do update set total_worked_minutes = excluded.total_worked_minutes
+            """, (key['user_id'], key['year'], key['month'], round(seconds / 60)))
+    return [{'recomputed': len(claimed)}]
+
+def recompute_queue_stats(connection: sqlite3.Connection, params: dict) -> List[dict]:
+    """Mesmo resultado da função recompute_queue_stats do Postgres"""
+    row = connection.execute("""
+        select count(*) as depth,
+               coalesce((julianday('now') - 2440587.5) * 86400 - min(first_enqueued_at), 0) as lag_seconds
+        from recompute_queue
+    """).fetchone()
+    return [dict(row)]
+
+# Funções chamadas por rpc(), no lugar das funções do Postgres
+FUNCTIONS = {
+    'summarize_user_months': summarize_user_months,
+    'bump_data_version': bump_data_version,
+    'save_summary_snapshots': save_summary_snapshots,
+    'drain_recompute_queue': drain_recompute_queue,
+    'recompute_queue_stats': recompute_queue_stats,
+}
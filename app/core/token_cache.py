@@ -0,0 +1,71 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+def token_digest(token: str) -> str:
+    # O token em si nunca fica em memória como chave nem é gravado no banco
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class TokenCache:
+    """
+    Cache LRU com TTL dos usuários já verificados, indexado pelo hash do token.
+    Cada entrada expira no máximo no `exp` do próprio token.
+    """
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return token_digest(token)
+
+    def get(self, token: str) -> Optional[Any]:
+        key = self._digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, user = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return user
+
+    def set(self, token: str, user: Any, token_exp: Optional[float] = None) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        
+        key = self._digest(token)
+        self._entries[key] = (expires_at, user)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, token: str) -> None:
+        """Remove o token do cache (ex.: no logout)"""
+        self._entries.pop(self._digest(token), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
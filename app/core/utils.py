@@ -1,65 +1,32 @@
-from datetime import datetime, date, time, timedelta
+from datetime import date, time, timedelta
 from typing import Tuple, List
-import holidays
-
-# Lista de feriados nacionais
-br_holidays = holidays.BR()
+from .business_days import business_calendar
+from .hour_engine import time_seconds, worked_seconds
 
 def calculate_work_hours(start_time: time, end_time: time) -> float:
     """
     Calcula horas trabalhadas, descontando intervalo automático
     quando período for maior que 6 horas
     """
-    # Converter para datetime para facilitar cálculos
-    start_dt = datetime.combine(date.today(), start_time)
-    end_dt = datetime.combine(date.today(), end_time)
-    
-    # Se o horário final for menor que o inicial, significa que passou da meia-noite
-    if end_time < start_time:
-        end_dt = datetime.combine(date.today() + timedelta(days=1), end_time)
-    
-    # Calcular duração total em horas
-    duration = (end_dt - start_dt).total_seconds() / 3600
-    
-    # Se período for maior que 6 horas, descontar 1 hora de intervalo
-    if duration > 6:
-        duration -= 1
-    
-    return duration
+    return worked_seconds(time_seconds(start_time), time_seconds(end_time)) / 3600
 
 def is_business_day(day: date) -> bool:
     """Verifica se é dia útil (não é feriado nem fim de semana)"""
-    return day.weekday() < 5 and day not in br_holidays
+    return business_calendar.is_business_day(day)
 
 def calculate_business_days(start_date: date, end_date: date) -> int:
     """
     Calcula quantidade de dias úteis entre duas datas,
     descontando feriados e finais de semana
     """
-    business_days = 0
-    current_date = start_date
-    
-    while current_date <= end_date:
-        if is_business_day(current_date):
-            business_days += 1
-        current_date += timedelta(days=1)
-    
-    return business_days
+    return business_calendar.count(start_date, end_date)
 
 def get_period_business_days(start_date: date, end_date: date) -> List[date]:
     """
     Retorna lista de dias úteis entre duas datas,
     excluindo feriados e finais de semana
     """
-    business_days = []
-    current_date = start_date
-    
-    while current_date <= end_date:
-        if is_business_day(current_date):
-            business_days.append(current_date)
-        current_date += timedelta(days=1)
-    
-    return business_days
+    return business_calendar.business_days(start_date, end_date)
 
 def time_periods_overlap(start1: time, end1: time, start2: time, end2: time) -> bool:
     """Verifica se dois períodos de tempo se sobrepõem"""
@@ -0,0 +1,177 @@
+import asyncio
+import calendar
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from .config import get_settings
+from .data_version import data_versions
+from .database import get_db
+
+def hire_date_of(user: Any) -> Optional[date]:
+    """
+    Data de admissão em app_metadata['hire_date'] (AAAA-MM-DD), se houver.
+    Só o servidor grava app_metadata; user_metadata o próprio usuário edita.
+    """
+    metadata = getattr(user, 'app_metadata', None) or {}
+    try:
+        return date.fromisoformat(metadata['hire_date'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _add_years(day: date, years: int) -> date:
+    # Admissão em 29/02 vira 28/02 nos anos não bissextos
+    year = day.year + years
+    return date(year, day.month, min(day.day, calendar.monthrange(year, day.month)[1]))
+
+class VacationPeriod:
+    """
+    Período aquisitivo [start, end). As férias adquiridas podem ser gozadas
+    de `available_from` até `expires_at` (período concessivo).
+    """
+    def __init__(self, start: date, end: date, available_from: date, expires_at: date, entitled_days: int):
+        self.start = start
+        self.end = end
+        self.available_from = available_from
+        self.expires_at = expires_at
+        self.entitled_days = entitled_days
+        self.used_days = 0
+
+    @property
+    def remaining_days(self) -> int:
+        return self.entitled_days - self.used_days
+
+    def usable_on(self, day: date) -> bool:
+        return self.available_from <= day < self.expires_at
+
+def build_periods(hire_date: Optional[date], first_day: date, last_day: date, entitled_days: int) -> List[VacationPeriod]:
+    """
+    Períodos que cobrem de first_day a last_day. Com data de admissão, cada
+    período aquisitivo tem 12 meses e as férias ficam disponíveis nos 12 meses
+    seguintes. Sem ela, vale o ano civil, com o saldo disponível no próprio ano.
+    """
+    periods = []
+    if hire_date is None:
+        for year in range(first_day.year, last_day.year + 1):
+            start, end = date(year, 1, 1), date(year + 1, 1, 1)
+            periods.append(VacationPeriod(start, end, start, end, entitled_days))
+        return periods
+
+    index = 0
+    while True:
+        start = _add_years(hire_date, index)
+        if start > last_day and periods:
+            return periods
+        end = _add_years(hire_date, index + 1)
+        periods.append(VacationPeriod(start, end, end, _add_years(hire_date, index + 2), entitled_days))
+        index += 1
+
+def allocate(periods: List[VacationPeriod], entries: List[Tuple[date, int]]) -> None:
+    """
+    Desconta os dias de cada férias do período disponível mais antigo
+    com saldo. O que sobrar (férias antecipadas) fica no período
+    aquisitivo em andamento na data.
+    """
+    for day, days in sorted(entries):
+        for period in periods:
+            if days == 0:
+                break
+            if period.usable_on(day) and period.remaining_days > 0:
+                taken = min(days, period.remaining_days)
+                period.used_days += taken
+                days -= taken
+        if days:
+            current = next((period for period in periods if period.start <= day < period.end), periods[-1])
+            current.used_days += days
+
+class UserVacations:
+    """Férias já lançadas de um usuário: id -> (data, dias), na versão `version` dos dados"""
+    def __init__(self):
+        self.entries: Dict[int, Tuple[date, int]] = {}
+        self.version: Optional[int] = None
+        self.lock = asyncio.Lock()
+
+class VacationLedger:
+    """
+    Saldo de férias por período aquisitivo. Os lançamentos de férias de cada
+    usuário ficam em memória junto com a versão dos dados (data_versions) em
+    que foram lidos, e os saldos são recalculados a partir deles. Enquanto a
+    versão não muda o cache vale; qualquer escrita, deste ou de outro
+    processo, troca a versão e a próxima leitura recarrega.
+    """
+    def __init__(self, entitled_days: int = 30, max_users: int = 1024):
+        self.entitled_days = entitled_days
+        self.max_users = max_users
+        self._users: "OrderedDict[str, UserVacations]" = OrderedDict()
+
+    def _get_user(self, user_id: str) -> UserVacations:
+        vacations = self._users.get(user_id)
+        if vacations is None:
+            vacations = UserVacations()
+            self._users[user_id] = vacations
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return vacations
+
+    async def _load(self, user_id: str, version: Optional[int] = None) -> UserVacations:
+        # Sem versão informada vale a do cache de data_versions (a mesma dos ETags)
+        if version is None:
+            version = await data_versions.get(user_id)
+        vacations = self._get_user(user_id)
+        async with vacations.lock:
+            if vacations.version != version:
+                # A versão foi lida antes das linhas: uma escrita no meio só
+                # provoca mais uma recarga, nunca um cache desatualizado
+                result = await get_db().table('non_accounting_entries')\
+                    .select('id,entry_date,days')\
+                    .eq('user_id', user_id)\
+                    .eq('type', 'ferias')\
+                    .execute_all()
+                vacations.entries = {}
+                for row in result.data:
+                    vacations.entries[row['id']] = (date.fromisoformat(row['entry_date']), row['days'])
+                vacations.version = version
+        return vacations
+
+    async def periods(self, user_id: str, hire_date: Optional[date] = None, through: Optional[date] = None,
+                      exclude_id: Optional[int] = None,
+                      extra: Optional[List[Tuple[date, int]]] = None,
+                      version: Optional[int] = None) -> List[VacationPeriod]:
+        """
+        Períodos do usuário até `through` (padrão: hoje) com os dias usados em
+        cada um. `extra` soma férias ainda não lançadas (simulação). `version`
+        é a versão dos dados já lida pelo chamador (ETag, validação).
+        """
+        vacations = await self._load(user_id, version)
+        entries = [value for entry_id, value in vacations.entries.items() if entry_id != exclude_id]
+        entries.extend(extra or [])
+
+        through = through or date.today()
+        first_day = min([day for day, _ in entries] + [hire_date or through])
+        last_day = max([day for day, _ in entries] + [through])
+        periods = build_periods(hire_date, first_day, last_day, self.entitled_days)
+        allocate(periods, entries)
+        return periods
+
+    async def balance(self, user_id: str, hire_date: Optional[date] = None, on: Optional[date] = None,
+                      exclude_id: Optional[int] = None,
+                      extra: Optional[List[Tuple[date, int]]] = None,
+                      version: Optional[int] = None) -> Tuple[int, int, int]:
+        """(dias adquiridos, usados, disponíveis) nos períodos que podem ser gozados na data"""
+        on = on or date.today()
+        periods = await self.periods(user_id, hire_date, on, exclude_id, extra, version)
+        usable = [period for period in periods if period.usable_on(on)]
+        entitled = sum(period.entitled_days for period in usable)
+        used = sum(period.used_days for period in usable)
+        # Férias antecipadas ficam no período aquisitivo em andamento, ainda não disponível
+        used += sum(
+            period.used_days for period in periods
+            if period.start <= on < period.end and not period.usable_on(on)
+        )
+        return entitled, used, entitled - used
+
+settings = get_settings()
+vacation_ledger = VacationLedger(
+    settings.VACATION_DAYS_PER_PERIOD,
+    settings.VACATION_CACHE_MAX_USERS
+)
@@ -1,9 +1,13 @@
-from datetime import datetime, date, timedelta
-from typing import Optional, Tuple
+import asyncio
+from datetime import date, time
+from typing import List, Optional, Tuple
 from fastapi import HTTPException, status
 from ..schemas.entries import TimeEntry, NonAccountingEntry, NonAccountingType
-from .auth import supabase
-from .utils import calculate_work_hours, time_periods_overlap, date_periods_overlap
+from .data_version import data_versions
+from .metrics import timed
+from .interval_index import IntervalSet, find_absence_conflicts, find_shift_conflicts, load_intervals, shift_interval, time_seconds
+from .utils import calculate_work_hours
+from .vacations import vacation_ledger
 
 class ValidationError(HTTPException):
     def __init__(self, detail: str):
@@ -12,96 +16,114 @@ class ValidationError(HTTPException):
             detail=detail
         )
 
-def validate_entry_conflicts(user_id: str, entry_date: date, start_time: time, end_time: time, entry_id: Optional[int] = None) -> None:
+async def validate_entry_conflicts(user_id: str, entry_date: date, start_time: time, end_time: time, entry_id: Optional[int] = None) -> None:
     """
     Verifica conflitos do lançamento com:
     - Outros lançamentos de tempo no mesmo dia
     - Lançamentos não contábeis no período
     """
-    # Verificar sobreposição com outros lançamentos
-    query = supabase.table('time_entries')\
-        .select('id,start_time,end_time')\
-        .eq('user_id', user_id)\
-        .eq('date', entry_date.isoformat())
-    
-    if entry_id:
-        query = query.neq('id', entry_id)
-    
-    existing_entries = query.execute()
+    # Turnos e períodos não contábeis são consultados em paralelo
+    shift_conflicts, absence_conflicts = await asyncio.gather(
+        find_shift_conflicts(user_id, entry_date, start_time, end_time, entry_id),
+        find_absence_conflicts(user_id, entry_date, 1)
+    )
     
-    for existing in existing_entries.data:
-        existing_start = datetime.strptime(existing['start_time'], '%H:%M:%S').time()
-        existing_end = datetime.strptime(existing['end_time'], '%H:%M:%S').time()
-        
-        if time_periods_overlap(start_time, end_time, existing_start, existing_end):
-            raise ValidationError("Existe sobreposição com outro lançamento no mesmo dia")
+    # Verificar sobreposição com outros lançamentos
+    if shift_conflicts:
+        raise ValidationError("Existe sobreposição com outro lançamento no mesmo dia")
     
     # Verificar conflito com lançamentos não contábeis
-    non_accounting = supabase.table('non_accounting_entries')\
-        .select('entry_date,days')\
-        .eq('user_id', user_id)\
-        .execute()
-    
-    for entry in non_accounting.data:
-        entry_start = datetime.strptime(entry['entry_date'], '%Y-%m-%d').date()
-        
-        if date_periods_overlap(entry_start, entry['days'], entry_date, 1):
-            raise ValidationError("Existe conflito com um período não contábil")
+    if absence_conflicts:
+        raise ValidationError("Existe conflito com um período não contábil")
 
-def validate_time_entry(entry: TimeEntry, user_id: str, entry_id: Optional[int] = None):
-    """Valida lançamentos de turno"""
-    today = date.today()
+def parse_month(value: str, name: str) -> Tuple[int, int]:
+    """
+    (ano, mês) de um AAAA-MM já validado pelo padrão. O ano 0000 não existe
+    em date, e dezembro de 9999 não tem mês seguinte para fechar o intervalo.
+    """
+    year, month = int(value[0:4]), int(value[5:7])
+    if not 1 <= year <= 9998:
+        raise ValidationError(f"Ano inválido em {name}")
+    return year, month
+
+def check_time_entry_rules(entry: TimeEntry, today: Optional[date] = None, allow_future: bool = False) -> None:
+    """Regras do turno que não dependem de outros lançamentos"""
+    today = today or date.today()
     
-    # Não permitir lançamentos futuros
-    if entry.date > today:
+    # Não permitir lançamentos futuros (a simulação aceita turnos planejados)
+    if entry.date > today and not allow_future:
         raise ValidationError("Não é permitido fazer lançamentos futuros")
     
     # Validar limite de 24h
     hours = calculate_work_hours(entry.start_time, entry.end_time)
     if hours > 24:
         raise ValidationError("Lançamento não pode exceder 24 horas")
-    
-    # Verificar conflitos
-    validate_entry_conflicts(user_id, entry.date, entry.start_time, entry.end_time, entry_id)
 
-def get_vacation_balance(user_id: str) -> int:
-    """Calcula saldo de férias disponível (30 dias por ano)"""
-    today = date.today()
-    start_of_year = date(today.year, 1, 1)
-    
-    # Busca dias de férias usados no ano
-    used_days = supabase.table('non_accounting_entries')\
-        .select('days')\
-        .eq('user_id', user_id)\
-        .eq('type', 'ferias')\
-        .gte('entry_date', start_of_year.isoformat())\
-        .lt('entry_date', (start_of_year + timedelta(days=365)).isoformat())\
-        .execute()
+@timed("validation")
+async def validate_time_entry(entry: TimeEntry, user_id: str, entry_id: Optional[int] = None):
+    """Valida lançamentos de turno"""
+    check_time_entry_rules(entry)
     
-    total_used = sum(entry['days'] for entry in used_days.data)
-    return 30 - total_used
+    # Verificar conflitos
+    await validate_entry_conflicts(user_id, entry.date, entry.start_time, entry.end_time, entry_id)
 
-def check_period_overlap(start_date: date, days: int, user_id: str, entry_id: Optional[int] = None) -> bool:
-    """Verifica sobreposição de períodos não contábeis"""
-    end_date = start_date + timedelta(days=days-1)
+@timed("validation")
+async def validate_time_entries_bulk(entries: List[TimeEntry], user_id: str) -> List[Optional[str]]:
+    """
+    Valida um lote de turnos como conjunto: os lançamentos existentes que
+    podem conflitar são carregados de uma vez para todo o intervalo de datas,
+    e cada turno também é comparado com os anteriores do próprio lote.
+    Retorna o erro de cada linha (None quando válida).
+    """
+    errors: List[Optional[str]] = [None] * len(entries)
+    if not entries:
+        return errors
     
-    query = supabase.table('non_accounting_entries')\
-        .select('entry_date,days')\
-        .eq('user_id', user_id)
+    intervals = await load_intervals(
+        user_id,
+        min(entry.date for entry in entries),
+        max(entry.date for entry in entries)
+    )
     
-    if entry_id:
-        query = query.neq('id', entry_id)
+    today = date.today()
+    batch = IntervalSet()
+    for position, entry in enumerate(entries):
+        try:
+            check_time_entry_rules(entry, today)
+            
+            if intervals.shift_conflicts(entry.date, entry.start_time, entry.end_time):
+                raise ValidationError("Existe sobreposição com outro lançamento no mesmo dia")
+            
+            start, end = shift_interval(entry.date, time_seconds(entry.start_time), time_seconds(entry.end_time))
+            if batch.overlapping(start, end):
+                raise ValidationError("Existe sobreposição com outro lançamento do lote")
+            
+            if intervals.absence_conflicts(entry.date, 1):
+                raise ValidationError("Existe conflito com um período não contábil")
+        except ValidationError as e:
+            errors[position] = e.detail
+            continue
         
-    existing_entries = query.execute()
+        # Linhas do lote recebem ids negativos para não colidir com os do banco
+        batch.add(start, end, -(position + 1))
     
-    for entry in existing_entries.data:
-        entry_start = datetime.strptime(entry['entry_date'], '%Y-%m-%d').date()
-        entry_end = entry_start + timedelta(days=entry['days']-1)
-        
-        if (start_date <= entry_end and end_date >= entry_start):
-            return True
-            
-    return False
+    return errors
+
+async def get_vacation_balance(user_id: str, hire_date: Optional[date] = None, on: Optional[date] = None,
+                               entry_id: Optional[int] = None) -> int:
+    """
+    Saldo de férias disponível na data, pelos períodos aquisitivos. A versão
+    dos dados é relida do banco (só a chave primária): as férias em cache só
+    são relidas se outra escrita a tiver trocado.
+    """
+    version = await data_versions.get(user_id, fresh=True)
+    _, _, available = await vacation_ledger.balance(user_id, hire_date, on, exclude_id=entry_id, version=version)
+    return available
+
+async def check_period_overlap(start_date: date, days: int, user_id: str, entry_id: Optional[int] = None) -> bool:
+    """Verifica sobreposição de períodos não contábeis"""
+    conflicts = await find_absence_conflicts(user_id, start_date, days, entry_id)
+    return bool(conflicts)
 
 # Limites máximos por tipo de ausência
 MAX_DAYS = {
@@ -112,19 +134,30 @@ MAX_DAYS = {
     NonAccountingType.outro: None  # Sem limite
 }
 
-def validate_non_accounting_entry(entry: NonAccountingEntry, user_id: str, entry_id: Optional[int] = None):
-    """Valida lançamentos não contábeis"""
+def check_non_accounting_rules(entry: NonAccountingEntry) -> None:
+    """Regras do período que não dependem de outros lançamentos"""
     # Validar limite de dias por tipo
     max_days = MAX_DAYS[entry.type]
     if max_days and entry.days > max_days:
         raise ValidationError(f"Máximo de {max_days} dias permitidos para {entry.type.value}")
+
+@timed("validation")
+async def validate_non_accounting_entry(entry: NonAccountingEntry, user_id: str, entry_id: Optional[int] = None,
+                                        hire_date: Optional[date] = None):
+    """Valida lançamentos não contábeis"""
+    check_non_accounting_rules(entry)
     
-    # Validar saldo de férias
+    # Validar saldo de férias (consultado em paralelo com a sobreposição)
     if entry.type == NonAccountingType.ferias:
-        balance = get_vacation_balance(user_id)
+        balance, has_overlap = await asyncio.gather(
+            get_vacation_balance(user_id, hire_date, entry.entry_date, entry_id),
+            check_period_overlap(entry.entry_date, entry.days, user_id, entry_id)
+        )
         if entry.days > balance:
             raise ValidationError(f"Saldo de férias insuficiente. Disponível: {balance} dias")
+    else:
+        has_overlap = await check_period_overlap(entry.entry_date, entry.days, user_id, entry_id)
     
     # Verificar sobreposição de períodos
-    if check_period_overlap(entry.entry_date, entry.days, user_id, entry_id):
-        raise ValidationError("Existe sobreposição com outro período não contábil")
+    if has_overlap:
+        raise ValidationError("Existe sobreposição com outro período não contábil")
\ No newline at end of file
@@ -1,13 +1,43 @@
+from contextlib import asynccontextmanager
+from datetime import date
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .api.v1 import auth, entries, holidays, validation, user
+from starlette.concurrency import run_in_threadpool
+from .api.v1 import auth, entries, export, holidays, ledger, metrics, reports, validation, user
+from .core.auth import get_supabase
+from .core.business_days import business_calendar
+from .core.config import get_settings
+from .core.database import close_db, get_db
+from .core.hour_engine import numpy_module
+from .core.metrics import MetricsMiddleware, TimedJSONResponse
+from .core.reports import shutdown_report_pool
+
+def warm_up():
+    """Cria de antemão o que, por padrão, só é criado na primeira requisição"""
+    get_db()
+    get_supabase()
+    numpy_module()
+    business_calendar.is_business_day(date.today())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if get_settings().WARM_START:
+        await run_in_threadpool(warm_up)
+    yield
+    # Libera o pool de conexões com o banco e o pool de processos dos relatórios
+    await close_db()
+    shutdown_report_pool()
 
 app = FastAPI(
     title="Time Tracking API",
     description="API para controle de horas trabalhadas e ausências",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse
 )
 
+settings = get_settings()
+
 # Configuração CORS
 app.add_middleware(
     CORSMiddleware,
@@ -17,12 +47,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tempo por fase, consultas por requisição e aviso de N+1
+app.add_middleware(
+    MetricsMiddleware,
+    server_timing=settings.SERVER_TIMING_ENABLED,
+    query_budget=settings.QUERY_BUDGET,
+)
+
 # Rotas
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(entries.router, prefix="/api", tags=["entries"])
+app.include_router(ledger.router, prefix="/api", tags=["ledger"])
+app.include_router(export.router, prefix="/api/export", tags=["export"])
+app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
 app.include_router(holidays.router, prefix="/api/holidays", tags=["holidays"])
 app.include_router(validation.router, prefix="/api", tags=["validation"])
 app.include_router(user.router, prefix="/api/user", tags=["user"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
 
 @app.get("/")
 async def root():
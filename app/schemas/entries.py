@@ -26,6 +26,32 @@ class NonAccountingEntry(BaseModel):
     month: Optional[int] = None
     year: Optional[int] = None
 
+class TimeEntryItem(BaseModel):
+    # Só id e date são sempre selecionados; os demais dependem de `fields`
+    id: int
+    date: date
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    comment: Optional[str] = None
+    night_time: Optional[str] = None  # adicional noturno do frontend (10 min por hora cheia entre 23h e 5h)
+    night_seconds: Optional[int] = None
+    overtime_seconds: Optional[int] = None
+
+class NonAccountingItem(BaseModel):
+    id: int
+    entry_date: date
+    days: Optional[int] = None
+    type: Optional[NonAccountingType] = None
+    comment: Optional[str] = None
+
+class TimeEntryPage(BaseModel):
+    items: list[TimeEntryItem]
+    next_cursor: Optional[str] = None
+
+class NonAccountingPage(BaseModel):
+    items: list[NonAccountingItem]
+    next_cursor: Optional[str] = None
+
 class MonthlySummary(BaseModel):
     total_days: int
     non_accounting_days: int
@@ -33,8 +59,67 @@ class MonthlySummary(BaseModel):
     expected_hours: float
     worked_hours: float
     balance_hours: float
+    # Horas noturnas e extras já contidas em worked_hours, e o total ponderado pelos adicionais
+    night_hours: float = 0.0
+    overtime_hours: float = 0.0
+    premium_hours: float = 0.0
+    premium_balance_hours: float = 0.0
 
 class MonthlyDetail(BaseModel):
     summary: MonthlySummary
     time_entries: list[TimeEntry]
     non_accounting_entries: list[NonAccountingEntry]
+
+class BulkRowResult(BaseModel):
+    index: int
+    status: str  # created, invalid, skipped ou error
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: int
+    results: list[BulkRowResult]
+
+class YearHeatmap(BaseModel):
+    year: int
+    # Nome de cada código de ausência; o índice é o código usado em `absence`
+    absence_types: list[str]
+    # Um valor por dia, de 1º de janeiro a 31 de dezembro
+    worked_minutes: list[int]
+    absence: list[int]
+    holiday: list[int]
+    business_day: list[int]
+
+class SimulationRequest(BaseModel):
+    time_entries: list[TimeEntry] = []
+    non_accounting_entries: list[NonAccountingEntry] = []
+
+class SimulationConflict(BaseModel):
+    kind: str  # time ou non_accounting
+    index: int  # posição na lista correspondente da requisição
+    error: str
+
+class SimulationMonth(BaseModel):
+    year: int
+    month: int
+    current: MonthlySummary
+    projected: MonthlySummary
+
+class SimulationResult(BaseModel):
+    months: list[SimulationMonth]
+    current_balance_hours: float
+    projected_balance_hours: float
+    conflicts: list[SimulationConflict]
+
+class LedgerMonth(BaseModel):
+    year: int
+    month: int
+    summary: MonthlySummary
+    cumulative_balance_hours: float
+
+class Ledger(BaseModel):
+    start: str
+    end: str
+    months: list[LedgerMonth]
+    totals: MonthlySummary
@@ -0,0 +1,124 @@
+"""
+Partida a frio: tempo de import de app.main e latência das primeiras requisições.
+
+Cada execução roda em um processo Python novo, como uma invocação serverless fria.
+
+Uso:
+    python -m benchmarks.cold_start --runs 10 --output cold_start.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+# Módulos pesados que a aplicação só deve carregar no primeiro uso
+DEFERRED_MODULES = ("supabase", "passlib", "numpy", "holidays")
+
+async def first_requests(years: int) -> Dict[str, float]:
+    """Mede as duas primeiras requisições autenticadas contra o Supabase em memória"""
+    import httpx
+    from app.core.auth import create_access_token, get_supabase, set_supabase
+    from app.core.database import set_db
+    from app.core.metrics import InstrumentedClient
+    from app.main import app
+    from .fake_supabase import FakeDatabase, FakeSupabaseClient, FakeUser
+    from .run import generate_history
+
+    db = FakeDatabase()
+    set_db(db)
+    fake_client = FakeSupabaseClient()
+    set_supabase(InstrumentedClient(fake_client))
+
+    user_id = "00000000-0000-0000-0000-000000000000"
+    generate_history(db, user_id, years, seed=0)
+    token = create_access_token({"sub": user_id}, expires_delta=timedelta(hours=1))
+    fake_client.auth.register(token, FakeUser(user_id))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    timings = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name in ("first_request_ms", "second_request_ms"):
+            started = time.perf_counter()
+            response = await client.get(f"/api/year/{date.today().year}", headers=headers)
+            timings[name] = (time.perf_counter() - started) * 1000
+            response.raise_for_status()
+
+    # Custo do cliente supabase real, pago só na primeira verificação remota de token
+    set_supabase(None)
+    started = time.perf_counter()
+    get_supabase()
+    timings["supabase_client_ms"] = (time.perf_counter() - started) * 1000
+    return timings
+
+def child(years: int) -> Dict:
+    """Uma invocação fria: roda no processo filho"""
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+    os.environ.setdefault("SUPABASE_KEY", "benchmark")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    started = time.perf_counter()
+    import app.main  # noqa: F401
+    result = {"import_ms": (time.perf_counter() - started) * 1000}
+    loaded_at_import = [name for name in DEFERRED_MODULES if name in sys.modules]
+
+    result.update(asyncio.run(first_requests(years)))
+    result["loaded_at_import"] = loaded_at_import
+    return result
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "median": round(statistics.median(values), 3),
+        "min": round(min(values), 3),
+        "max": round(max(values), 3),
+    }
+
+def main(args) -> Dict:
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.cold_start", "--child", "--years", str(args.years)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        runs.append(json.loads(output))
+
+    metrics = ("import_ms", "first_request_ms", "second_request_ms", "supabase_client_ms")
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "years": args.years,
+        },
+        "results": {name: summarize([run[name] for run in runs]) for name in metrics},
+        "loaded_at_import": runs[0]["loaded_at_import"],
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.cold_start", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Processos frios a medir")
+    parser.add_argument("--years", type=int, default=1, help="Anos de histórico do usuário sintético")
+    parser.add_argument("--output", help="Arquivo JSON de saída; padrão: stdout")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.child:
+        sys.stdout.write(json.dumps(child(args.years)) + "\n")
+        sys.exit(0)
+    report = main(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
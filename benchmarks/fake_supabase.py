@@ -0,0 +1,258 @@
+import asyncio
+import copy
+import re
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List
+from app.core.database import AsyncQuery, DatabaseError, QueryResult
+from app.core.hour_engine import parse_time_seconds
+
+def _normalize(value: Any) -> Any:
+    """Converte valores Python no formato em que o PostgREST os devolve"""
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    return value
+
+def _coerce(value: Any, sample: Any) -> Any:
+    """Ajusta o valor do filtro ao tipo da coluna para comparar"""
+    value = _normalize(value)
+    if isinstance(sample, bool):
+        return value in (True, 'true')
+    if isinstance(sample, int) and not isinstance(value, int):
+        return int(value)
+    if isinstance(sample, float) and not isinstance(value, float):
+        return float(value)
+    return value
+
+def _like_regex(pattern: str) -> 're.Pattern':
+    """Padrão LIKE (%, _ e * do PostgREST, com escape por \\) como regex sem distinção de caixa"""
+    parts, escaped = [], False
+    for char in pattern:
+        if escaped:
+            parts.append(re.escape(char))
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char in '%*':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.IGNORECASE | re.DOTALL)
+
+def _matches(row: dict, column: Any, operator: str, value: Any) -> bool:
+    if operator in ('after', 'before'):
+        current = tuple(row.get(name) for name in column)
+        key = tuple(_coerce(item, sample) for item, sample in zip(value, current))
+        return current > key if operator == 'after' else current < key
+    current = row.get(column)
+    if operator == 'is':
+        return current is None if value is None else current == value
+    if current is None:
+        return False
+    if operator == 'in':
+        return current in [_coerce(item, current) for item in value]
+    if operator == 'ilike':
+        return _like_regex(str(value)).fullmatch(str(current)) is not None
+    value = _coerce(value, current)
+    if operator == 'eq':
+        return current == value
+    if operator == 'neq':
+        return current != value
+    if operator == 'gt':
+        return current > value
+    if operator == 'gte':
+        return current >= value
+    if operator == 'lt':
+        return current < value
+    if operator == 'lte':
+        return current <= value
+    raise DatabaseError(f"Operador não suportado: {operator}")
+
+class FakeDatabase:
+    """
+    Substituto em memória do PostgREST com a mesma interface de
+    AsyncDatabase, contando consultas e linhas lidas
+    """
+    def __init__(self, latency_ms: float = 0.0):
+        self.tables: Dict[str, List[dict]] = defaultdict(list)
+        self.latency = latency_ms / 1000
+        self.query_count = 0
+        self.rows_fetched = 0
+        self._next_id: Dict[str, int] = defaultdict(lambda: 1)
+
+    def table(self, name: str) -> AsyncQuery:
+        return AsyncQuery(self, name)
+
+    def rpc(self, function: str, params: dict) -> AsyncQuery:
+        query = AsyncQuery(self, f'rpc/{function}')
+        query.method = 'POST'
+        query.payload = params
+        return query
+
+    def _bump_data_version(self, params: dict) -> List[dict]:
+        rows = [row for row in self.tables['user_data_versions'] if row['user_id'] == params['p_user_id']]
+        if rows:
+            rows[0]['version'] += 1
+        else:
+            rows = [{'user_id': params['p_user_id'], 'version': 1}]
+            self.tables['user_data_versions'].append(rows[0])
+        return [{'version': rows[0]['version']}]
+
+    def _save_summary_snapshots(self, params: dict) -> List[dict]:
+        versions = [row['version'] for row in self.tables['user_data_versions'] if row['user_id'] == params['p_user_id']]
+        if (versions[0] if versions else 0) != params['p_version']:
+            return [{'saved': False}]
+        table = self.tables['monthly_summary_snapshots']
+        for row in params['p_rows']:
+            key = (row['user_id'], row['year'], row['month'])
+            table[:] = [current for current in table if (current['user_id'], current['year'], current['month']) != key]
+            table.append(dict(row))
+        return [{'saved': True}]
+
+    def _recompute_queue_stats(self, params: dict) -> List[dict]:
+        # Sem os triggers do Postgres, nada entra na fila de recálculo
+        return [{'depth': 0, 'lag_seconds': 0.0}]
+
+    def _summarize_user_months(self, params: dict) -> List[dict]:
+        """Mesma agregação da função summarize_user_months do Postgres"""
+        start, end = date.fromisoformat(params['p_start']), date.fromisoformat(params['p_end'])
+        holidays = {date.fromisoformat(day) for day in params['p_holidays']}
+        months: Dict[tuple, dict] = {}
+        day = start
+        while day < end:
+            row = months.setdefault((day.year, day.month), {
+                'year': day.year, 'month': day.month, 'worked_seconds': 0, 'night_seconds': 0,
+                'overtime_seconds': 0, 'non_accounting_days': 0, 'working_days': 0
+            })
+            if day.weekday() < 5 and day not in holidays:
+                row['working_days'] += 1
+            day += timedelta(days=1)
+
+        user_rows = lambda table, column: (
+            (date.fromisoformat(row[column]), row) for row in self.tables[table]
+            if row['user_id'] == params['p_user_id'] and start.isoformat() <= row[column] < end.isoformat()
+        )
+        for day, entry in user_rows('time_entries', 'date'):
+            seconds = (parse_time_seconds(entry['end_time']) - parse_time_seconds(entry['start_time'])) % 86400
+            if seconds > params['p_break_threshold']:
+                seconds -= params['p_break_deduction']
+            row = months[(day.year, day.month)]
+            row['worked_seconds'] += seconds
+            row['night_seconds'] += entry.get('night_seconds') or 0
+            row['overtime_seconds'] += entry.get('overtime_seconds') or 0
+        for day, entry in user_rows('non_accounting_entries', 'entry_date'):
+            months[(day.year, day.month)]['non_accounting_days'] += entry['days']
+        return list(months.values())
+
+    def load(self, table: str, rows: List[dict]) -> None:
+        """Carrega linhas diretamente, sem contar como consulta"""
+        for row in rows:
+            row = _normalize(dict(row))
+            row.setdefault('id', self._next_id[table])
+            self._next_id[table] = max(self._next_id[table], row['id'] + 1)
+            self.tables[table].append(row)
+
+    def reset_counters(self) -> None:
+        self.query_count = 0
+        self.rows_fetched = 0
+
+    def _select(self, query: AsyncQuery, rows: List[dict]) -> List[dict]:
+        if query.columns == '*':
+            return [copy.copy(row) for row in rows]
+        columns = query.columns.split(',')
+        return [{column: row.get(column) for column in columns} for row in rows]
+
+    def _filtered(self, query: AsyncQuery) -> List[dict]:
+        return [
+            row for row in self.tables[query.table]
+            if all(_matches(row, column, operator, value) for column, operator, value in query.filters)
+        ]
+
+    async def execute(self, query: AsyncQuery) -> QueryResult:
+        self.query_count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if query.table.startswith('rpc/'):
+            function = getattr(self, '_' + query.table[len('rpc/'):], None)
+            if function is None:
+                raise DatabaseError(f"Função não suportada: {query.table}")
+            rows = function(query.payload)
+            self.rows_fetched += len(rows)
+            return QueryResult(rows)
+
+        if query.method == 'GET':
+            rows = self._filtered(query)
+            for column, desc in reversed(query.orders):
+                rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            rows = rows[query.offset_value or 0:]
+            if query.limit_value is not None:
+                rows = rows[:query.limit_value]
+            self.rows_fetched += len(rows)
+            return QueryResult(self._select(query, rows))
+
+        if query.method == 'POST':
+            payload = query.payload if isinstance(query.payload, list) else [query.payload]
+            written = []
+            for item in payload:
+                row = _normalize(dict(item))
+                if query.on_conflict:
+                    keys = query.on_conflict.split(',')
+                    existing = [
+                        current for current in self.tables[query.table]
+                        if all(current.get(key) == row.get(key) for key in keys)
+                    ]
+                    if existing:
+                        existing[0].update(row)
+                        written.append(existing[0])
+                        continue
+                if 'id' not in row:
+                    row['id'] = self._next_id[query.table]
+                    self._next_id[query.table] += 1
+                self.tables[query.table].append(row)
+                written.append(row)
+            return QueryResult(self._select(query, written))
+
+        if query.method == 'PATCH':
+            rows = self._filtered(query)
+            for row in rows:
+                row.update(_normalize(dict(query.payload)))
+            return QueryResult(self._select(query, rows))
+
+        if query.method == 'DELETE':
+            rows = self._filtered(query)
+            removed = {id(row) for row in rows}
+            self.tables[query.table] = [row for row in self.tables[query.table] if id(row) not in removed]
+            return QueryResult(self._select(query, rows))
+
+        raise DatabaseError(f"Método não suportado: {query.method}")
+
+    async def aclose(self):
+        pass
+
+class FakeUser:
+    """Usuário autenticado usado no lugar do retorno do Supabase Auth"""
+    def __init__(self, user_id: str):
+        self.id = user_id
+        self.app_metadata: Dict[str, Any] = {}
+
+class FakeAuth:
+    """Substituto do Supabase Auth: resolve tokens emitidos localmente"""
+    def __init__(self):
+        self.users: Dict[str, FakeUser] = {}
+        self.calls = 0
+
+    def register(self, token: str, user: FakeUser) -> None:
+        self.users[token] = user
+
+    def get_user(self, token: str):
+        self.calls += 1
+        return self.users.get(token)
+
+class FakeSupabaseClient:
+    def __init__(self):
+        self.auth = FakeAuth()
@@ -0,0 +1,206 @@
+"""
+Benchmarks da API contra um Supabase em memória.
+
+Uso:
+    python -m benchmarks.run --users 5 --years 3 --iterations 50 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+# A configuração exige estas variáveis; os valores não são usados pelo banco falso
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import httpx
+from app.core.auth import create_access_token, set_supabase
+from app.core.database import set_db
+from app.core.metrics import InstrumentedClient
+from app.main import app
+from .fake_supabase import FakeDatabase, FakeSupabaseClient, FakeUser
+
+def generate_history(db: FakeDatabase, user_id: str, years: int, seed: int) -> None:
+    """Gera turnos em dias úteis, alguns noturnos, e férias/licenças ocasionais"""
+    rng = random.Random(seed)
+    today = date.today()
+    start = date(today.year - years, 1, 1)
+    end = today - timedelta(days=1)
+
+    time_entries, non_accounting = [], []
+    day = start
+    while day <= end:
+        if day.month in (1, 7) and day.day == 5 and day.weekday() < 5:
+            # Férias de 10 dias corridos duas vezes por ano
+            non_accounting.append({
+                'user_id': user_id, 'entry_date': day, 'days': 10, 'type': 'ferias',
+                'month': day.month, 'year': day.year, 'comment': None
+            })
+            day += timedelta(days=10)
+            continue
+        if day.weekday() < 5:
+            if rng.random() < 0.1:
+                start_time, end_time = '22:00:00', '06:00:00'
+            else:
+                start_hour = rng.choice((7, 8, 9))
+                start_time, end_time = f'{start_hour:02d}:00:00', f'{start_hour + 9:02d}:00:00'
+            time_entries.append({
+                'user_id': user_id, 'date': day, 'start_time': start_time, 'end_time': end_time,
+                'month': day.month, 'year': day.year, 'comment': None, 'night_time': '00:00:00'
+            })
+        day += timedelta(days=1)
+
+    db.load('time_entries', time_entries)
+    db.load('non_accounting_entries', non_accounting)
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_scenario(client: httpx.AsyncClient, db: FakeDatabase, make_request: Callable,
+                       iterations: int, concurrency: int) -> Dict:
+    """Executa o cenário e mede latência, vazão e consultas por requisição"""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(iterations))
+
+    async def worker():
+        nonlocal errors
+        for position in counter:
+            started = time.perf_counter()
+            response = await make_request(client, position)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    db.reset_counters()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "errors": errors,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 3),
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(max(latencies), 3),
+        },
+        "throughput_rps": round(iterations / elapsed, 2),
+        "queries_per_request": round(db.query_count / iterations, 2),
+        "rows_per_request": round(db.rows_fetched / iterations, 2),
+    }
+
+def build_scenarios(users: List[str], headers: Dict[str, Dict[str, str]], years: int):
+    today = date.today()
+    past_years = [today.year - offset for offset in range(years + 1)]
+
+    def user_for(position: int) -> str:
+        return users[position % len(users)]
+
+    async def year_summary(client, position):
+        user_id = user_for(position)
+        return await client.get(f"/api/year/{past_years[position % len(past_years)]}", headers=headers[user_id])
+
+    async def month_detail(client, position):
+        user_id = user_for(position)
+        year = past_years[position % len(past_years)]
+        month = position % 12 + 1 if year < today.year else today.month
+        return await client.get(f"/api/month/{month}/{year}", headers=headers[user_id])
+
+    async def entry_validate(client, position):
+        user_id = user_for(position)
+        day = today - timedelta(days=position % 365 + 1)
+        return await client.post("/api/entries/validate", headers=headers[user_id], json={
+            "time_entry": {"date": day.isoformat(), "start_time": "12:00:00", "end_time": "13:00:00"}
+        })
+
+    async def entry_create(client, position):
+        user_id = user_for(position)
+        # Sábados não têm turnos gerados: cada iteração usa um sábado diferente
+        day = today - timedelta(days=today.weekday() + 2 + 7 * (position // len(users) + 1))
+        return await client.post("/api/entries/time", headers=headers[user_id], json={
+            "date": day.isoformat(), "start_time": "08:00:00", "end_time": "12:00:00"
+        })
+
+    async def vacation_balance(client, position):
+        return await client.get("/api/user/vacation-balance", headers=headers[user_for(position)])
+
+    return {
+        "year_summary": year_summary,
+        "month_detail": month_detail,
+        "entry_validate": entry_validate,
+        "entry_create": entry_create,
+        "vacation_balance": vacation_balance,
+    }
+
+async def main(args) -> Dict:
+    db = FakeDatabase(latency_ms=args.db_latency_ms)
+    set_db(db)
+    fake_client = FakeSupabaseClient()
+    set_supabase(InstrumentedClient(fake_client))
+
+    users, headers = [], {}
+    for index in range(args.users):
+        user_id = f"00000000-0000-0000-0000-{index:012d}"
+        generate_history(db, user_id, args.years, seed=index)
+        token = create_access_token({"sub": user_id}, expires_delta=timedelta(hours=1))
+        fake_client.auth.register(token, FakeUser(user_id))
+        users.append(user_id)
+        headers[user_id] = {"Authorization": f"Bearer {token}"}
+
+    scenarios = build_scenarios(users, headers, args.years)
+    selected = args.scenario or list(scenarios)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name in selected:
+            results[name] = await run_scenario(client, db, scenarios[name], args.iterations, args.concurrency)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "users": args.users,
+            "years": args.years,
+            "time_entries": len(db.tables['time_entries']),
+            "non_accounting_entries": len(db.tables['non_accounting_entries']),
+            "db_latency_ms": args.db_latency_ms,
+        },
+        "scenarios": results,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=5, help="Usuários sintéticos")
+    parser.add_argument("--years", type=int, default=3, help="Anos de histórico por usuário")
+    parser.add_argument("--iterations", type=int, default=50, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requisições simultâneas")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="Latência simulada por consulta")
+    parser.add_argument("--scenario", action="append", help="Cenário a executar (pode repetir); padrão: todos")
+    parser.add_argument("--output", help="Arquivo JSON de saída; padrão: stdout")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
@@ -15,7 +15,9 @@ create table time_entries (
     year int not null,
     start_time time not null,
     end_time time not null,
-    night_time interval not null default '00:00:00', -- Tempo noturno em minutos
+    night_time interval not null default '00:00:00', -- Adicional noturno do frontend: 10 min por hora cheia entre 23h e 5h
+    night_seconds integer not null default 0, -- Segundos trabalhados entre 22h e 5h (calculados pela API)
+    overtime_seconds integer not null default 0, -- Segundos além da jornada diária (calculados pela API)
     comment text,
     created_at timestamp with time zone default timezone('utc'::text, now()) not null,
     updated_at timestamp with time zone default timezone('utc'::text, now()) not null,
@@ -84,11 +86,13 @@ create index time_entries_user_id_idx on time_entries(user_id);
 create index time_entries_date_idx on time_entries(date);
 create index time_entries_month_year_idx on time_entries(month, year);
 create index time_entries_user_month_year_idx on time_entries(user_id, month, year);
+create index time_entries_user_date_id_idx on time_entries(user_id, date, id);
 
 create index non_accounting_entries_user_id_idx on non_accounting_entries(user_id);
 create index non_accounting_entries_date_idx on non_accounting_entries(date);
 create index non_accounting_entries_month_year_idx on non_accounting_entries(month, year);
 create index non_accounting_entries_user_month_year_idx on non_accounting_entries(user_id, month, year);
+create index non_accounting_entries_user_date_id_idx on non_accounting_entries(user_id, date, id);
 
 -- Triggers e políticas de segurança
 create or replace function update_updated_at_column()
@@ -0,0 +1,47 @@
+-- Snapshots dos sumários mensais calculados pela API para meses fechados
+create table if not exists monthly_summary_snapshots (
+  user_id uuid not null references auth.users(id) on delete cascade,
+  year int not null,
+  month int not null,
+  total_days int not null,
+  non_accounting_days int not null,
+  working_days int not null,
+  expected_hours double precision not null,
+  worked_hours double precision not null,
+  balance_hours double precision not null,
+  -- Versão das regras de cálculo usadas; snapshots de versões antigas são ignorados
+  rules_version int not null,
+  computed_at timestamp with time zone default timezone('utc'::text, now()) not null,
+
+  primary key (user_id, year, month),
+  constraint monthly_summary_snapshots_month_check check (month >= 1 and month <= 12)
+);
+
+-- Atualiza computed_at quando o snapshot é regravado
+create or replace function update_monthly_summary_snapshots_computed_at()
+returns trigger as $$
+begin
+  new.computed_at = timezone('utc'::text, now());
+  return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists update_monthly_summary_snapshots_computed_at on monthly_summary_snapshots;
+create trigger update_monthly_summary_snapshots_computed_at
+  before update on monthly_summary_snapshots
+  for each row
+  execute function update_monthly_summary_snapshots_computed_at();
+
+-- Habilitar RLS
+alter table monthly_summary_snapshots enable row level security;
+
+create policy "Users can view their own summary snapshots"
+  on monthly_summary_snapshots for select
+  using (auth.uid() = user_id);
+
+create policy "Users can manage their own summary snapshots"
+  on monthly_summary_snapshots for all
+  using (auth.uid() = user_id)
+  with check (auth.uid() = user_id);
+
+grant select, insert, update, delete on monthly_summary_snapshots to authenticated;
@@ -0,0 +1,12 @@
+-- Horas extras de cada turno, calculadas pela API na gravação junto com night_time
+alter table time_entries
+  add column if not exists overtime interval not null default '00:00:00';
+
+-- Adicionais noturno e de hora extra nos snapshots mensais
+alter table monthly_summary_snapshots
+  add column if not exists night_hours double precision not null default 0,
+  add column if not exists overtime_hours double precision not null default 0,
+  add column if not exists premium_hours double precision not null default 0,
+  add column if not exists premium_balance_hours double precision not null default 0;
+
+-- Lançamentos anteriores: python -m app.cli backfill-premiums --user-id <id>
@@ -0,0 +1,5 @@
+-- Listagem paginada por keyset: filtro por usuário e ordem (data, id) no mesmo índice
+create index if not exists time_entries_user_date_id_idx
+  on time_entries(user_id, date, id);
+create index if not exists non_accounting_entries_user_date_id_idx
+  on non_accounting_entries(user_id, date, id);
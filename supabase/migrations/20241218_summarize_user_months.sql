@@ -0,0 +1,74 @@
+-- Sumários mensais agregados no banco (SUMMARY_BACKEND=rpc): a API recebe
+-- uma linha por mês em vez de cada lançamento do período.
+-- As regras do intervalo e os feriados da região vêm da API, para que o
+-- resultado seja o mesmo do cálculo em Python.
+create or replace function summarize_user_months(
+    p_user_id uuid,
+    p_start date,                -- primeiro dia do primeiro mês
+    p_end date,                  -- primeiro dia do mês seguinte ao último
+    p_break_threshold integer,   -- segundos: turnos mais longos descontam o intervalo
+    p_break_deduction integer,   -- segundos descontados
+    p_holidays date[] default '{}'
+)
+returns table (
+    year integer,
+    month integer,
+    worked_seconds bigint,
+    night_seconds bigint,
+    overtime_seconds bigint,
+    non_accounting_days integer,
+    working_days integer
+)
+language sql stable
+as $$
+    with months as (
+        select m::date as month_start
+        from generate_series(p_start, p_end - 1, interval '1 month') as m
+    ),
+    shifts as (
+        select
+            date_trunc('month', t.date)::date as month_start,
+            sum(case when d.seconds > p_break_threshold then d.seconds - p_break_deduction else d.seconds end) as worked,
+            sum(extract(epoch from coalesce(t.night_time, interval '0')))::bigint as night,
+            sum(extract(epoch from coalesce(t.overtime, interval '0')))::bigint as overtime
+        from time_entries t
+        -- Fim menor que o início: o turno passou da meia-noite
+        cross join lateral (
+            select (extract(epoch from t.end_time - t.start_time)::integer + 86400) % 86400 as seconds
+        ) d
+        where t.user_id = p_user_id
+          and t.date >= p_start
+          and t.date < p_end
+        group by 1
+    ),
+    absences as (
+        select date_trunc('month', n.date)::date as month_start, sum(n.days)::integer as days
+        from non_accounting_entries n
+        where n.user_id = p_user_id
+          and n.date >= p_start
+          and n.date < p_end
+        group by 1
+    ),
+    business as (
+        select date_trunc('month', d)::date as month_start, count(*)::integer as days
+        from generate_series(p_start, p_end - 1, interval '1 day') as d
+        where extract(isodow from d) < 6
+          and not (d::date = any(p_holidays))
+        group by 1
+    )
+    select
+        extract(year from m.month_start)::integer,
+        extract(month from m.month_start)::integer,
+        coalesce(s.worked, 0)::bigint,
+        coalesce(s.night, 0)::bigint,
+        coalesce(s.overtime, 0)::bigint,
+        coalesce(a.days, 0),
+        coalesce(b.days, 0)
+    from months m
+    left join shifts s using (month_start)
+    left join absences a using (month_start)
+    left join business b using (month_start)
+    order by m.month_start;
+$$;
+
+grant execute on function summarize_user_months(uuid, date, date, integer, integer, date[]) to authenticated, service_role;
@@ -0,0 +1,13 @@
+-- Os triggers por linha recalculavam o mês inteiro de monthly_hours a cada
+-- lançamento inserido ou excluído. Eles saem aqui; a partir de
+-- 20241225_recompute_queue.sql os triggers só enfileiram os meses alterados
+-- e drain_recompute_queue() (pg_cron ou `python -m app.cli drain-recompute`)
+-- faz o recálculo.
+DROP TRIGGER IF EXISTS update_monthly_hours_after_insert ON time_entries;
+DROP TRIGGER IF EXISTS update_monthly_hours_before_delete ON time_entries;
+DROP TRIGGER IF EXISTS update_monthly_hours_after_delete ON time_entries;
+DROP TRIGGER IF EXISTS update_monthly_hours_on_time_entries ON time_entries;
+
+-- Chave do upsert feito por drain_recompute_queue()
+CREATE UNIQUE INDEX IF NOT EXISTS monthly_hours_user_year_month_idx
+    ON monthly_hours(user_id, year, month);
@@ -0,0 +1,11 @@
+-- Tokens revogados no logout. Os JWT da API não têm sessão no servidor:
+-- o hash do token fica aqui até o seu vencimento e get_current_user o recusa.
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    token_digest text PRIMARY KEY,  -- sha256 do token
+    expires_at timestamptz NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS revoked_tokens_expires_at_idx ON revoked_tokens(expires_at);
+
+-- Acesso só pela API (chave de serviço)
+ALTER TABLE revoked_tokens ENABLE ROW LEVEL SECURITY;
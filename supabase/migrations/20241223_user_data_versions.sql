@@ -0,0 +1,55 @@
+-- Versão dos dados de cada usuário, base dos ETags das leituras e da
+-- gravação condicional dos snapshots. Fica no banco para que todos os
+-- processos da API vejam as escritas uns dos outros.
+create table if not exists user_data_versions (
+  user_id uuid primary key references auth.users(id) on delete cascade,
+  version bigint not null default 0,
+  updated_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+-- Incrementa a versão do usuário (chamada pela API após cada escrita)
+create or replace function bump_data_version(p_user_id uuid)
+returns table (version bigint)
+language sql
+as $$
+  insert into user_data_versions as v (user_id, version)
+  values (p_user_id, 1)
+  on conflict (user_id) do update
+  set version = v.version + 1, updated_at = timezone('utc'::text, now())
+  returning v.version;
+$$;
+
+-- Escritas feitas fora da API (SQL, cliente supabase, CLI) também trocam a versão
+create or replace function bump_data_version_on_write()
+returns trigger as $$
+begin
+  perform bump_data_version(coalesce(new.user_id, old.user_id));
+  return null;
+end;
+$$ language plpgsql;
+
+drop trigger if exists bump_data_version_on_time_entries on time_entries;
+create trigger bump_data_version_on_time_entries
+  after insert or update or delete on time_entries
+  for each row
+  execute function bump_data_version_on_write();
+
+drop trigger if exists bump_data_version_on_non_accounting_entries on non_accounting_entries;
+create trigger bump_data_version_on_non_accounting_entries
+  after insert or update or delete on non_accounting_entries
+  for each row
+  execute function bump_data_version_on_write();
+
+-- Habilitar RLS
+alter table user_data_versions enable row level security;
+
+create policy "Users can view their own data version"
+  on user_data_versions for select
+  using (auth.uid() = user_id);
+
+create policy "Users can manage their own data version"
+  on user_data_versions for all
+  using (auth.uid() = user_id)
+  with check (auth.uid() = user_id);
+
+grant select, insert, update on user_data_versions to authenticated;
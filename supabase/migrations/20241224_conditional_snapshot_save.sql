@@ -0,0 +1,49 @@
+-- Grava os snapshots mensais só se a versão dos dados do usuário ainda for
+-- a lida antes do cálculo. O lock na linha de user_data_versions serializa a
+-- gravação com bump_data_version: um cálculo iniciado antes de uma escrita
+-- (em qualquer processo) nunca sobrescreve a invalidação feita por ela.
+create or replace function save_summary_snapshots(p_user_id uuid, p_version bigint, p_rows jsonb)
+returns table (saved boolean)
+language plpgsql
+as $$
+declare
+  current_version bigint;
+begin
+  insert into user_data_versions (user_id) values (p_user_id) on conflict (user_id) do nothing;
+  select v.version into current_version
+  from user_data_versions v
+  where v.user_id = p_user_id
+  for update;
+
+  if current_version <> p_version then
+    return query select false;
+    return;
+  end if;
+
+  insert into monthly_summary_snapshots (
+    user_id, year, month, total_days, non_accounting_days, working_days, expected_hours,
+    worked_hours, balance_hours, night_hours, overtime_hours, premium_hours,
+    premium_balance_hours, rules_version
+  )
+  select
+    r.user_id, r.year, r.month, r.total_days, r.non_accounting_days, r.working_days, r.expected_hours,
+    r.worked_hours, r.balance_hours, r.night_hours, r.overtime_hours, r.premium_hours,
+    r.premium_balance_hours, r.rules_version
+  from jsonb_populate_recordset(null::monthly_summary_snapshots, p_rows) r
+  where r.user_id = p_user_id
+  on conflict (user_id, year, month) do update set
+    total_days = excluded.total_days,
+    non_accounting_days = excluded.non_accounting_days,
+    working_days = excluded.working_days,
+    expected_hours = excluded.expected_hours,
+    worked_hours = excluded.worked_hours,
+    balance_hours = excluded.balance_hours,
+    night_hours = excluded.night_hours,
+    overtime_hours = excluded.overtime_hours,
+    premium_hours = excluded.premium_hours,
+    premium_balance_hours = excluded.premium_balance_hours,
+    rules_version = excluded.rules_version;
+
+  return query select true;
+end;
+$$;
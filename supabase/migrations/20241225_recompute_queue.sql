@@ -0,0 +1,161 @@
+-- Fila de recálculo de monthly_hours no próprio banco. Os triggers só marcam
+-- os meses alterados (uma linha por usuário/mês e por instrução, sem varrer o
+-- mês), então escritas feitas fora da API também entram na fila. O
+-- recálculo sai do caminho da escrita: drain_recompute_queue() é chamada
+-- pelo pg_cron ou por `python -m app.cli drain-recompute`.
+create table if not exists recompute_queue (
+  user_id uuid not null references auth.users(id) on delete cascade,
+  year integer not null,
+  month integer not null,
+  first_enqueued_at timestamp with time zone not null default now(),  -- início do atraso (lag)
+  last_enqueued_at timestamp with time zone not null default now(),   -- base do debounce
+  primary key (user_id, year, month)
+);
+
+create index if not exists recompute_queue_first_enqueued_at_idx on recompute_queue(first_enqueued_at);
+
+-- Acessada só pelas funções abaixo (security definer) e pelo service role
+alter table recompute_queue enable row level security;
+
+-- Marca os meses das linhas alteradas pela instrução; várias escritas no
+-- mesmo mês viram uma única entrada, que só adia o debounce
+create or replace function enqueue_recompute_months()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if tg_op in ('INSERT', 'UPDATE') then
+    insert into recompute_queue (user_id, year, month)
+    select distinct user_id, year, month from new_rows
+    on conflict (user_id, year, month) do update set last_enqueued_at = now();
+  end if;
+  if tg_op in ('UPDATE', 'DELETE') then
+    insert into recompute_queue (user_id, year, month)
+    select distinct user_id, year, month from old_rows
+    on conflict (user_id, year, month) do update set last_enqueued_at = now();
+  end if;
+  return null;
+end;
+$$;
+
+-- Os triggers por linha recalculavam o mês inteiro a cada lançamento
+drop trigger if exists update_monthly_hours_after_insert on time_entries;
+drop trigger if exists update_monthly_hours_before_delete on time_entries;
+drop trigger if exists update_monthly_hours_after_delete on time_entries;
+drop trigger if exists update_monthly_hours_on_time_entries on time_entries;
+
+drop trigger if exists enqueue_recompute_after_insert on time_entries;
+create trigger enqueue_recompute_after_insert
+  after insert on time_entries
+  referencing new table as new_rows
+  for each statement
+  execute function enqueue_recompute_months();
+
+drop trigger if exists enqueue_recompute_after_update on time_entries;
+create trigger enqueue_recompute_after_update
+  after update on time_entries
+  referencing old table as old_rows new table as new_rows
+  for each statement
+  execute function enqueue_recompute_months();
+
+drop trigger if exists enqueue_recompute_after_delete on time_entries;
+create trigger enqueue_recompute_after_delete
+  after delete on time_entries
+  referencing old table as old_rows
+  for each statement
+  execute function enqueue_recompute_months();
+
+-- Recalcula os meses que estão há `p_debounce_seconds` sem escrita nova.
+-- `for update skip locked` faz cada chamada concorrente pegar meses
+-- diferentes; a entrada só sai da fila no commit do recálculo, então uma
+-- falha a deixa para a próxima chamada. Uma escrita concorrente espera o
+-- commit e enfileira o mês de novo. Mesma regra de horas trabalhadas dos
+-- sumários da API (desconto do intervalo), mais o adicional noturno do
+-- frontend (night_time), que os triggers antigos também somavam. Retorna
+-- quantos meses recalculou.
+create or replace function drain_recompute_queue(
+  p_limit integer default 500,
+  p_debounce_seconds double precision default 2,
+  p_break_threshold integer default 21600,  -- segundos: turnos mais longos descontam o intervalo
+  p_break_deduction integer default 3600    -- segundos descontados
+)
+returns table (recomputed integer)
+language sql
+security definer
+set search_path = public
+as $$
+  with claimed as (
+    select user_id, year, month
+    from recompute_queue
+    where last_enqueued_at <= now() - make_interval(secs => p_debounce_seconds)
+    order by first_enqueued_at
+    limit p_limit
+    for update skip locked
+  ),
+  totals as (
+    select
+      c.user_id,
+      c.year,
+      c.month,
+      coalesce(sum(
+        case when d.seconds > p_break_threshold then d.seconds - p_break_deduction else d.seconds end
+        + extract(epoch from t.night_time)::integer
+      ), 0) as seconds
+    from claimed c
+    left join time_entries t
+      on t.user_id = c.user_id and t.month = c.month and t.year = c.year
+    -- Fim menor que o início: o turno passou da meia-noite
+    left join lateral (
+      select (extract(epoch from t.end_time - t.start_time)::integer + 86400) % 86400 as seconds
+    ) d on true
+    group by c.user_id, c.year, c.month
+  ),
+  saved as (
+    insert into monthly_hours (user_id, year, month, total_worked_minutes)
+    select user_id, year, month, round(seconds / 60.0)::integer
+    from totals
+    on conflict (user_id, year, month) do update
+    set total_worked_minutes = excluded.total_worked_minutes,
+        updated_at = timezone('utc'::text, now())
+  ),
+  removed as (
+    delete from recompute_queue q
+    using claimed c
+    where q.user_id = c.user_id and q.year = c.year and q.month = c.month
+    returning 1
+  )
+  select count(*)::integer from removed;
+$$;
+
+-- Profundidade da fila e idade da entrada mais antiga, para /api/metrics
+create or replace function recompute_queue_stats()
+returns table (depth bigint, lag_seconds double precision)
+language sql
+stable
+security definer
+set search_path = public
+as $$
+  select count(*), coalesce(extract(epoch from now() - min(first_enqueued_at)), 0)::double precision
+  from recompute_queue;
+$$;
+
+revoke execute on function drain_recompute_queue(integer, double precision, integer, integer) from public;
+grant execute on function drain_recompute_queue(integer, double precision, integer, integer) to service_role;
+revoke execute on function recompute_queue_stats() from public;
+grant execute on function recompute_queue_stats() to service_role;
+
+-- Meses gravados enquanto monthly_hours ficou sem trigger
+insert into recompute_queue (user_id, year, month)
+select distinct user_id, year, month from time_entries
+on conflict (user_id, year, month) do nothing;
+
+-- Com o pg_cron disponível, o banco esvazia a fila sozinho a cada minuto
+do $$
+begin
+  if exists (select 1 from pg_extension where extname = 'pg_cron') then
+    perform cron.schedule('drain-recompute-queue', '* * * * *', 'select drain_recompute_queue()');
+  end if;
+end;
+$$;
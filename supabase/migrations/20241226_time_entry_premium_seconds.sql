@@ -0,0 +1,104 @@
+-- O split noturno/extra da API ia para night_time e overtime, mas night_time
+-- já é o adicional do frontend (10 min por hora cheia entre 23h e 5h,
+-- calculateNightTime em src/services/api.ts), somado às horas trabalhadas
+-- por calculateTotalTime e useYearData. Os segundos da API passam para
+-- colunas próprias e night_time volta a ter só o adicional.
+alter table time_entries
+  add column if not exists night_seconds integer not null default 0,
+  add column if not exists overtime_seconds integer not null default 0;
+
+-- overtime só era gravada pela API
+update time_entries
+set overtime_seconds = extract(epoch from overtime)::integer
+where overtime <> interval '0';
+
+alter table time_entries drop column if exists overtime;
+
+-- Linhas em que a API ou o backfill-premiums gravaram os segundos noturnos
+-- em night_time voltam ao adicional do frontend. Zero não precisa de
+-- correção: sem hora entre 22h e 5h também não há adicional.
+update time_entries t
+set night_time = make_interval(mins => 10 * (
+  select count(*)::integer
+  from generate_series(
+    extract(hour from t.start_time)::integer,
+    extract(hour from t.end_time)::integer + case when t.end_time < t.start_time then 24 else 0 end - 1
+  ) as h
+  where h % 24 >= 23 or h % 24 < 5
+))
+where t.night_time <> interval '0';
+
+-- Segundos noturnos e extras dos lançamentos existentes:
+--   python -m app.cli backfill-premiums --user-id <id>
+
+-- Sumários agregados no banco passam a ler as colunas novas
+create or replace function summarize_user_months(
+    p_user_id uuid,
+    p_start date,                -- primeiro dia do primeiro mês
+    p_end date,                  -- primeiro dia do mês seguinte ao último
+    p_break_threshold integer,   -- segundos: turnos mais longos descontam o intervalo
+    p_break_deduction integer,   -- segundos descontados
+    p_holidays date[] default '{}'
+)
+returns table (
+    year integer,
+    month integer,
+    worked_seconds bigint,
+    night_seconds bigint,
+    overtime_seconds bigint,
+    non_accounting_days integer,
+    working_days integer
+)
+language sql stable
+as $$
+    with months as (
+        select m::date as month_start
+        from generate_series(p_start, p_end - 1, interval '1 month') as m
+    ),
+    shifts as (
+        select
+            date_trunc('month', t.date)::date as month_start,
+            sum(case when d.seconds > p_break_threshold then d.seconds - p_break_deduction else d.seconds end) as worked,
+            sum(t.night_seconds)::bigint as night,
+            sum(t.overtime_seconds)::bigint as overtime
+        from time_entries t
+        -- Fim menor que o início: o turno passou da meia-noite
+        cross join lateral (
+            select (extract(epoch from t.end_time - t.start_time)::integer + 86400) % 86400 as seconds
+        ) d
+        where t.user_id = p_user_id
+          and t.date >= p_start
+          and t.date < p_end
+        group by 1
+    ),
+    absences as (
+        select date_trunc('month', n.date)::date as month_start, sum(n.days)::integer as days
+        from non_accounting_entries n
+        where n.user_id = p_user_id
+          and n.date >= p_start
+          and n.date < p_end
+        group by 1
+    ),
+    business as (
+        select date_trunc('month', d)::date as month_start, count(*)::integer as days
+        from generate_series(p_start, p_end - 1, interval '1 day') as d
+        where extract(isodow from d) < 6
+          and not (d::date = any(p_holidays))
+        group by 1
+    )
+    select
+        extract(year from m.month_start)::integer,
+        extract(month from m.month_start)::integer,
+        coalesce(s.worked, 0)::bigint,
+        coalesce(s.night, 0)::bigint,
+        coalesce(s.overtime, 0)::bigint,
+        coalesce(a.days, 0),
+        coalesce(b.days, 0)
+    from months m
+    left join shifts s using (month_start)
+    left join absences a using (month_start)
+    left join business b using (month_start)
+    order by m.month_start;
+$$;
+
+grant execute on function summarize_user_months(uuid, date, date, integer, integer, date[]) to authenticated, service_role;
@@ -0,0 +1,47 @@
+-- Snapshots e versões dos dados são escritos só pela API (chave de serviço)
+-- e pelas funções abaixo. Com as políticas "manage" o próprio usuário podia
+-- gravar snapshots com qualquer saldo e subir ou congelar a sua versão (e com
+-- ela os ETags e a gravação condicional dos snapshots).
+drop policy if exists "Users can manage their own summary snapshots" on monthly_summary_snapshots;
+revoke insert, update, delete on monthly_summary_snapshots from authenticated, anon;
+grant select on monthly_summary_snapshots to authenticated;
+
+drop policy if exists "Users can manage their own data version" on user_data_versions;
+revoke insert, update, delete on user_data_versions from authenticated, anon;
+grant select on user_data_versions to authenticated;
+
+-- Rodam com o dono: o trigger dos lançamentos continua trocando a versão
+-- quando o usuário escreve direto pelo cliente supabase
+create or replace function bump_data_version(p_user_id uuid)
+returns table (version bigint)
+language sql
+security definer
+set search_path = public
+as $$
+  insert into user_data_versions as v (user_id, version)
+  values (p_user_id, 1)
+  on conflict (user_id) do update
+  set version = v.version + 1, updated_at = timezone('utc'::text, now())
+  returning v.version;
+$$;
+
+create or replace function bump_data_version_on_write()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  perform bump_data_version(coalesce(new.user_id, old.user_id));
+  return null;
+end;
+$$;
+
+alter function save_summary_snapshots(uuid, bigint, jsonb) security definer;
+alter function save_summary_snapshots(uuid, bigint, jsonb) set search_path = public;
+
+-- As RPCs recebem o user_id como parâmetro: só a API pode chamá-las
+revoke execute on function bump_data_version(uuid) from public, anon, authenticated;
+grant execute on function bump_data_version(uuid) to service_role;
+revoke execute on function save_summary_snapshots(uuid, bigint, jsonb) from public, anon, authenticated;
+grant execute on function save_summary_snapshots(uuid, bigint, jsonb) to service_role;
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Configuração mínima para importar app.core sem .env
+os.environ.setdefault("SECRET_KEY", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
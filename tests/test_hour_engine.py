@@ -0,0 +1,38 @@
+import pytest
+from app.core.hour_engine import ShiftSplit, premium_columns, split_shift, weighted_hours, worked_seconds
+
+HOUR = 3600
+
+def seconds(value: str) -> int:
+    hours, minutes = value.split(':')
+    return int(hours) * HOUR + int(minutes) * 60
+
+def split(start: str, end: str) -> ShiftSplit:
+    return split_shift(seconds(start), seconds(end))
+
+def test_day_shift_without_premiums():
+    assert split("08:00", "12:00") == ShiftSplit(4 * HOUR, 0, 0)
+
+def test_overtime_counted_from_end_of_shift():
+    # 10h com 1h de intervalo: 9h trabalhadas, 1h além da jornada de 8h
+    assert split("08:00", "18:00") == ShiftSplit(8 * HOUR, 0, HOUR)
+
+def test_night_shift_crossing_midnight():
+    # 22h às 6h: o intervalo sai da hora diurna (5h às 6h) e sobram 7h noturnas
+    assert split("22:00", "06:00") == ShiftSplit(0, 7 * HOUR, 0)
+
+def test_early_morning_is_night_time():
+    assert split("02:00", "04:00") == ShiftSplit(0, 2 * HOUR, 0)
+
+def test_long_shift_splits_into_all_bands():
+    # 18h às 6h: 11h trabalhadas; as 3h finais são extras, 22h às 3h noturnas
+    result = split("18:00", "06:00")
+    assert result == ShiftSplit(3 * HOUR, 5 * HOUR, 3 * HOUR)
+    assert result.worked == worked_seconds(seconds("18:00"), seconds("06:00"))
+
+def test_weighted_hours_applies_multipliers():
+    assert weighted_hours(10, 2, 1) == pytest.approx(10 + 2 * 0.2 + 1 * 0.5)
+
+def test_premium_columns_leave_night_time_alone():
+    # night_time é o adicional do frontend; o split vai para colunas próprias
+    assert premium_columns(seconds("22:00"), seconds("06:00")) == {'night_seconds': 7 * HOUR, 'overtime_seconds': 0}
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import date, time
+from app.core.database import set_db
+from app.core.hour_engine import SECONDS_PER_DAY, time_seconds
+from app.core.interval_index import IntervalSet, absence_interval, find_absence_conflicts, find_shift_conflicts, shift_interval
+from benchmarks.fake_supabase import FakeDatabase
+
+DAY = date(2024, 3, 10)
+
+def shift(day: date, start: str, end: str):
+    return shift_interval(day, time_seconds(time.fromisoformat(start)), time_seconds(time.fromisoformat(end)))
+
+def test_shift_interval_crosses_midnight():
+    start, end = shift(DAY, "22:00", "06:00")
+    assert end - start == 8 * 3600
+    assert end == (DAY.toordinal() + 1) * SECONDS_PER_DAY + 6 * 3600
+
+def test_overlap_with_next_day_shift():
+    shifts = IntervalSet()
+    shifts.add(*shift(DAY, "22:00", "06:00"), 1)
+    assert [item[2] for item in shifts.overlapping(*shift(date(2024, 3, 11), "05:00", "08:00"))] == [1]
+    assert shifts.overlapping(*shift(date(2024, 3, 11), "06:00", "08:00")) == []
+
+def test_overlap_with_same_day_late_shift():
+    shifts = IntervalSet()
+    shifts.add(*shift(DAY, "22:00", "06:00"), 1)
+    assert len(shifts.overlapping(*shift(DAY, "23:00", "23:30"))) == 1
+    assert shifts.overlapping(*shift(DAY, "08:00", "22:00")) == []
+
+def test_overlapping_excludes_id_and_handles_long_intervals():
+    shifts = IntervalSet()
+    shifts.add(*shift(DAY, "00:00", "23:00"), 1)
+    shifts.add(*shift(DAY, "23:00", "23:30"), 2)
+    assert [item[2] for item in shifts.overlapping(*shift(DAY, "22:30", "23:15"))] == [1, 2]
+    assert [item[2] for item in shifts.overlapping(*shift(DAY, "22:30", "23:15"), exclude_id=1)] == [2]
+
+def test_add_replaces_and_remove():
+    shifts = IntervalSet()
+    shifts.add(*shift(DAY, "08:00", "12:00"), 1)
+    shifts.add(*shift(DAY, "13:00", "17:00"), 1)
+    assert len(shifts) == 1
+    shifts.add(*shift(date(2024, 3, 11), "08:00", "12:00"), 2)
+    assert shifts.remove(1)
+    assert [item[2] for item in shifts.overlapping(0, 10 ** 12)] == [2]
+    assert not shifts.remove(1)
+
+def test_absence_interval_is_half_open():
+    absences = IntervalSet()
+    absences.add(*absence_interval(DAY, 3), 1)
+    assert absences.overlapping(*absence_interval(date(2024, 3, 12), 1))
+    assert absences.overlapping(*absence_interval(date(2024, 3, 13), 1)) == []
+
+def test_conflict_lookups_read_only_dates_that_can_overlap():
+    db = FakeDatabase()
+    set_db(db)
+    user_id = "user"
+    db.load('time_entries', [
+        {'id': 7, 'user_id': user_id, 'date': '2024-03-09', 'start_time': '22:00:00', 'end_time': '02:00:00'},
+        {'id': 8, 'user_id': user_id, 'date': '2024-03-12', 'start_time': '00:00:00', 'end_time': '23:00:00'},
+    ])
+    # Licença longa iniciada dois meses antes ainda cobre a data
+    db.load('non_accounting_entries', [
+        {'id': 3, 'user_id': user_id, 'entry_date': '2024-01-15', 'days': 60, 'type': 'licenca_medica'},
+        {'id': 4, 'user_id': user_id, 'entry_date': '2024-03-11', 'days': 1, 'type': 'outro'},
+    ])
+
+    async def scenario():
+        return (
+            await find_shift_conflicts(user_id, DAY, time(1), time(3)),
+            await find_absence_conflicts(user_id, DAY, 1),
+            await find_absence_conflicts(user_id, DAY, 2, exclude_id=3),
+        )
+
+    shifts, absences, excluded = asyncio.run(scenario())
+    assert [item[2] for item in shifts] == [7]
+    assert [item[2] for item in absences] == [3]
+    assert [item[2] for item in excluded] == [4]
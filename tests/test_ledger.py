@@ -0,0 +1,35 @@
+import asyncio
+import httpx
+from app.core.auth import get_current_user
+from app.core.database import set_db
+from app.main import app
+from benchmarks.fake_supabase import FakeDatabase, FakeUser
+
+def get_ledger(params: dict) -> httpx.Response:
+    set_db(FakeDatabase())
+    app.dependency_overrides[get_current_user] = lambda: FakeUser("user")
+
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/ledger", params=params)
+
+    try:
+        return asyncio.run(request())
+    finally:
+        app.dependency_overrides.clear()
+
+def test_ledger_rejects_year_zero():
+    response = get_ledger({"start": "0000-01", "end": "2024-01"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Ano inválido em start"
+
+def test_ledger_rejects_month_after_year_9999():
+    assert get_ledger({"start": "9999-01", "end": "9999-12"}).status_code == 400
+
+def test_ledger_accumulates_balance():
+    response = get_ledger({"start": "2024-01", "end": "2024-02"})
+    assert response.status_code == 200
+    months = response.json()["months"]
+    assert [(month["year"], month["month"]) for month in months] == [(2024, 1), (2024, 2)]
+    assert months[1]["cumulative_balance_hours"] == months[0]["summary"]["balance_hours"] + months[1]["summary"]["balance_hours"]
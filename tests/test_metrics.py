@@ -0,0 +1,27 @@
+import asyncio
+import time
+from app.core.metrics import RequestMetrics, _current, phase, record_db_call
+
+def test_db_and_nested_phases_are_not_counted_twice():
+    request = RequestMetrics()
+    token = _current.set(request)
+
+    async def query():
+        record_db_call(0.05, 1)
+
+    async def scenario():
+        with phase("validation"):
+            # Consulta em outra tarefa e fase interna: ambas saem de validation
+            await asyncio.gather(query())
+            with phase("compute"):
+                time.sleep(0.02)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        _current.reset(token)
+
+    assert request.phases["db"] == 0.05
+    assert request.phases["compute"] >= 0.02
+    # 0,05 s de consulta (simulada) e a fase interna cobrem todo o bloco
+    assert request.phases["validation"] == 0.0
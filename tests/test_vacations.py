@@ -0,0 +1,63 @@
+import asyncio
+from datetime import date
+from app.core.database import set_db
+from app.core.vacations import VacationLedger, VacationPeriod, _add_years, allocate, build_periods, hire_date_of
+from benchmarks.fake_supabase import FakeDatabase, FakeUser
+
+def test_add_years_from_leap_day():
+    assert _add_years(date(2024, 2, 29), 1) == date(2025, 2, 28)
+    assert _add_years(date(2024, 2, 29), 4) == date(2028, 2, 29)
+    assert _add_years(date(2023, 7, 15), 2) == date(2025, 7, 15)
+
+def test_usable_on_is_half_open():
+    period = VacationPeriod(date(2023, 1, 1), date(2024, 1, 1), date(2024, 1, 1), date(2025, 1, 1), 30)
+    assert not period.usable_on(date(2023, 12, 31))
+    assert period.usable_on(date(2024, 1, 1))
+    assert not period.usable_on(date(2025, 1, 1))
+
+def test_periods_from_hire_date_on_leap_day():
+    periods = build_periods(date(2020, 2, 29), date(2020, 2, 29), date(2022, 6, 1), 30)
+    assert [(period.start, period.end) for period in periods] == [
+        (date(2020, 2, 29), date(2021, 2, 28)),
+        (date(2021, 2, 28), date(2022, 2, 28)),
+        (date(2022, 2, 28), date(2023, 2, 28)),
+    ]
+    # Disponível nos 12 meses após o fim do período aquisitivo
+    assert (periods[0].available_from, periods[0].expires_at) == (date(2021, 2, 28), date(2022, 2, 28))
+
+def test_periods_without_hire_date_follow_calendar_year():
+    periods = build_periods(None, date(2023, 5, 1), date(2024, 2, 1), 30)
+    assert [(period.start, period.available_from, period.expires_at) for period in periods] == [
+        (date(2023, 1, 1), date(2023, 1, 1), date(2024, 1, 1)),
+        (date(2024, 1, 1), date(2024, 1, 1), date(2025, 1, 1)),
+    ]
+
+def test_allocate_uses_oldest_period_then_advances():
+    periods = build_periods(date(2020, 1, 1), date(2020, 1, 1), date(2021, 12, 31), 30)
+    allocate(periods, [(date(2021, 12, 1), 15), (date(2021, 6, 1), 20)])
+    # 30 dias do primeiro período; os 5 restantes são antecipados do período em andamento
+    assert [period.used_days for period in periods] == [30, 5]
+
+def test_hire_date_ignores_user_editable_metadata():
+    user = FakeUser("user")
+    user.user_metadata = {'hire_date': '2020-01-01'}
+    assert hire_date_of(user) is None
+    user.app_metadata['hire_date'] = '2021-03-01'
+    assert hire_date_of(user) == date(2021, 3, 1)
+
+def test_ledger_reloads_when_data_version_changes():
+    db = FakeDatabase()
+    set_db(db)
+    ledger = VacationLedger()
+    user_id = "user"
+    on = date(2024, 6, 1)
+
+    async def scenario():
+        assert (await ledger.balance(user_id, on=on, version=1))[2] == 30
+        # Gravado por outro processo: na mesma versão o cache continua valendo
+        db.load('non_accounting_entries', [{'id': 3, 'user_id': user_id, 'entry_date': '2024-03-01',
+                                            'days': 10, 'type': 'ferias'}])
+        assert (await ledger.balance(user_id, on=on, version=1))[2] == 30
+        return (await ledger.balance(user_id, on=on, version=2))[2]
+
+    assert asyncio.run(scenario()) == 20